@@ -0,0 +1,3 @@
+from benchmarks.runner import Baseline, Benchmark, compare, measure
+
+__all__ = ["Baseline", "Benchmark", "compare", "measure"]
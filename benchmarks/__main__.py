@@ -0,0 +1,79 @@
+import re
+import sys
+import json
+import logging
+import argparse
+from pathlib import Path
+from typing import List, Optional
+from playwright.sync_api import sync_playwright
+from pages.chat_page import ChatPage
+from pages.login_page import login_with_env_credentials
+from utils.captcha import arm_interstitial_guard
+from utils.chat_seeder import ChatSeeder
+from utils.round_trips import round_trips
+from utils.session_cache import SessionCache
+from benchmarks.page_objects import page_object_benchmarks
+from benchmarks.runner import Baseline, compare, environment, measure, print_report
+from stub_app import start_stub
+from config import Config
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Микробенчмарки page object'ов на локальной заглушке: python -m benchmarks [--save-baseline]"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Микробенчмарки операций page object'ов")
+    parser.add_argument("-k", "--filter", default=None, help="регулярка по имени бенчмарка")
+    parser.add_argument("--iterations", type=int, default=Config.BENCHMARK_ITERATIONS, help="замеров на бенчмарк")
+    parser.add_argument("--warmup", type=int, default=Config.BENCHMARK_WARMUP, help="прогревочных повторов без замера")
+    parser.add_argument("--baseline", default=None, help="JSON базы (по умолчанию Config.BENCHMARK_BASELINE_PATH)")
+    parser.add_argument("--threshold", type=float, default=Config.BENCHMARK_THRESHOLD,
+                        help="допустимый рост среднего (0.2 = +20%%) при непересекающихся интервалах")
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить результаты как новую базу")
+    parser.add_argument("--output", default=None, help="JSON с результатами прогона")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    # Без задержек стриминга: меряется слой page object'ов, а не заглушка
+    server, auth_state = start_stub(token_rate=0, latency_ms=0)
+
+    results = {}
+    round_trips.install()
+    try:
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.launch(**dict(Config.launch_options(), headless=True, slow_mo=0))
+            try:
+                env = environment(browser.version)
+                storage_state = SessionCache(auth_state).get_state(browser, login_with_env_credentials)
+                context = browser.new_context(viewport={"width": 1280, "height": 720}, storage_state=storage_state)
+                arm_interstitial_guard(context)
+                seeder = ChatSeeder(context.request)
+                try:
+                    for benchmark in page_object_benchmarks(ChatPage(context.new_page()), seeder):
+                        if args.filter and not re.search(args.filter, benchmark.name):
+                            continue
+                        results[benchmark.name] = measure(benchmark, args.warmup, args.iterations)
+                        print(f"{benchmark.name}: {results[benchmark.name]['mean_ms']:.2f} ms", file=sys.stderr)
+                finally:
+                    seeder.cleanup()
+                    context.close()
+            finally:
+                browser.close()
+    finally:
+        round_trips.uninstall()
+        server.stop()
+
+    baseline = Baseline(args.baseline)
+    rows = compare(results, baseline.benchmarks, args.threshold)
+    print_report(rows, env, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps({"environment": env, "benchmarks": results}, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        baseline.update(results, env)
+        print(f"Baseline saved to {baseline.path}")
+        return 0
+    if not baseline.benchmarks:
+        print(f"No baseline at {baseline.path}, run with --save-baseline to create one")
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
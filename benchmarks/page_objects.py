@@ -0,0 +1,43 @@
+from itertools import cycle
+from typing import Iterable, List
+from pages.chat_page import ChatPage
+from utils.captcha import check_captcha
+from utils.chat_seeder import ChatSeeder, build_turns
+from benchmarks.runner import Benchmark
+from config import Config
+
+# Размеры переписки (блоков пользователя и AI) для get_last_ai_message
+TRANSCRIPT_SIZES = (10, 100, 1000)
+
+
+def page_object_benchmarks(chat_page: ChatPage, seeder: ChatSeeder,
+                           transcript_sizes: Iterable[int] = TRANSCRIPT_SIZES) -> List[Benchmark]:
+    """Основные операции BasePage/ChatPage на странице чатов локальной заглушки"""
+    page = chat_page.page
+    complexities = cycle(["Regular", "Professional"])
+
+    def open_chats():
+        chat_page.open_chat(Config.CHATS_URL)
+
+    def prompts_popup():
+        chat_page.open_prompts_popup()
+        chat_page.close_prompts_popup()
+
+    def transcript(blocks: int):
+        def setup():
+            chat = seeder.seed(build_turns(blocks // 2))
+            chat_page.open_chat(chat["url"], user_messages=blocks // 2)
+        return setup
+
+    benchmarks = [
+        Benchmark("navigate_to", lambda: chat_page.navigate_to(Config.CHATS_URL)),
+        Benchmark("click", lambda: chat_page.click(chat_page.chat_title), open_chats),
+        Benchmark("fill", lambda: chat_page.fill(chat_page.message_input, "Benchmark message"), open_chats),
+        Benchmark("get_text", lambda: chat_page.get_text(chat_page.chat_title), open_chats),
+        Benchmark("prompts_popup", prompts_popup, open_chats),
+        Benchmark("configure_chat_settings", lambda: chat_page.configure_chat_settings(next(complexities)), open_chats),
+    ]
+    for blocks in transcript_sizes:
+        benchmarks.append(Benchmark(f"get_last_ai_message[{blocks}]", chat_page.get_last_ai_message, transcript(blocks)))
+    benchmarks.append(Benchmark("check_captcha", lambda: check_captcha(page), open_chats))
+    return benchmarks
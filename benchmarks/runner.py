@@ -0,0 +1,150 @@
+import gc
+import sys
+import json
+import time
+import random
+import platform
+import statistics
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from utils.round_trips import round_trips
+from utils.step_profiler import percentile
+from config import Config
+
+
+class Benchmark:
+    """Измеряемая операция: setup выполняется один раз перед прогревом, operation - на каждой итерации"""
+
+    def __init__(self, name: str, operation: Callable[[], object], setup: Optional[Callable[[], object]] = None):
+        self.name = name
+        self.operation = operation
+        self.setup = setup
+
+
+def bootstrap_ci(values: List[float], statistic: Callable[[List[float]], float],
+                 confidence: float = 95, resamples: int = 1000) -> List[float]:
+    """Доверительный интервал статистики бутстрепом (фиксированный seed - отчет повторяем)"""
+    rng = random.Random(0)
+    estimates = [statistic(rng.choices(values, k=len(values))) for _ in range(resamples)]
+    tail = (100 - confidence) / 2
+    return [round(percentile(estimates, tail), 3), round(percentile(estimates, 100 - tail), 3)]
+
+
+def summarize(samples_ms: List[float], trips: int) -> dict:
+    """Среднее и перцентили с 95% доверительными интервалами; round_trips - обращений к драйверу на операцию"""
+    return {
+        "iterations": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3),
+        "mean_ci95_ms": bootstrap_ci(samples_ms, statistics.fmean),
+        "stdev_ms": round(statistics.stdev(samples_ms), 3) if len(samples_ms) > 1 else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p50_ci95_ms": bootstrap_ci(samples_ms, lambda values: percentile(values, 50)),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "min_ms": round(min(samples_ms), 3),
+        "max_ms": round(max(samples_ms), 3),
+        "round_trips": round(trips / len(samples_ms), 2),
+    }
+
+
+def measure(benchmark: Benchmark, warmup: int, iterations: int) -> dict:
+    if benchmark.setup:
+        benchmark.setup()
+    for _ in range(warmup):
+        benchmark.operation()
+    # Мусор от прогрева не должен собираться посреди замеров
+    gc.collect()
+    samples = []
+    round_trips.start_test(benchmark.name)
+    for _ in range(iterations):
+        started = time.perf_counter()
+        benchmark.operation()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples, round_trips.finish_test()["round_trips"])
+
+
+def environment(browser_version: str) -> dict:
+    """Окружение замеров: сравнение с базой, снятой в другом окружении, ненадежно"""
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "playwright": metadata.version("playwright"),
+        "browser": browser_version,
+    }
+
+
+class Baseline:
+    """Базовые результаты бенчмарков (Config.BENCHMARK_BASELINE_PATH)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or Config.BENCHMARK_BASELINE_PATH)
+        self.data = self._load()
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    @property
+    def benchmarks(self) -> Dict[str, dict]:
+        return self.data.get("benchmarks", {})
+
+    def update(self, results: Dict[str, dict], env: dict):
+        """Сохраняет результаты как новую базу; бенчмарки, не вошедшие в прогон, остаются прежними"""
+        self.data = {
+            "created_at": time.time(),
+            "environment": env,
+            "benchmarks": dict(self.benchmarks, **results),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: Optional[float] = None) -> List[dict]:
+    """Сравнение с базой: regression - среднее выросло больше чем на threshold и интервалы не пересекаются,
+    либо операция стала делать больше обращений к драйверу; improvement - симметрично"""
+    threshold = Config.BENCHMARK_THRESHOLD if threshold is None else threshold
+    rows = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        row = {"benchmark": name, "mean_ms": current["mean_ms"], "mean_ci95_ms": current["mean_ci95_ms"],
+               "p50_ms": current["p50_ms"], "p95_ms": current["p95_ms"], "round_trips": current["round_trips"]}
+        if not base:
+            rows.append(dict(row, status="new"))
+            continue
+        row["baseline_mean_ms"] = base["mean_ms"]
+        row["change"] = round(current["mean_ms"] / base["mean_ms"] - 1, 4) if base["mean_ms"] else 0.0
+        low, high = current["mean_ci95_ms"]
+        base_low, base_high = base["mean_ci95_ms"]
+        if current["round_trips"] > base["round_trips"] + 0.5 or (
+            row["change"] > threshold and low > base_high
+        ):
+            status = "regression"
+        elif row["change"] < -threshold and high < base_low:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append(dict(row, status=status))
+    return rows
+
+
+def format_report(rows: List[dict]) -> List[str]:
+    lines = [f"{'benchmark':32} {'mean':>9} {'±ci95':>8} {'p50':>9} {'p95':>9} {'trips':>6} {'base':>9} {'change':>8}  status"]
+    for row in rows:
+        low, high = row["mean_ci95_ms"]
+        base = f"{row['baseline_mean_ms']:9.2f}" if "baseline_mean_ms" in row else f"{'-':>9}"
+        change = f"{row['change']:+8.1%}" if "change" in row else f"{'-':>8}"
+        lines.append(f"{row['benchmark']:32} {row['mean_ms']:9.2f} {(high - low) / 2:8.2f} {row['p50_ms']:9.2f} "
+                     f"{row['p95_ms']:9.2f} {row['round_trips']:6.1f} {base} {change}  {row['status']}")
+    return lines
+
+
+def print_report(rows: List[dict], env: dict, baseline: Baseline):
+    base_env = baseline.data.get("environment")
+    if base_env and base_env != env:
+        changed = ", ".join(f"{key}: {base_env.get(key)} -> {value}" for key, value in env.items() if base_env.get(key) != value)
+        print(f"Warning: baseline was recorded in a different environment ({changed})", file=sys.stderr)
+    for line in format_report(rows):
+        print(line)
@@ -3,13 +3,164 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 
+def _parse_budgets(value: str) -> dict:
+    """'smoke:ttft_ms=10000,total_ms=30000;critical:...' -> {'smoke': {'ttft_ms': 10000.0, ...}, ...}"""
+    budgets = {}
+    for part in filter(None, value.split(';')):
+        marker, _, limits = part.partition(':')
+        budgets[marker.strip()] = {
+            name.strip(): float(limit) for name, _, limit in (item.partition('=') for item in limits.split(',') if item)
+        }
+    return budgets
+
+
+# Профили запуска браузера: ci - быстрый headless без замедления, local - окно браузера, debug - окно и slow-mo
+LAUNCH_PROFILES = {
+    'ci': {'headless': True, 'slow_mo': 0},
+    'local': {'headless': False, 'slow_mo': 0},
+    'debug': {'headless': False, 'slow_mo': 500},
+}
+DEFAULT_BROWSER_ARGS = ['--disable-blink-features=AutomationControlled']
+
+
 class Config:
     # Загружаем .env файл
     env_path = Path(__file__).parent / '.env'
     if env_path.exists():
         load_dotenv(env_path)
-    
+
     # Значения по умолчанию для CI
     BASE_URL = os.getenv('BASE_URL', 'https://app.ailawyer.pro')
     LOGIN_URL = os.getenv('LOGIN_URL', f'{BASE_URL}/login/')
-    CHATS_URL = os.getenv('CHATS_URL', f'{BASE_URL}/chats/')
\ No newline at end of file
+    CHATS_URL = os.getenv('CHATS_URL', f'{BASE_URL}/chats/')
+    PROMPTS_API_URL = os.getenv('PROMPTS_API_URL', f'{BASE_URL}/api/prompts')
+    CHATS_API_URL = os.getenv('CHATS_API_URL', f'{BASE_URL}/api/chats')
+
+    # Тестовые данные: префикс имен и возраст (сек), после которого остатки чужих прогонов удаляются
+    TEST_DATA_PREFIX = os.getenv('TEST_DATA_PREFIX', 'autotest-')
+    TEST_DATA_SWEEP_AGE = int(os.getenv('TEST_DATA_SWEEP_AGE', 60 * 60))
+
+    # Режим приложения: live - BASE_URL, stub - локальная заглушка из stub_app (поднимается в процессе тестов)
+    APP_MODE = os.getenv('APP_MODE', 'live')
+    STUB_HOST = os.getenv('STUB_HOST', '127.0.0.1')
+    STUB_PORT = int(os.getenv('STUB_PORT', 0))  # 0 - свободный порт, у каждого воркера свой
+    STUB_TOKEN_RATE = float(os.getenv('STUB_TOKEN_RATE', 200))  # токенов ответа в секунду, 0 - без задержек
+    STUB_LATENCY_MS = int(os.getenv('STUB_LATENCY_MS', 50))  # задержка до первого токена
+
+    # Запуск браузера: профиль (по умолчанию ci в CI, иначе local) и точечные переопределения его параметров
+    BROWSER_PROFILE = os.getenv('BROWSER_PROFILE', 'ci' if os.getenv('CI') else 'local')
+    BROWSER_HEADLESS = os.getenv('BROWSER_HEADLESS')  # on/off, пусто - как в профиле
+    BROWSER_SLOW_MO = os.getenv('BROWSER_SLOW_MO')  # мс, пусто - как в профиле
+    BROWSER_ARGS = [a for a in os.getenv('BROWSER_ARGS', ','.join(DEFAULT_BROWSER_ARGS)).split(',') if a]
+    BROWSER_CHANNEL = os.getenv('BROWSER_CHANNEL') or None  # chrome, msedge, ... пусто - Chromium из Playwright
+
+    # Долгоживущий сервер браузера (python -m utils.browser_server): on - подключаться к нему вместо запуска
+    BROWSER_SERVER = os.getenv('BROWSER_SERVER', 'off') != 'off'
+    BROWSER_SERVER_STATE_PATH = os.getenv('BROWSER_SERVER_STATE_PATH', '.perf/browser_server.json')
+
+    # Кэш авторизованной сессии (storage_state) и время его жизни в секундах
+    AUTH_STATE_PATH = os.getenv(
+        'AUTH_STATE_PATH',
+        str(Path(__file__).parent / '.auth' / ('storage_state.stub.json' if APP_MODE == 'stub' else 'storage_state.json'))
+    )
+    AUTH_STATE_TTL = int(os.getenv('AUTH_STATE_TTL', 6 * 60 * 60))
+
+    # Ожидание ответа AI: регулярка URL стримингового запроса и окна "тишины" DOM в мс
+    # (только эндпоинт ответа модели: списки /api/chats и долгоживущие event stream'ы не должны совпадать)
+    CHAT_STREAM_PATTERN = os.getenv('CHAT_STREAM_PATTERN', r'/api/(chat|completions?)(/stream)?/?(\?|$)')
+    AI_RESPONSE_QUIET_MS = int(os.getenv('AI_RESPONSE_QUIET_MS', 1500))
+    AI_RESPONSE_SETTLE_MS = int(os.getenv('AI_RESPONSE_SETTLE_MS', 300))
+
+    # Запись/воспроизведение ответов модели: off, record, replay
+    COMPLETIONS_MODE = os.getenv('COMPLETIONS_MODE', 'off')
+    COMPLETIONS_DIR = os.getenv('COMPLETIONS_DIR', str(Path(__file__).parent / 'recordings' / 'completions'))
+    COMPLETIONS_TTL_DAYS = float(os.getenv('COMPLETIONS_TTL_DAYS', 14))  # 0 - записи не устаревают
+    COMPLETIONS_REPLAY_SPEED = float(os.getenv('COMPLETIONS_REPLAY_SPEED', 1.0))  # 1 - исходные паузы, 0 - мгновенно
+
+    # Политика ресурсов: блокировка аналитики/медиа по типу и URL (регулярки через запятую)
+    # и общий дисковый кэш неизменяемой статики. RESOURCE_POLICY=off отключает всё
+    RESOURCE_POLICY = os.getenv('RESOURCE_POLICY', 'on') != 'off'
+    BLOCKED_RESOURCE_TYPES = [t for t in os.getenv('BLOCKED_RESOURCE_TYPES', 'media').split(',') if t]
+    BLOCKED_URL_PATTERNS = [p for p in os.getenv('BLOCKED_URL_PATTERNS', '').split(',') if p]
+    ALLOWED_URL_PATTERNS = [p for p in os.getenv('ALLOWED_URL_PATTERNS', '').split(',') if p]
+    ALLOWED_RESOURCE_TYPES = [t for t in os.getenv('ALLOWED_RESOURCE_TYPES', '').split(',') if t]
+    STATIC_CACHE_DIR = os.getenv('STATIC_CACHE_DIR', str(Path(__file__).parent / '.cache' / 'http'))
+    STATIC_CACHE = os.getenv('STATIC_CACHE', 'on') != 'off'
+
+    # Облегченные действия BasePage: без отдельного wait_for перед click/fill/get_text
+    # (Playwright сам дожидается actionability), on - включить
+    LEAN_ACTIONS = os.getenv('LEAN_ACTIONS', 'off') != 'off'
+
+    # Профилировщик шагов page object'ов (on - включить) и SQLite с таймингами прогонов
+    STEP_PROFILER = os.getenv('STEP_PROFILER', 'off') != 'off'
+    PERF_DB_PATH = os.getenv('PERF_DB_PATH', str(Path(__file__).parent / '.perf' / 'steps.sqlite'))
+
+    # Профилировщик стоимости локаторов на живом DOM (on - включить), отчет в .perf/selectors.<воркер>.json
+    SELECTOR_PROFILER = os.getenv('SELECTOR_PROFILER', 'off') != 'off'
+
+    # Метрики ответов AI: JSON прогона и бюджеты задержки по маркерам тестов (ttft_ms, total_ms)
+    RESPONSE_METRICS_PATH = os.getenv('RESPONSE_METRICS_PATH', str(Path(__file__).parent / '.perf' / 'response_metrics.json'))
+    LATENCY_BUDGETS = _parse_budgets(os.getenv(
+        'LATENCY_BUDGETS', 'smoke:ttft_ms=10000,total_ms=30000;critical:ttft_ms=15000,total_ms=30000'
+    ))
+
+    # Скриншоты: формат (jpeg/png), качество JPEG, полная страница или только viewport,
+    # предельный суммарный объем артефактов прогона в МБ на все воркеры xdist (0 - без ограничения)
+    ARTIFACTS_FORMAT = os.getenv('ARTIFACTS_FORMAT', 'jpeg')
+    ARTIFACTS_QUALITY = int(os.getenv('ARTIFACTS_QUALITY', 70))
+    ARTIFACTS_FULL_PAGE = os.getenv('ARTIFACTS_FULL_PAGE', 'off') != 'off'
+    ARTIFACTS_MAX_MB = int(os.getenv('ARTIFACTS_MAX_MB', 200))
+
+    # Прогретые авторизованные страницы чата, переиспользуемые между тестами (0 - новая страница на тест)
+    CHAT_PAGE_POOL_SIZE = int(os.getenv('CHAT_PAGE_POOL_SIZE', 1))
+
+    # История длительностей и падений тестов для --schedule и --shard
+    DURATIONS_PATH = os.getenv('DURATIONS_PATH', str(Path(__file__).parent / '.perf' / 'durations.json'))
+
+    # Карта влияния: какие функции, фикстуры и локаторы затронул каждый тест (--impact-record / --impact-diff)
+    IMPACT_MAP_PATH = os.getenv('IMPACT_MAP_PATH', str(Path(__file__).parent / '.perf' / 'impact.json'))
+
+    # Снимки DOM для офлайн-проверки локаторов (python -m utils.dom_preflight capture|check, pytest --preflight)
+    DOM_SNAPSHOTS_DIR = os.getenv('DOM_SNAPSHOTS_DIR', str(Path(__file__).parent / '.perf' / 'dom_snapshots'))
+
+    # Микробенчмарки page object'ов (python -m benchmarks): база, допустимый рост среднего, замеры и прогрев
+    BENCHMARK_BASELINE_PATH = os.getenv('BENCHMARK_BASELINE_PATH', str(Path(__file__).parent / '.perf' / 'benchmark_baseline.json'))
+    BENCHMARK_THRESHOLD = float(os.getenv('BENCHMARK_THRESHOLD', 0.2))
+    BENCHMARK_ITERATIONS = int(os.getenv('BENCHMARK_ITERATIONS', 30))
+    BENCHMARK_WARMUP = int(os.getenv('BENCHMARK_WARMUP', 5))
+
+    # Повторы тестов с маркером flaky: число повторов, базовая пауза (удваивается), бюджет повторов на воркер
+    FLAKY_RETRIES = int(os.getenv('FLAKY_RETRIES', 2))
+    FLAKY_BACKOFF_MS = int(os.getenv('FLAKY_BACKOFF_MS', 500))
+    FLAKY_RETRY_BUDGET = int(os.getenv('FLAKY_RETRY_BUDGET', 10))
+    # Статистика нестабильности и карантин: доля прогонов с повтором из последних FLAKY_HISTORY при минимуме прогонов
+    FLAKES_PATH = os.getenv('FLAKES_PATH', str(Path(__file__).parent / '.perf' / 'flakes.json'))
+    FLAKY_HISTORY = int(os.getenv('FLAKY_HISTORY', 20))
+    FLAKY_QUARANTINE_RATE = float(os.getenv('FLAKY_QUARANTINE_RATE', 0.3))
+    FLAKY_QUARANTINE_MIN_RUNS = int(os.getenv('FLAKY_QUARANTINE_MIN_RUNS', 5))
+
+    # Максимум одновременно живых контекстов браузера на одного воркера
+    CONTEXT_POOL_SIZE = int(os.getenv('CONTEXT_POOL_SIZE', 2))
+
+    @classmethod
+    def launch_options(cls) -> dict:
+        """Параметры chromium.launch по профилю BROWSER_PROFILE с учетом переопределений BROWSER_*"""
+        if cls.BROWSER_PROFILE not in LAUNCH_PROFILES:
+            raise ValueError(f"Unknown BROWSER_PROFILE {cls.BROWSER_PROFILE!r}, expected one of {sorted(LAUNCH_PROFILES)}")
+        options = dict(LAUNCH_PROFILES[cls.BROWSER_PROFILE], args=list(cls.BROWSER_ARGS))
+        if cls.BROWSER_HEADLESS:
+            options['headless'] = cls.BROWSER_HEADLESS != 'off'
+        if cls.BROWSER_SLOW_MO:
+            options['slow_mo'] = int(cls.BROWSER_SLOW_MO)
+        if cls.BROWSER_CHANNEL:
+            options['channel'] = cls.BROWSER_CHANNEL
+        return options
+
+    @classmethod
+    def use_base_url(cls, base_url: str):
+        """Переключает все URL приложения на другой адрес (например, на локальную заглушку)"""
+        cls.BASE_URL = base_url.rstrip('/')
+        cls.LOGIN_URL = f'{cls.BASE_URL}/login/'
+        cls.CHATS_URL = f'{cls.BASE_URL}/chats/'
+        cls.PROMPTS_API_URL = f'{cls.BASE_URL}/api/prompts'
+        cls.CHATS_API_URL = f'{cls.BASE_URL}/api/chats'
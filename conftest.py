@@ -1,15 +1,34 @@
-import os
 import logging
+import json
 import pytest
-from playwright.sync_api import sync_playwright, expect
-from pages.login_page import LoginPage
+import allure
+from playwright.sync_api import sync_playwright, expect, Page, TimeoutError as PlaywrightTimeoutError
+from pages.login_page import LoginPage, login_with_env_credentials
 from pages.chat_page import ChatPage
-from utils.captcha import check_captcha
+from pages.base_page import BasePage
+from utils.captcha import arm_interstitial_guard
+from utils.session_cache import SessionCache
+from utils.browser_pool import BrowserPool
+from utils.browser_server import browser_server
+from utils.chat_page_pool import ChatPagePool
+from utils.artifacts import capture_screenshot, artifact_writer
+from utils.completion_recorder import CompletionRecorder
+from utils.prompt_factory import PromptFactory
+from utils.chat_seeder import ChatSeeder, SeedingUnsupported
+from utils.network_policy import NetworkPolicy
+from utils.sleep_budget import sleep_budget
+from utils.round_trips import round_trips
+from utils.step_profiler import step_profiler
+from utils.selector_profiler import selector_profiler
+from utils.response_metrics import response_metrics
+from stub_app import start_stub
 from dotenv import load_dotenv
 from config import Config
 
 load_dotenv()
 
+pytest_plugins = ["utils.scheduling", "utils.flaky", "utils.impact", "utils.dom_preflight"]
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -21,46 +40,249 @@ def pytest_runtest_makereport(item, call):
     setattr(item, f"rep_{rep.when}", rep)
 
 
-@pytest.fixture(autouse=True)
-def take_screenshot_on_failure(request, page):
-    """Делает скриншот при падении теста"""
-    yield
-    
-    # Проверяем все возможные статусы
-    if hasattr(request.node, "rep_call") and request.node.rep_call.failed:
-        os.makedirs("screenshots", exist_ok=True)
-        test_name = request.node.name.replace("[", "_").replace("]", "_")
-        screenshot_path = f"screenshots/failure_{test_name}.png"
-        
+def _test_pages(item):
+    """Sync-страницы теста: фикстуры-страницы и страницы page object'ов (без повторов)"""
+    pages = []
+    for value in getattr(item, "funcargs", {}).values():
+        page = value.page if isinstance(value, BasePage) else value
+        if isinstance(page, Page) and page not in pages:
+            pages.append(page)
+    return pages
+
+
+def _screenshot_on_failure(item):
+    """Скриншот упавшего теста, пока его страницы ещё открыты"""
+    test_name = item.name.replace("[", "_").replace("]", "_")
+    for page in _test_pages(item):
         try:
-            page.screenshot(path=screenshot_path, full_page=True)
-            logger.info(f"Screenshot saved to {screenshot_path}")
+            screenshot_path = capture_screenshot(page, f"failure_{test_name}_")
+            if screenshot_path:
+                logger.info(f"Screenshot saved to {screenshot_path}")
         except Exception as e:
             logger.error(f"Failed to take screenshot: {str(e)}")
 
 
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """Бюджеты задержки, скриншот при падении и замер локаторов - пока фикстуры теста живы"""
+    try:
+        result = yield
+        # Функционально успешный тест падает, если ответы AI не уложились в бюджет его маркеров
+        violations = response_metrics.budget_violations(marker.name for marker in item.iter_markers())
+        if violations:
+            pytest.fail("Latency budget exceeded:\n" + "\n".join(violations), pytrace=False)
+    except pytest.xfail.Exception:
+        # XFailed - подкласс Failed: ожидаемое падение без скриншота
+        raise
+    except (Exception, pytest.fail.Exception) as e:
+        # skip/KeyboardInterrupt сюда не попадают: это не падение теста
+        # Page object уже снял состояние при ошибке (BasePage._handle_error)
+        if not getattr(e, "screenshot_path", None):
+            _screenshot_on_failure(item)
+        raise
+    finally:
+        if Config.SELECTOR_PROFILER:
+            for value in item.funcargs.values():
+                if isinstance(value, BasePage):
+                    selector_profiler.sample(value.page, [value])
+    return result
+
+
+def _reset_before_retry(item):
+    """Сброс перед повтором flaky-теста: страницы чата - в исходное состояние, метрики ответов - заново"""
+    response_metrics.start_test(item.nodeid)
+    pool = item.funcargs.get("chat_page_pool")
+    for value in item.funcargs.values():
+        if pool and isinstance(value, ChatPage):
+            pool.reset(value)
+
+
+def pytest_configure(config):
+    # Импорт здесь, а не в начале файла: плагин из pytest_plugins должен импортироваться первым (assert rewrite)
+    from utils.flaky import add_reset_hook
+    add_reset_hook(_reset_before_retry)
+    sleep_budget.install()
+    round_trips.install()
+    if Config.STEP_PROFILER:
+        step_profiler.install()
+    if Config.SELECTOR_PROFILER:
+        selector_profiler.install()
+
+
+def pytest_unconfigure(config):
+    artifact_writer.flush()
+    sleep_budget.uninstall()
+    round_trips.uninstall()
+    step_profiler.uninstall()
+    selector_profiler.uninstall()
+    path = selector_profiler.save()
+    if path:
+        logger.info(f"Selector cost ranking saved to {path}")
+    path = response_metrics.save()
+    if path:
+        logger.info(f"AI response metrics saved to {path}")
+
+
+def pytest_terminal_summary(terminalreporter):
+    sections = (
+        ("sleep budget", sleep_budget.summary()),
+        ("driver round trips", round_trips.summary()),
+        ("selector cost", selector_profiler.summary()),
+    )
+    for title, lines in sections:
+        if lines:
+            terminalreporter.write_sep("-", title)
+            for line in lines:
+                terminalreporter.write_line(line)
+
+
+@pytest.fixture(autouse=True)
+def sleep_budget_report(request):
+    """Простой теста в time.sleep/wait_for_timeout по местам вызова (вложение Allure)"""
+    sleep_budget.start_test(request.node.nodeid)
+    yield
+    sites = sleep_budget.finish_test()
+    if sites:
+        report = {"total_s": round(sum(sites.values()), 3), "sites": {site: round(s, 3) for site, s in sites.items()}}
+        allure.attach(json.dumps(report, indent=2), name="sleep_budget", attachment_type=allure.attachment_type.JSON)
+
+
+@pytest.fixture(autouse=True)
+def response_metrics_report(request):
+    """Метрики ответов AI за тест: время до первого токена, общее время, символы в секунду"""
+    response_metrics.start_test(request.node.nodeid)
+    yield
+    responses = response_metrics.finish_test()
+    if responses:
+        allure.attach(json.dumps(responses, indent=2, ensure_ascii=False), name="response_metrics",
+                      attachment_type=allure.attachment_type.JSON)
+
+
+@pytest.fixture(autouse=True)
+def round_trips_report(request):
+    """Число обращений к драйверу Playwright и время в них за тест (вложение Allure)"""
+    round_trips.start_test(request.node.nodeid)
+    yield
+    report = round_trips.finish_test()
+    if report["round_trips"]:
+        allure.attach(json.dumps(report, indent=2), name="round_trips", attachment_type=allure.attachment_type.JSON)
+
+
+@pytest.fixture(autouse=True)
+def step_profile_report(request):
+    """Вложенные тайминги методов page object'ов за тест (при Config.STEP_PROFILER)"""
+    if not Config.STEP_PROFILER:
+        yield
+        return
+    step_profiler.start_test(request.node.nodeid)
+    yield
+    report = step_profiler.finish_test()
+    if report["steps"]:
+        allure.attach(json.dumps(report, indent=2), name="step_timings", attachment_type=allure.attachment_type.JSON)
+
+
+@pytest.fixture(autouse=True)
+def selector_profile_report():
+    """Стоимость локаторов page object'ов теста (при Config.SELECTOR_PROFILER, вложение Allure)"""
+    if not Config.SELECTOR_PROFILER:
+        yield
+        return
+    selector_profiler.start_test()
+    yield
+    samples = selector_profiler.finish_test()
+    if samples:
+        allure.attach(json.dumps(samples, indent=2), name="selector_cost", attachment_type=allure.attachment_type.JSON)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def app_server():
+    """Локальная заглушка приложения при APP_MODE=stub: все URL Config переключаются на неё"""
+    if Config.APP_MODE != "stub":
+        yield None
+        return
+
+    server, _ = start_stub()
+    yield server
+    server.stop()
+
+
 @pytest.fixture(scope="session")
 def browser():
-    """Запуск браузера с параметрами"""
+    """Браузер по профилю Config.BROWSER_PROFILE (один на процесс, т.е. на воркер xdist)
+
+    С BROWSER_SERVER=on тесты подключаются к долгоживущему серверу браузера вместо запуска.
+    """
     with sync_playwright() as playwright:
-        browser = playwright.chromium.launch(
-            headless=False,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-            ]
-        )
+        if Config.BROWSER_SERVER:
+            browser = browser_server.connect(playwright.chromium)
+        else:
+            browser = playwright.chromium.launch(**Config.launch_options())
         yield browser
         browser.close()
 
 
+@pytest.fixture(scope="session")
+def session_cache():
+    """Кэш авторизованной сессии, общий для всех воркеров"""
+    return SessionCache()
+
+
+@pytest.fixture(scope="session")
+def auth_state(browser, session_cache):
+    """Путь к актуальному storage_state (логин выполняется один раз)"""
+    return session_cache.get_state(browser, login_with_env_credentials)
+
+
+@pytest.fixture(scope="session")
+def completion_recorder():
+    """Запись/воспроизведение ответов модели (Config.COMPLETIONS_MODE)"""
+    recorder = CompletionRecorder()
+    if recorder.enabled:
+        removed = recorder.store.prune()
+        logger.info(f"Completions {recorder.mode} mode, evicted {removed} expired recordings")
+    yield recorder
+    if recorder.mode == "replay":
+        logger.info(f"Completion replay: {recorder.hits} hits, {recorder.misses} misses")
+
+
+@pytest.fixture(scope="session")
+def network_policy():
+    """Блокировка аналитики/медиа и общий кэш статики (Config.RESOURCE_POLICY)"""
+    return NetworkPolicy() if Config.RESOURCE_POLICY else None
+
+
+@pytest.fixture(scope="session")
+def browser_pool(browser, completion_recorder, network_policy):
+    """Ограниченный пул контекстов браузера текущего воркера"""
+    pool = BrowserPool(
+        browser,
+        max_size=Config.CONTEXT_POOL_SIZE,
+        context_options={"viewport": {"width": 1280, "height": 720}},
+        on_create=[arm_interstitial_guard, completion_recorder.attach] + ([network_policy.attach] if network_policy else []),
+    )
+    yield pool
+    pool.close()
+
+
 @pytest.fixture
-def context(browser):
+def context(browser_pool, completion_recorder, network_policy, request):
     """Создание контекста с настройками"""
-    context = browser.new_context(
-        viewport={"width": 1280, "height": 720},
-    )
+    # Тестам с авторизацией сразу отдаём контекст из сохранённой сессии
+    storage_state = None
+    if "authed_page" in request.fixturenames:
+        storage_state = request.getfixturevalue("auth_state")
+
+    context = browser_pool.acquire(storage_state=storage_state)
+    completion_recorder.reset(context)
+    if network_policy:
+        network_policy.reset(context)
     yield context
-    context.close()
+
+    if network_policy:
+        stats = network_policy.stats(context)
+        logger.info(f"Network savings: {stats}")
+        allure.attach(json.dumps(stats, indent=2), name="network_savings", attachment_type=allure.attachment_type.JSON)
+    browser_pool.release(context)
 
 
 @pytest.fixture
@@ -78,22 +300,105 @@ def login_page(page):
 
 
 @pytest.fixture
-def authed_page(page):
-    login_page = LoginPage(page)
-    
-    # # Проверка CAPTCHA перед авторизацией
-    check_captcha(page)
-
-    google_auth_page = login_page.login(
-        role="Test",
-        email=os.getenv("GOOGLE_EMAIL"),
-        password=os.getenv("GOOGLE_PASS")
-    )
-    
+def authed_page(page, session_cache):
+    """Страница с авторизованной сессией из кэша (перелогин, если сессия протухла)"""
+    session_cache.ensure_page(page, login_with_env_credentials)
+
     expect(page).to_have_url(Config.CHATS_URL, timeout=30000)
     return page
 
+@pytest.fixture(scope="session")
+def chat_page_pool(browser_pool, auth_state, session_cache):
+    """Пул прогретых авторизованных страниц чата (Config.CHAT_PAGE_POOL_SIZE, 0 - без переиспользования)"""
+    pool = ChatPagePool(
+        browser_pool,
+        auth_state,
+        prepare=lambda page: session_cache.ensure_page(page, login_with_env_credentials),
+        size=Config.CHAT_PAGE_POOL_SIZE,
+    )
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def chat_page(chat_page_pool, completion_recorder, network_policy, request):
+    """Фикстура для работы с чатом: страница из пула, после теста сбрасывается и возвращается"""
+    chat_page = chat_page_pool.lease()
+    context = chat_page.page.context
+    completion_recorder.reset(context)
+    if network_policy:
+        network_policy.reset(context)
+    expect(chat_page.page).to_have_url(Config.CHATS_URL, timeout=30000)
+    yield chat_page
+
+    if network_policy:
+        stats = network_policy.stats(context)
+        logger.info(f"Network savings: {stats}")
+        allure.attach(json.dumps(stats, indent=2), name="network_savings", attachment_type=allure.attachment_type.JSON)
+    # Страницу упавшего теста не переиспользуем: её состояние неизвестно
+    failed = hasattr(request.node, "rep_call") and request.node.rep_call.failed
+    chat_page_pool.give_back(chat_page, reusable=not failed)
+
+
+@pytest.fixture(scope="session")
+def prompt_sweeper():
+    """Один раз за сессию воркера удаляет тестовые промпты, оставшиеся от прошлых прогонов"""
+    swept = []
+
+    def sweep(factory: PromptFactory):
+        if not swept:
+            swept.append(factory.sweep())
+    return sweep
+
+
 @pytest.fixture
-def chat_page(authed_page):
-    """Фикстура для работы с чатом"""
-    return ChatPage(authed_page)
\ No newline at end of file
+def prompt_factory(chat_page, prompt_sweeper):
+    """Создание и удаление custom prompts через API авторизованной сессии chat_page (без API - через UI)"""
+
+    def delete_via_ui(text: str) -> bool:
+        # Страница после теста может быть в любом состоянии: открываем попап промптов заново
+        chat_page.navigate_to(Config.CHATS_URL)
+        chat_page.open_prompts_popup()
+        chat_page.expand_prompt_category("Custom prompts")
+        try:
+            chat_page.page.get_by_text(text).first.wait_for(state="visible", timeout=5000)
+        except PlaywrightTimeoutError:
+            return False  # промпт не был сохранен (например, создание отменено)
+        chat_page.delete_prompt(text)
+        return True
+
+    factory = PromptFactory(chat_page.page.context.request, ui_delete=delete_via_ui)
+    try:
+        prompt_sweeper(factory)
+    except Exception as e:
+        logger.warning(f"Failed to sweep leftover prompts: {str(e)}")
+    yield factory
+    # Выполняется и после падения теста: все промпты теста удаляются пачкой через API
+    factory.cleanup()
+
+
+@pytest.fixture
+def seed_chat(chat_page):
+    """Открывает chat_page на чате с готовой историей: seed_chat(turns, fallback=True) -> ChatPage
+
+    Без поддержки засева в приложении история создается через модель (fallback=True,
+    отправляются только реплики пользователя) или тест пропускается (fallback=False).
+    """
+    seeder = ChatSeeder(chat_page.page.context.request)
+
+    def seed(turns, fallback: bool = True) -> ChatPage:
+        user_texts = [turn["text"] for turn in turns if turn["role"] == "user"]
+        try:
+            chat = seeder.seed(turns)
+        except SeedingUnsupported as e:
+            if not fallback:
+                pytest.skip(str(e))
+            logger.warning(f"{str(e)}, building the history through the model")
+            for text in user_texts:
+                chat_page.send_message_and_wait_for_response(text)
+            return chat_page
+        chat_page.open_chat(chat["url"], user_messages=len(user_texts))
+        return chat_page
+
+    yield seed
+    seeder.cleanup()
@@ -0,0 +1,6 @@
+from pages.aio.base_page import AsyncBasePage
+from pages.aio.chat_page import AsyncChatPage
+from pages.aio.google_auth_page import AsyncGoogleAuthPage
+from pages.aio.login_page import AsyncLoginPage, async_login_with_env_credentials
+
+__all__ = ["AsyncBasePage", "AsyncChatPage", "AsyncGoogleAuthPage", "AsyncLoginPage", "async_login_with_env_credentials"]
@@ -0,0 +1,117 @@
+import logging
+from typing import Optional
+from playwright.async_api import Page, Locator, expect
+from config import Config
+from utils.artifacts import async_capture_screenshot
+from utils.captcha import raise_if_interstitial
+
+logger = logging.getLogger(__name__)
+
+class AsyncBasePage:
+    def __init__(self, page: Page):
+        self.page = page
+        self.default_timeout = 10000
+        self.lean_actions = Config.LEAN_ACTIONS
+
+    # Навигация
+    async def navigate_to(self, url: str, timeout: Optional[int] = None):
+        """Переход по URL с проверкой"""
+        timeout = timeout or self.default_timeout
+        await self.page.goto(url)
+        await expect(self.page).to_have_url(url, timeout=timeout)
+        logger.info(f"Navigated to URL: {url}")
+
+    def get_url(self):
+        """Получение текущего URL"""
+        return self.page.url
+
+    # Базовые взаимодействия
+    async def click(self, locator: Locator, timeout: Optional[int] = None):
+        """Клик с ожиданием и обработкой ошибок"""
+        timeout = timeout or self.default_timeout
+        try:
+            raise_if_interstitial(self.page)
+            if self.lean_actions:
+                await locator.click(timeout=timeout)
+            else:
+                await locator.wait_for(state="visible", timeout=timeout)
+                await locator.click()
+            logger.debug("Clicked on element: %s", locator)
+        except Exception as e:
+            await self._handle_error(f"Failed to click on element: {locator}", e)
+
+    async def fill(self, locator: Locator, text: str):
+        """Заполнение поля с ожиданием"""
+        timeout = self.default_timeout
+        try:
+            raise_if_interstitial(self.page)
+            if self.lean_actions:
+                await locator.fill(text, timeout=timeout)
+            else:
+                await locator.wait_for(state="visible", timeout=timeout)
+                await locator.fill(text)
+            logger.debug("Filled field %s with text: %s", locator, text)
+        except Exception as e:
+            await self._handle_error(f"Failed to fill field {locator} with text: {text}", e)
+
+    async def get_text(self, locator: Locator, timeout: Optional[int] = None):
+        """Получение текста элемента"""
+        timeout = timeout or self.default_timeout
+        try:
+            raise_if_interstitial(self.page)
+            if self.lean_actions:
+                return (await locator.text_content(timeout=timeout)).strip()
+            await locator.wait_for(state="visible", timeout=timeout)
+            return (await locator.text_content()).strip()
+        except Exception as e:
+            await self._handle_error(f"Failed to get text from element: {locator}", e)
+            return ""
+
+    # Ожидания
+    async def wait_for_visible(self, locator: Locator, timeout: Optional[int] = None):
+        """Явное ожидание видимости элемента"""
+        timeout = timeout or self.default_timeout
+        raise_if_interstitial(self.page)
+        await locator.wait_for(state="visible", timeout=timeout)
+
+    async def wait_for_hidden(self, locator: Locator, timeout: Optional[int] = None):
+        """Явное ожидание скрытия элемента"""
+        timeout = timeout or self.default_timeout
+        await locator.wait_for(state="hidden", timeout=timeout)
+
+    # Проверки
+    async def should_have_text(self, locator: Locator, text: str, timeout: Optional[int] = None):
+        """Проверка наличия текста в элементе"""
+        timeout = timeout or self.default_timeout
+        await expect(locator).to_have_text(text, timeout=timeout)
+
+    async def should_be_empty(self, locator: Locator, timeout: Optional[int] = None):
+        """Проверка пустоты элемента"""
+        timeout = timeout or self.default_timeout
+        await expect(locator).to_be_empty(timeout=timeout)
+
+    async def should_be_visible(self, locator: Locator, timeout: Optional[int] = None):
+        """Проверка видимости элемента"""
+        timeout = timeout or self.default_timeout
+        await expect(locator).to_be_visible(timeout=timeout)
+
+    async def should_not_be_visible(self, locator: Locator, timeout: Optional[int] = None):
+        """Проверка скрытия элемента"""
+        timeout = timeout or self.default_timeout
+        await expect(locator).not_to_be_visible(timeout=timeout)
+
+    # Обработка ошибок
+    async def _handle_error(self, message: str, exception: Exception):
+        """Обработка ошибок со скриншотом"""
+        logger.error(message)
+        error = type(exception)(f"{message}. Original error: {str(exception)}")
+        # Падение уже снято - хук падения теста не делает второй скриншот того же состояния
+        error.screenshot_path = await self.take_screenshot("error_")
+        raise error
+
+    async def take_screenshot(self, prefix: str = ""):
+        """Скриншот с timestamp в папке текущего воркера (запись на диск - в фоне)"""
+        path = await async_capture_screenshot(self.page, prefix)
+        if path:
+            logger.info(f"Screenshot saved to: {path}")
+        return path
@@ -0,0 +1,195 @@
+import logging
+from typing import Any, Dict, Optional
+from pages.aio.base_page import AsyncBasePage
+from pages.chat_page import ChatLocators
+from pages.chat_common import (
+    AI_MESSAGE_SELECTOR, ChatResponseState, ResponseDeadline,
+    check_quiet_result, greeting_from_transcript, last_ai_text, prompt_item_selector,
+)
+from playwright.async_api import Page, expect, TimeoutError as PlaywrightTimeoutError
+from utils.response_watch import ARM_RESPONSE_WATCH_JS, WAIT_RESPONSE_QUIET_JS
+from utils.transcript import TRANSCRIPT_JS
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncChatPage(ChatLocators, ChatResponseState, AsyncBasePage):
+    def __init__(self, page: Page):
+        super().__init__(page)
+        self._init_locators()
+        self._init_response_state()
+
+    # Методы для работы с промптами
+    async def open_prompts_popup(self):
+        """Открывает попап с промптами"""
+        await self.click(self.prompts_button)
+        await self.wait_for_visible(self.prompts_popup)
+
+    async def close_prompts_popup(self):
+        """Закрывает попап с промптами"""
+        await self.click(self.prompts_close_button)
+        await self.wait_for_hidden(self.prompts_popup)
+
+    async def expand_prompt_category(self, category_name):
+        """Разворачивает категорию промптов"""
+        normalized_name = category_name.lower().replace(" ", "_")
+        category_locator = self.prompts_categories.get(normalized_name)
+        if category_locator:
+            await self.click(category_locator)
+        else:
+            raise ValueError(f"Категория '{category_name}' не найдена")
+
+    async def select_prompt_by_text(self, prompt_text):
+        """Выбирает промпт по тексту"""
+        prompt_item = self.page.locator(prompt_item_selector(prompt_text)).first
+        await self.wait_for_visible(prompt_item)
+        await self.click(prompt_item)
+
+    async def create_new_prompt(self, prompt_text, save=True):
+        """Создает новый промпт"""
+        await self.click(self.create_new_prompt_button)
+        await self.should_be_visible(self.create_prompt_form_title)
+
+        await self.fill(self.prompt_input_field, prompt_text)
+        await self.should_have_text(self.prompt_input_field, prompt_text)
+
+        if save:
+            await self.click(self.save_prompt_button)
+        else:
+            await self.click(self.cancel_prompt_button)
+        await self.wait_for_hidden(self.create_prompt_form_title)
+
+    async def delete_prompt(self, prompt_text):
+        """Удаляет промпт"""
+        prompt_item = self.page.locator(prompt_item_selector(prompt_text)).first
+        await prompt_item.hover()
+
+        await self.click(self.prompt_menu_button)
+        await self.click(self.delete_prompt_button)
+
+        await self.should_be_visible(self.page.locator('text=Delete prompt?'))
+        await self.click(self.delete_prompt_confirm)
+        await self.wait_for_hidden(prompt_item)
+
+    async def get_greeting_text(self) -> Dict[str, Any]:
+        """Возвращает все части приветственного сообщения в виде словаря"""
+        await self.wait_for_visible(self.greeting_header)
+        return greeting_from_transcript((await self.snapshot_transcript())["blocks"])
+
+    async def snapshot_transcript(self, since: Optional[int] = None) -> Dict[str, Any]:
+        """Снимок переписки одним вызовом в странице (см. ChatPage.snapshot_transcript)"""
+        snapshot = await self.page.evaluate(TRANSCRIPT_JS, self._transcript_args(since))
+        self.transcript_cursor = snapshot["cursor"]
+        return snapshot
+
+    async def open_chat(self, url: str, user_messages: Optional[int] = None):
+        """Открывает существующий чат; user_messages - сколько сообщений пользователя ждать в истории"""
+        await self.navigate_to(url)
+        await self.wait_for_visible(self.message_input)
+        if user_messages is not None:
+            await expect(self.user_messages).to_have_count(user_messages, timeout=self.default_timeout)
+
+    async def send_message(self, text: str, wait_for_input_empty=True):
+        """Отправляет сообщение в чат"""
+        await self.fill(self.message_input, text)
+        await self.should_have_text(self.message_input, text) # Проверка что текст введен
+        await self._arm_response_watch("message", text)
+        await self.click(self.send_button)
+
+        if wait_for_input_empty:
+            await self.should_be_empty(self.message_input) # Поле очистилось после отправки
+
+    async def get_last_ai_message(self, timeout=30000) -> str:
+        """Возвращает текст последнего сообщения от AI"""
+        await self.wait_for_visible(self.ai_message_blocks.last.locator('p').first, timeout=timeout)
+
+        return last_ai_text((await self.snapshot_transcript())["blocks"])
+
+    async def get_last_user_message(self) -> str:
+        """Возвращает текст последнего сообщения пользователя"""
+        return await self.get_text(self.user_messages.last)
+
+    async def regenerate_response(self):
+        """Регенерирует последний ответ"""
+        await self._arm_response_watch("regenerate")
+        await self.click(self.regenerate_button)
+
+    async def _arm_response_watch(self, kind: str = "unknown", prompt: Optional[str] = None):
+        """Взводит наблюдатель за последним блоком AI (вызывается до отправки сообщения)"""
+        self._start_response(kind, prompt)
+        await self.page.evaluate(ARM_RESPONSE_WATCH_JS, AI_MESSAGE_SELECTOR)
+        self._response_watch_armed = True
+
+    async def _wait_for_quiet_dom(self, quiet_ms: int, timeout: int) -> Dict[str, Any]:
+        """Ждет, пока текст ответа перестанет меняться quiet_ms миллисекунд"""
+        return check_quiet_result(
+            await self.page.evaluate(WAIT_RESPONSE_QUIET_JS, {"quietMs": quiet_ms, "timeoutMs": timeout}), timeout
+        )
+
+    async def wait_for_ai_response(self, timeout=30000) -> Dict[str, Any]:
+        """Ждет ПОЛНОГО ответа AI и возвращает тайминги первого и последнего токена (мс)
+
+        Логика та же, что в ChatPage.wait_for_ai_response.
+        """
+        if not self._response_watch_armed:
+            await self._arm_response_watch()
+        self._response_watch_armed = False
+        deadline = ResponseDeadline(timeout)
+
+        while True:
+            result = await self._wait_for_quiet_dom(Config.AI_RESPONSE_SETTLE_MS, deadline.remaining())
+            if not self.stream_tracker.is_streaming():
+                break
+            # DOM замер, но стрим ещё идет - ждем завершения запроса в пределах оставшегося времени и проверяем снова
+            try:
+                await self.page.wait_for_event("requestfinished", timeout=deadline.stream_wait(Config.AI_RESPONSE_QUIET_MS))
+            except PlaywrightTimeoutError:
+                pass  # стрим мог завершиться ошибкой (requestfailed) - StreamTracker уже убрал его
+
+        if self._needs_quiet_window(result):
+            result = await self._wait_for_quiet_dom(Config.AI_RESPONSE_QUIET_MS, deadline.remaining())
+        return self._complete_response(result)
+
+    async def configure_chat_settings(self, complexity="Professional", crazy_mode=False):
+        """Настраивает параметры чата"""
+        await self.click(self.chat_settings_button)
+        await self.wait_for_visible(self.settings_popup)
+
+        # Ждём появления всех лейблов
+        await self.wait_for_visible(self.professional_label)
+        await self.wait_for_visible(self.regular_label)
+        await self.wait_for_visible(self.simple_label)
+
+        # Выбираем уровень сложности языка AI (кликаем на label)
+        if complexity == "Professional":
+            await self.click(self.professional_label)
+        elif complexity == "Regular":
+            await self.click(self.regular_label)
+        elif complexity == "Simple":
+            await self.click(self.simple_label)
+
+        # Если Crazy Mode не активирован, то активируем
+        current_state = await self.crazy_mode_toggle.locator('input').is_checked()
+        if crazy_mode != current_state:
+            await self.click(self.crazy_mode_toggle)
+
+        # Закрываем попап (клик вне попапа)
+        await self.click(self.chat_title)
+        await self.wait_for_hidden(self.settings_popup)
+
+    async def open_chat_settings(self):
+        """Открывает настройки чата"""
+        await self.click(self.chat_settings_button)
+        await self.wait_for_visible(self.settings_popup)
+
+    async def close_chat_settings(self):
+        """Закрывает настройки чата"""
+        await self.click(self.chat_title)
+        await self.wait_for_hidden(self.settings_popup)
+
+    async def send_message_and_wait_for_response(self, text: str):
+        """Отправляет сообщение и ждет ответа"""
+        await self.send_message(text)
+        return await self.wait_for_ai_response()
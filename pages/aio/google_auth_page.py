@@ -0,0 +1,78 @@
+import logging
+from pages.aio.base_page import AsyncBasePage
+from pages.google_auth_page import GoogleAuthLocators, VERIFICATION_TEXTS, WRONG_PASSWORD_TEXT, PASSWORD_RESULT_JS
+from playwright.async_api import Page, Error
+from utils.captcha import async_check_captcha
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGoogleAuthPage(GoogleAuthLocators, AsyncBasePage):
+    def __init__(self, page: Page):
+        super().__init__(page)
+        self._init_locators()
+        self.verification_required = False
+        self.wrong_password = False
+
+    async def enter_email(self, email: str):
+        """Ввод email с обработкой капчи"""
+        logger.info("Entering email...")
+        await async_check_captcha(self.page) # Проверка CAPTCHA
+        await self.fill(self.email_field, email)
+        await self.click(self.next_button)
+        # Ждём следующий шаг: поле пароля или требование верификации
+        await self.wait_for_visible(self.password_field.or_(self.verification_prompt).first, timeout=30000)
+
+    async def enter_password(self, password: str):
+        """Ввод пароля; возвращает результат: verification, wrong_password или left (пароль принят)"""
+        logger.info("Entering password...")
+        try:
+            await self.wait_for_visible(self.password_field, timeout=30000)
+            await async_check_captcha(self.page) # Проверка CAPTCHA
+            await self.fill(self.password_field, password)
+            await self.click(self.next_button)
+
+            # Проверяем, не появилось ли требование верификации по телефону или ошибка пароля
+            result = await self._wait_for_password_result()
+            if result == "verification":
+                logger.warning("⚠️ Google triggered bot verification (phone number required)")
+                self.verification_required = True
+                await self.take_screenshot("google_bot_check_")
+            elif result == "wrong_password":
+                logger.warning("Google rejected the password")
+                self.wrong_password = True
+            return result
+
+        except Exception as e:
+            await self.take_screenshot("password_entry_failed_")
+            raise Exception(f"Password entry failed: {str(e)}")
+
+    async def _wait_for_password_result(self, timeout=30000):
+        """Ждёт реакции на ввод пароля: верификация, ошибка или уход со страницы (закрытие попапа)"""
+        try:
+            result = await self.page.wait_for_function(
+                PASSWORD_RESULT_JS,
+                arg={"verificationTexts": VERIFICATION_TEXTS, "wrongPasswordText": WRONG_PASSWORD_TEXT},
+                timeout=timeout,
+            )
+            return await result.json_value()
+        except Error:
+            # Попап закрылся или ушёл на редирект посреди проверки - пароль принят
+            if self.page.is_closed():
+                return "left"
+            raise
+
+    async def wait_for_redirect(self, timeout=60000):
+        """Ожидание редиректа после успешного логина"""
+        logger.info("Waiting for redirect...")
+        try:
+            async with self.page.expect_event("close", timeout=timeout):
+                pass
+        except Error:
+            await self.page.wait_for_url(
+                Config.CHATS_URL,
+                timeout=timeout,
+                wait_until="networkidle"
+            )
@@ -0,0 +1,59 @@
+import os
+from pages.aio.base_page import AsyncBasePage
+from pages.aio.google_auth_page import AsyncGoogleAuthPage
+from pages.login_page import LoginLocators
+from playwright.async_api import Page
+from utils.captcha import async_check_captcha
+from config import Config
+
+
+class AsyncLoginPage(LoginLocators, AsyncBasePage):
+    def __init__(self, page: Page):
+        super().__init__(page)
+        self._init_locators()
+
+    async def navigate(self):
+        """Переход на страницу логина"""
+        await self.navigate_to(Config.LOGIN_URL)
+
+    async def login(self, role: str, email: str, password: str):
+        """
+        Полный процесс логина через Google
+        """
+        try:
+            await self.navigate()
+
+            await self.click(self.other_radio)
+            await self.fill(self.role_field, role)
+            await self.click(self.login_button)
+
+            await self.wait_for_visible(self.google_button)
+            async with self.page.expect_popup() as popup_info:
+                await self.click(self.google_button)
+
+            google_page = AsyncGoogleAuthPage(await popup_info.value)
+            await google_page.enter_email(email)
+            await google_page.enter_password(password)
+
+            # Обрабатываем возможную верификацию или неверный пароль
+            if google_page.verification_required or google_page.wrong_password:
+                return False
+
+            await google_page.wait_for_redirect()
+            return self.page
+
+        except Exception as e:
+            await self.take_screenshot("login_failed_")
+            return False
+
+
+async def async_login_with_env_credentials(page: Page) -> bool:
+    """Полный логин на переданной странице с учетными данными GOOGLE_EMAIL/GOOGLE_PASS"""
+    # Проверка CAPTCHA перед авторизацией
+    await async_check_captcha(page)
+
+    return bool(await AsyncLoginPage(page).login(
+        role="Test",
+        email=os.getenv("GOOGLE_EMAIL"),
+        password=os.getenv("GOOGLE_PASS"),
+    ))
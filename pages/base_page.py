@@ -1,6 +1,9 @@
 import logging
 from typing import Optional
 from playwright.sync_api import Page, Locator, expect
+from config import Config
+from utils.artifacts import capture_screenshot
+from utils.captcha import raise_if_interstitial
 
 logger = logging.getLogger(__name__)
 
@@ -8,6 +11,7 @@ class BasePage:
     def __init__(self, page: Page):
         self.page = page
         self.default_timeout = 10000 
+        self.lean_actions = Config.LEAN_ACTIONS
 
     # Навигация
     def navigate_to(self, url: str, timeout: Optional[int] = None):
@@ -26,9 +30,13 @@ class BasePage:
         """Клик с ожиданием и обработкой ошибок"""
         timeout = timeout or self.default_timeout
         try:
-            locator.wait_for(state="visible", timeout=timeout)
-            locator.click()
-            logger.debug(f"Clicked on element: {locator}")
+            raise_if_interstitial(self.page)
+            if self.lean_actions:
+                locator.click(timeout=timeout)
+            else:
+                locator.wait_for(state="visible", timeout=timeout)
+                locator.click()
+            logger.debug("Clicked on element: %s", locator)
         except Exception as e:
             self._handle_error(f"Failed to click on element: {locator}", e)
 
@@ -36,9 +44,13 @@ class BasePage:
         """Заполнение поля с ожиданием"""
         timeout = self.default_timeout
         try:
-            locator.wait_for(state="visible", timeout=timeout)
-            locator.fill(text)
-            logger.debug(f"Filled field {locator} with text: {text}")
+            raise_if_interstitial(self.page)
+            if self.lean_actions:
+                locator.fill(text, timeout=timeout)
+            else:
+                locator.wait_for(state="visible", timeout=timeout)
+                locator.fill(text)
+            logger.debug("Filled field %s with text: %s", locator, text)
         except Exception as e:
             self._handle_error(f"Failed to fill field {locator} with text: {text}", e)
 
@@ -46,6 +58,10 @@ class BasePage:
         """Получение текста элемента"""
         timeout = timeout or self.default_timeout
         try:
+            raise_if_interstitial(self.page)
+            if self.lean_actions:
+                # text_content ждет только появления элемента в DOM, без проверки видимости
+                return locator.text_content(timeout=timeout).strip()
             locator.wait_for(state="visible", timeout=timeout)
             return locator.text_content().strip()
         except Exception as e:
@@ -56,6 +72,7 @@ class BasePage:
     def wait_for_visible(self, locator: Locator, timeout: Optional[int] = None):
         """Явное ожидание видимости элемента"""
         timeout = timeout or self.default_timeout
+        raise_if_interstitial(self.page)
         locator.wait_for(state="visible", timeout=timeout)
 
     def wait_for_hidden(self, locator: Locator, timeout: Optional[int] = None):
@@ -88,14 +105,15 @@ class BasePage:
     def _handle_error(self, message: str, exception: Exception):
         """Обработка ошибок со скриншотом"""
         logger.error(message)
-        self.take_screenshot("error_")
-        raise type(exception)(f"{message}. Original error: {str(exception)}")
+        error = type(exception)(f"{message}. Original error: {str(exception)}")
+        # Падение уже снято - хук падения теста не делает второй скриншот того же состояния
+        error.screenshot_path = self.take_screenshot("error_")
+        raise error
 
     def take_screenshot(self, prefix: str = ""):
-        """Скриншот с timestamp"""
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        path = f"screenshots/{prefix}{timestamp}.png"
-        self.page.screenshot(path=path, full_page=True)
-        logger.info(f"Screenshot saved to: {path}")
+        """Скриншот с timestamp в папке текущего воркера (запись на диск - в фоне)"""
+        path = capture_screenshot(self.page, prefix)
+        if path:
+            logger.info(f"Screenshot saved to: {path}")
+        return path
     
\ No newline at end of file
@@ -0,0 +1,100 @@
+import time
+import logging
+from typing import Any, Dict, List, Optional
+from utils.response_watch import StreamTracker
+from utils.response_metrics import build_response_metrics, response_metrics
+
+logger = logging.getLogger(__name__)
+
+AI_MESSAGE_SELECTOR = 'div.bg-aiMessage'
+USER_MESSAGE_SELECTOR = 'div.myMessage'
+
+
+def prompt_item_selector(prompt_text: str) -> str:
+    """Селектор промпта в открытой категории по тексту"""
+    return f'div.bg-openFolder div.flex:has-text("{prompt_text}")'
+
+
+def greeting_from_transcript(blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Части приветствия из снимка переписки: первый блок AI"""
+    greeting = next(block for block in blocks if block["role"] == "ai")
+    return {
+        'header': greeting['header'] or "",
+        'paragraphs': greeting['paragraphs'],
+        'add_button_visible': any(
+            "add" in button['text'].lower() and button['visible'] for button in greeting['buttons']
+        ),
+    }
+
+
+def last_ai_text(blocks: List[Dict[str, Any]]) -> str:
+    """Текст последнего непустого блока AI: параграфы через пробел"""
+    last_block = next(block for block in reversed(blocks) if block["role"] == "ai" and block["paragraphs"])
+    return " ".join(last_block["paragraphs"])
+
+
+def check_quiet_result(result: Dict[str, Any], timeout: int) -> Dict[str, Any]:
+    if result["timedOut"]:
+        raise TimeoutError(f"AI response did not complete in {timeout} ms")
+    return result
+
+
+class ResponseDeadline:
+    """Общий бюджет ожидания ответа AI на все шаги wait_for_ai_response"""
+
+    def __init__(self, timeout: int):
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout / 1000
+
+    def remaining(self) -> int:
+        return max(0, int((self.deadline - time.monotonic()) * 1000))
+
+    def stream_wait(self, slice_ms: int) -> int:
+        """Сколько ждать завершения стрима до следующей проверки; бюджет исчерпан - TimeoutError"""
+        remaining = self.remaining()
+        if not remaining:
+            raise TimeoutError(f"AI response stream did not finish in {self.timeout} ms")
+        return min(remaining, slice_ms)
+
+
+class ChatResponseState:
+    """Состояние ожидания ответов и курсор переписки (общие для sync и async page object'ов чата)"""
+
+    def _init_response_state(self):
+        self.stream_tracker = StreamTracker(self.page)
+        self.reset_state()
+
+    def reset_state(self):
+        """Сбрасывает состояние page object'а для следующего теста (страница переиспользуется)"""
+        self.stream_tracker.in_flight.clear()
+        self.stream_tracker.reset()
+        self.last_response_timing: Dict[str, Any] = {}
+        self._response_watch_armed = False
+        self.transcript_cursor = 0
+        self.response_metrics: List[Dict[str, Any]] = []
+        self._pending_response: Dict[str, Any] = {}
+
+    def _transcript_args(self, since: Optional[int]) -> Dict[str, Any]:
+        return {"aiSelector": AI_MESSAGE_SELECTOR, "userSelector": USER_MESSAGE_SELECTOR, "since": since or 0}
+
+    def _start_response(self, kind: str, prompt: Optional[str]):
+        """Начало ожидаемого ответа: сброс счетчиков стрима и данные для метрик"""
+        self.stream_tracker.reset()
+        self._pending_response = {"kind": kind, "prompt": prompt, "sent_at": time.time()}
+
+    def _needs_quiet_window(self, result: Dict[str, Any]) -> bool:
+        # Ни сетевой, ни внутристраничный стрим не распознан - нужен полный интервал тишины
+        return not (self.stream_tracker.seen or result["pageStreams"])
+
+    def _complete_response(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Тайминги завершенного ответа и запись его метрик"""
+        self.last_response_timing = {
+            "first_token_ms": result["firstTokenMs"],
+            "last_token_ms": result["lastTokenMs"],
+            "chars": result["chars"],
+        }
+        metrics = build_response_metrics(timing=self.last_response_timing, **self._pending_response)
+        self.response_metrics.append(metrics)
+        response_metrics.record(metrics)
+        logger.info(f"AI response completed: {metrics}")
+        return self.last_response_timing
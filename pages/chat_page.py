@@ -1,13 +1,21 @@
-import time
-from typing import Any, Dict, List
+import logging
+from typing import Any, Dict, Optional
 from pages.base_page import BasePage
-from playwright.sync_api import Page, expect
+from pages.chat_common import (
+    AI_MESSAGE_SELECTOR, ChatResponseState, ResponseDeadline,
+    check_quiet_result, greeting_from_transcript, last_ai_text, prompt_item_selector,
+)
+from playwright.sync_api import Page, expect, TimeoutError as PlaywrightTimeoutError
+from utils.response_watch import ARM_RESPONSE_WATCH_JS, WAIT_RESPONSE_QUIET_JS
+from utils.transcript import TRANSCRIPT_JS
+from config import Config
 
 
-class ChatPage(BasePage):
-    def __init__(self, page: Page):
-        super().__init__(page)
-        self._init_locators()
+logger = logging.getLogger(__name__)
+
+
+class ChatLocators:
+    """Локаторы страницы чата (общие для sync и async page object'ов)"""
 
     def _init_locators(self):
         """Инициализация всех локаторов"""
@@ -108,6 +116,19 @@ class ChatPage(BasePage):
         # Crazy Mode
         self.crazy_mode_toggle = self.settings_popup.locator('div:has-text("Crazy Mode") >> label')
 
+
+class ChatPage(ChatLocators, ChatResponseState, BasePage):
+    def __init__(self, page: Page):
+        super().__init__(page)
+        self._init_locators()
+        self._init_response_state()
+
+    def reset_state(self):
+        """Сбрасывает состояние page object'а для следующего теста (страница переиспользуется)"""
+        super().reset_state()
+        # Пул страниц восстанавливает настройки чата, только если тест их менял
+        self.settings_changed = False
+
     # Методы для работы с промптами
     def open_prompts_popup(self):
         """Открывает попап с промптами"""
@@ -130,7 +151,7 @@ class ChatPage(BasePage):
 
     def select_prompt_by_text(self, prompt_text):
         """Выбирает промпт по тексту"""
-        prompt_item = self.page.locator(f'div.bg-openFolder div.flex:has-text("{prompt_text}")').first
+        prompt_item = self.page.locator(prompt_item_selector(prompt_text)).first
         self.wait_for_visible(prompt_item)
         self.click(prompt_item)
 
@@ -150,7 +171,7 @@ class ChatPage(BasePage):
 
     def delete_prompt(self, prompt_text):
         """Удаляет промпт"""
-        prompt_item = self.page.locator(f'div.bg-openFolder div.flex:has-text("{prompt_text}")').first
+        prompt_item = self.page.locator(prompt_item_selector(prompt_text)).first
         prompt_item.hover()
         
         self.click(self.prompt_menu_button)
@@ -163,19 +184,33 @@ class ChatPage(BasePage):
     # Остальные методы класса остаются без изменений
     def get_greeting_text(self) -> Dict[str, Any]:
         """Возвращает все части приветственного сообщения в виде словаря"""
-        return {
-            'header': self.get_text(self.greeting_header),
-            # 'first_paragraph': self.get_text(self.greeting_paragraphs.nth(0)),
-            # 'second_paragraph': self.get_text(self.greeting_paragraphs.nth(1)),
-            'paragraphs': [self.get_text(p) for p in self.greeting_paragraphs.all()],
-            'add_button_visible': self.add_button.is_visible()
-        }
+        self.wait_for_visible(self.greeting_header)
+        return greeting_from_transcript(self.snapshot_transcript()["blocks"])
+
+    def snapshot_transcript(self, since: Optional[int] = None) -> Dict[str, Any]:
+        """Снимок переписки одним вызовом в странице.
+
+        Возвращает {"cursor", "reset", "blocks", "controls"}: блоки пользователя и AI в порядке
+        документа с заголовком, параграфами, текстом и кнопками. С since (курсор прошлого снимка,
+        он же self.transcript_cursor) возвращаются только добавленные после него блоки.
+        """
+        snapshot = self.page.evaluate(TRANSCRIPT_JS, self._transcript_args(since))
+        self.transcript_cursor = snapshot["cursor"]
+        return snapshot
+
+    def open_chat(self, url: str, user_messages: Optional[int] = None):
+        """Открывает существующий чат; user_messages - сколько сообщений пользователя ждать в истории"""
+        self.navigate_to(url)
+        self.wait_for_visible(self.message_input)
+        if user_messages is not None:
+            expect(self.user_messages).to_have_count(user_messages, timeout=self.default_timeout)
 
     def send_message(self, text: str, wait_for_input_empty=True):
         """Отправляет сообщение в чат"""
 
         self.fill(self.message_input, text)
         self.should_have_text(self.message_input, text) # Проверка что текст введен
+        self._arm_response_watch("message", text)
         self.click(self.send_button)
 
         if wait_for_input_empty:
@@ -183,14 +218,10 @@ class ChatPage(BasePage):
 
     def get_last_ai_message(self, timeout=30000) -> str:
         """Возвращает текст последнего сообщения от AI"""
-        last_message_block = self.ai_message_blocks.last
-        self.wait_for_visible(last_message_block, timeout=timeout)
-
-        # Объединяем текст всех параграфов в блоке
-        paragraphs = last_message_block.locator('p')
-        self.wait_for_visible(paragraphs.first, timeout=timeout)
+        # Ждём первый параграф последнего блока, остальное читаем одним снимком
+        self.wait_for_visible(self.ai_message_blocks.last.locator('p').first, timeout=timeout)
 
-        return " ".join([p.text_content() for p in paragraphs.all() if p.text_content().strip()])
+        return last_ai_text(self.snapshot_transcript()["blocks"])
 
     def get_last_user_message(self) -> str:
         """Возвращает текст последнего сообщения пользователя"""
@@ -198,34 +229,50 @@ class ChatPage(BasePage):
 
     def regenerate_response(self):
         """Регенерирует последний ответ"""
+        self._arm_response_watch("regenerate")
         self.click(self.regenerate_button)
 
-    def wait_for_ai_response(self, timeout=30000):
-        """Ждет ПОЛНОГО ответа AI (со стабилизацией текста)"""
-        last_block = self.ai_message_blocks.last
-        
-        # Ждем появления блока
-        self.wait_for_visible(last_block, timeout=timeout)
-        
-        # Ждем стабилизации текста (3 проверки подряд с интервалом 1 сек)
-        stable_text = ""
-        stable_count = 0
-        start_time = time.time()
-        
-        while stable_count < 3 and (time.time() - start_time) < timeout:
-            current_text = self.get_text(last_block)
-            if current_text == stable_text:
-                stable_count += 1
-            else:
-                stable_text = current_text
-                stable_count = 0
-            time.sleep(1)
-        
-        if stable_count < 3:
-            raise TimeoutError("AI response did not stabilize")
+    def _arm_response_watch(self, kind: str = "unknown", prompt: Optional[str] = None):
+        """Взводит наблюдатель за последним блоком AI (вызывается до отправки сообщения)"""
+        self._start_response(kind, prompt)
+        self.page.evaluate(ARM_RESPONSE_WATCH_JS, AI_MESSAGE_SELECTOR)
+        self._response_watch_armed = True
+
+    def _wait_for_quiet_dom(self, quiet_ms: int, timeout: int) -> Dict[str, Any]:
+        """Ждет, пока текст ответа перестанет меняться quiet_ms миллисекунд"""
+        return check_quiet_result(
+            self.page.evaluate(WAIT_RESPONSE_QUIET_JS, {"quietMs": quiet_ms, "timeoutMs": timeout}), timeout
+        )
+
+    def wait_for_ai_response(self, timeout=30000) -> Dict[str, Any]:
+        """Ждет ПОЛНОГО ответа AI и возвращает тайминги первого и последнего токена (мс)
+
+        Окончание ответа определяется по MutationObserver в странице и окончанию
+        стримингового запроса (сетевого или воспроизводимого из записи). Если стрим не распознан (см. Config.CHAT_STREAM_PATTERN),
+        ответ считается завершенным после Config.AI_RESPONSE_QUIET_MS без изменений DOM.
+        """
+        if not self._response_watch_armed:
+            self._arm_response_watch()
+        self._response_watch_armed = False
+        deadline = ResponseDeadline(timeout)
+
+        while True:
+            result = self._wait_for_quiet_dom(Config.AI_RESPONSE_SETTLE_MS, deadline.remaining())
+            if not self.stream_tracker.is_streaming():
+                break
+            # DOM замер, но стрим ещё идет - ждем завершения запроса в пределах оставшегося времени и проверяем снова
+            try:
+                self.page.wait_for_event("requestfinished", timeout=deadline.stream_wait(Config.AI_RESPONSE_QUIET_MS))
+            except PlaywrightTimeoutError:
+                pass  # стрим мог завершиться ошибкой (requestfailed) - StreamTracker уже убрал его
+
+        if self._needs_quiet_window(result):
+            result = self._wait_for_quiet_dom(Config.AI_RESPONSE_QUIET_MS, deadline.remaining())
+        return self._complete_response(result)
 
     def configure_chat_settings(self, complexity="Professional", crazy_mode=False):
         """Настраивает параметры чата"""
+        self.settings_changed = True
         self.click(self.chat_settings_button)
         self.wait_for_visible(self.settings_popup)
 
@@ -264,4 +311,4 @@ class ChatPage(BasePage):
     def send_message_and_wait_for_response(self, text: str):
         """Отправляет сообщение и ждет ответа"""
         self.send_message(text)
-        self.wait_for_ai_response()
+        return self.wait_for_ai_response()
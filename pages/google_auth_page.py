@@ -1,20 +1,44 @@
 import logging
 import re
 from pages.base_page import BasePage
-from playwright.sync_api import Page
+from playwright.sync_api import Page, Error
 from utils.captcha import check_captcha
 from config import Config
 
 
 logger = logging.getLogger(__name__)
 
-class GoogleAuthPage(BasePage):
+VERIFICATION_TEXTS = ["Verify it's you", "Enter a phone number"]
+WRONG_PASSWORD_TEXT = "Wrong password"
+
+# Результат ввода пароля: верификация, ошибка пароля или уход со страницы ввода пароля
+PASSWORD_RESULT_JS = """
+({verificationTexts, wrongPasswordText}) => {
+    const text = document.body ? document.body.innerText : "";
+    if (verificationTexts.some((t) => text.includes(t))) return "verification";
+    if (text.includes(wrongPasswordText)) return "wrong_password";
+    const field = document.querySelector('input[type="password"]');
+    if (!field || !field.offsetParent) return "left";
+    return null;
+}
+"""
+
+class GoogleAuthLocators:
+    """Локаторы попапа Google (общие для sync и async page object'ов)"""
+
+    def _init_locators(self):
+        self.email_field = self.page.get_by_role("textbox", name=re.compile(r"(Email or phone|Телефон или адрес эл. почты)"))
+        self.password_field = self.page.get_by_role("textbox", name=re.compile(r"(Enter your password|Введите пароль)"))
+        self.next_button = self.page.get_by_role("button", name=re.compile(r"(Next|Далее)"))
+        self.verification_prompt = self.page.get_by_text(re.compile("|".join(VERIFICATION_TEXTS)))
+
+
+class GoogleAuthPage(GoogleAuthLocators, BasePage):
     def __init__(self, page: Page):
         super().__init__(page)
-        self.email_field = page.get_by_role("textbox", name=re.compile(r"(Email or phone|Телефон или адрес эл. почты)"))
-        self.password_field = page.get_by_role("textbox", name=re.compile(r"(Enter your password|Введите пароль)"))
-        self.next_button = page.get_by_role("button", name=re.compile(r"(Next|Далее)"))
+        self._init_locators()
         self.verification_required = False
+        self.wrong_password = False
 
     def enter_email(self, email: str):
         """Ввод email с обработкой капчи"""
@@ -22,11 +46,12 @@ class GoogleAuthPage(BasePage):
         check_captcha(self.page) # Проверка CAPTCHA
         self.fill(self.email_field, email)
         self.click(self.next_button)
-        self.page.wait_for_timeout(2000) # Краткая пауза для анимации
+        # Вместо паузы на анимацию ждём следующий шаг: поле пароля или требование верификации
+        self.wait_for_visible(self.password_field.or_(self.verification_prompt).first, timeout=30000)
 
 
     def enter_password(self, password: str):
-        """Ввод пароля с обработкой возможной верификации"""
+        """Ввод пароля; возвращает результат: verification, wrong_password или left (пароль принят)"""
         logger.info("Entering password...")
         try:
             # self.password_field.wait_for(state="visible", timeout=30000)
@@ -35,24 +60,37 @@ class GoogleAuthPage(BasePage):
             self.fill(self.password_field, password)
             self.click(self.next_button)
 
-            self.page.wait_for_timeout(3000)
-
-            # Проверяем, не появилось ли требование верификации по телефону
-            verification_texts = [
-                "Verify it's you",
-                "Enter a phone number"
-            ]
-            for text in verification_texts:
-                if self.page.get_by_text(text, exact=False).is_visible():
-                    logger.warning("⚠️ Google triggered bot verification (phone number required)")
-                    self.verification_required = True
-                    self.take_screenshot("google_bot_check_")
+            # Проверяем, не появилось ли требование верификации по телефону или ошибка пароля
+            result = self._wait_for_password_result()
+            if result == "verification":
+                logger.warning("⚠️ Google triggered bot verification (phone number required)")
+                self.verification_required = True
+                self.take_screenshot("google_bot_check_")
+            elif result == "wrong_password":
+                logger.warning("Google rejected the password")
+                self.wrong_password = True
+            return result
 
         except Exception as e:
             self.take_screenshot("password_entry_failed_")
             raise Exception(f"Password entry failed: {str(e)}")
 
 
+    def _wait_for_password_result(self, timeout=30000):
+        """Ждёт реакции на ввод пароля: верификация, ошибка или уход со страницы (закрытие попапа)"""
+        try:
+            result = self.page.wait_for_function(
+                PASSWORD_RESULT_JS,
+                arg={"verificationTexts": VERIFICATION_TEXTS, "wrongPasswordText": WRONG_PASSWORD_TEXT},
+                timeout=timeout,
+            )
+            return result.json_value()
+        except Error:
+            # Попап закрылся или ушёл на редирект посреди проверки - пароль принят
+            if self.page.is_closed():
+                return "left"
+            raise
+
     def wait_for_redirect(self, timeout=60000):
         """Ожидание редиректа после успешного логина"""
         logger.info("Waiting for redirect...")
@@ -1,13 +1,13 @@
+import os
 from pages.base_page import BasePage
 from playwright.sync_api import Page
 from pages.google_auth_page import GoogleAuthPage
+from utils.captcha import check_captcha
 from config import Config
 
 
-class LoginPage(BasePage):
-    def __init__(self, page: Page):
-        super().__init__(page)
-        self._init_locators()
+class LoginLocators:
+    """Локаторы страницы логина (общие для sync и async page object'ов)"""
 
     def _init_locators(self):
         # выбор роли
@@ -28,6 +28,12 @@ class LoginPage(BasePage):
         self.login_button = self.page.get_by_text("Log in", exact=True)
         self.google_button = self.page.get_by_role("button").first
 
+
+class LoginPage(LoginLocators, BasePage):
+    def __init__(self, page: Page):
+        super().__init__(page)
+        self._init_locators()
+
     def navigate(self):
         """Переход на страницу логина"""
         self.navigate_to(Config.LOGIN_URL)
@@ -52,8 +58,8 @@ class LoginPage(BasePage):
             google_page.enter_email(email)
             google_page.enter_password(password)
 
-            # Обрабатываем возможную верификацию
-            if google_page.verification_required:
+            # Обрабатываем возможную верификацию или неверный пароль
+            if google_page.verification_required or google_page.wrong_password:
                 return False
 
             google_page.wait_for_redirect()
@@ -61,4 +67,16 @@ class LoginPage(BasePage):
         
         except Exception as e:
             self.take_screenshot("login_failed_")
-            return False
\ No newline at end of file
+            return False
+
+
+def login_with_env_credentials(page: Page) -> bool:
+    """Полный логин на переданной странице с учетными данными GOOGLE_EMAIL/GOOGLE_PASS"""
+    # Проверка CAPTCHA перед авторизацией
+    check_captcha(page)
+
+    return bool(LoginPage(page).login(
+        role="Test",
+        email=os.getenv("GOOGLE_EMAIL"),
+        password=os.getenv("GOOGLE_PASS")
+    ))
@@ -0,0 +1,3 @@
+from stub_app.server import StubApp, StubServer, start_stub
+
+__all__ = ["StubApp", "StubServer", "start_stub"]
@@ -0,0 +1,36 @@
+import os
+import time
+import logging
+import argparse
+from stub_app.server import StubServer
+from config import Config
+
+
+def main():
+    """Запуск заглушки приложения на localhost: python -m stub_app --port 8000"""
+    parser = argparse.ArgumentParser(description="Local stand-in for the AI Lawyer app")
+    parser.add_argument("--host", default=Config.STUB_HOST)
+    parser.add_argument("--port", type=int, default=Config.STUB_PORT or 8000)
+    parser.add_argument("--token-rate", type=float, default=Config.STUB_TOKEN_RATE, help="tokens per second, 0 - no delay")
+    parser.add_argument("--latency-ms", type=int, default=Config.STUB_LATENCY_MS, help="delay before the first token")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = StubServer(
+        args.host,
+        args.port,
+        email=os.getenv("GOOGLE_EMAIL"),
+        password=os.getenv("GOOGLE_PASS"),
+        token_rate=args.token_rate,
+        latency_ms=args.latency_ms,
+    ).start()
+    print(f"Stub app: {server.url} (run tests with BASE_URL={server.url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import os
+import json
+import re
+import time
+import logging
+import threading
+from http import HTTPStatus
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+
+SESSION_COOKIE = "session"
+SESSION_PREFIX = "stub:"
+
+DEFAULT_CUSTOM_PROMPT = "Используя техники граничных условий и классов эквивалентности напиши тест-кейсы для тестирования"
+
+FILLER = (
+    "Under the general principles of contract law an agreement requires an offer, acceptance and "
+    "consideration. Courts usually look at the intention of the parties and the surrounding "
+    "circumstances. Please consult a licensed attorney in your jurisdiction before acting on this."
+).split()
+
+PIN_ICON_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 16 16">'
+    '<path d="M4 2h8l-2 5 3 3H3l3-3z"/></svg>'
+)
+
+
+class StubApp:
+    """Состояние заглушки: пользователь, промпты, счетчик ответов и параметры стриминга"""
+
+    def __init__(self, user_name: str = "Yury", email: Optional[str] = None, password: Optional[str] = None,
+                 token_rate: float = 200, latency_ms: int = 50):
+        self.user_name = user_name
+        self.email = email
+        self.password = password
+        self.token_rate = token_rate
+        self.latency_ms = latency_ms
+        self.lock = threading.Lock()
+        self.prompts = {1: {"id": 1, "text": DEFAULT_CUSTOM_PROMPT}}
+        self._next_prompt_id = 2
+        self.chats = {}
+        self._next_chat_id = 1
+        self._responses = 0
+
+    # Промпты
+    def list_prompts(self):
+        with self.lock:
+            return list(self.prompts.values())
+
+    def create_prompt(self, text: str) -> dict:
+        with self.lock:
+            prompt = {"id": self._next_prompt_id, "text": text}
+            self.prompts[prompt["id"]] = prompt
+            self._next_prompt_id += 1
+            return prompt
+
+    def delete_prompt(self, prompt_id: int) -> bool:
+        with self.lock:
+            return self.prompts.pop(prompt_id, None) is not None
+
+    # Чаты с готовой историей
+    def create_chat(self, turns: list) -> dict:
+        with self.lock:
+            chat = {"id": self._next_chat_id, "turns": turns}
+            self.chats[chat["id"]] = chat
+            self._next_chat_id += 1
+            return chat
+
+    def get_chat(self, chat_id: int) -> Optional[dict]:
+        with self.lock:
+            return self.chats.get(chat_id)
+
+    def delete_chat(self, chat_id: int) -> bool:
+        with self.lock:
+            return self.chats.pop(chat_id, None) is not None
+
+    # Ответы AI
+    def compose_response(self, message: str, complexity: str = "Professional", crazy_mode: bool = False) -> str:
+        """Детерминированный ответ: номер ответа делает каждый ответ (и регенерацию) уникальным"""
+        with self.lock:
+            self._responses += 1
+            number = self._responses
+        mode = f"{complexity.lower()} language" + (", crazy mode" if crazy_mode else "")
+        first = f'Answer #{number} ({mode}) to "{message}". ' + " ".join(FILLER[: 20 + number % 7])
+        second = " ".join(FILLER[number % 5:])
+        return f"{first}\n\n{second}"
+
+    def tokens(self, text: str):
+        return re.findall(r"\S+\s*", text)
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """HTTP-обработчик заглушки приложения AI Lawyer"""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def app(self) -> StubApp:
+        return self.server.app
+
+    def log_message(self, format, *args):
+        logger.debug("Stub server: " + format % args)
+
+    # Вспомогательные методы
+    def _path(self) -> str:
+        return urlparse(self.path).path
+
+    def _is_authed(self) -> bool:
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return SESSION_COOKIE in cookie and cookie[SESSION_COOKIE].value.startswith(SESSION_PREFIX)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            return {}
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=utf-8", headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(self, data, status: int = HTTPStatus.OK, headers: Optional[dict] = None):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def _send_template(self, name: str, **values):
+        html = Template((TEMPLATES_DIR / name).read_text(encoding="utf-8")).safe_substitute(**values)
+        self._send(HTTPStatus.OK, html.encode("utf-8"))
+
+    def _redirect(self, location: str):
+        self._send(HTTPStatus.FOUND, headers={"Location": location})
+
+    # Маршруты
+    def do_GET(self):
+        path = self._path()
+        if path in ("/", "/login", "/login/"):
+            self._send_template("login.html")
+        elif path == "/google-auth/":
+            self._send_template("google_auth.html")
+        elif path.startswith("/chats"):
+            if not self._is_authed():
+                self._redirect("/login/")
+            else:
+                self._send_template("chats.html", user_name=self.app.user_name)
+        elif path == "/api/prompts":
+            if not self._is_authed():
+                return self._send_json({"error": "unauthorized"}, HTTPStatus.UNAUTHORIZED)
+            self._send_json(self.app.list_prompts())
+        elif re.fullmatch(r"/api/chats/\d+", path):
+            if not self._is_authed():
+                return self._send_json({"error": "unauthorized"}, HTTPStatus.UNAUTHORIZED)
+            chat = self.app.get_chat(int(path.rsplit("/", 1)[1]))
+            if chat:
+                self._send_json(chat)
+            else:
+                self._send_json({"error": "not found"}, HTTPStatus.NOT_FOUND)
+        elif path == "/static/pin-dark.svg":
+            self._send(HTTPStatus.OK, PIN_ICON_SVG.encode("utf-8"), "image/svg+xml",
+                       {"Cache-Control": "public, max-age=31536000, immutable"})
+        else:
+            self._send(HTTPStatus.NOT_FOUND, b"Not found", "text/plain")
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_POST(self):
+        path = self._path()
+        data = self._read_json()
+        if path == "/google-auth/complete":
+            self._complete_google_auth(data)
+        elif not self._is_authed():
+            self._send_json({"error": "unauthorized"}, HTTPStatus.UNAUTHORIZED)
+        elif path == "/api/prompts":
+            text = (data.get("text") or "").strip()
+            if not text:
+                return self._send_json({"error": "text is required"}, HTTPStatus.BAD_REQUEST)
+            self._send_json(self.app.create_prompt(text), HTTPStatus.CREATED)
+        elif path == "/api/chats":
+            turns = data.get("turns")
+            if not isinstance(turns, list) or any(
+                not isinstance(turn, dict) or turn.get("role") not in ("user", "ai") or not isinstance(turn.get("text"), str)
+                for turn in turns
+            ):
+                return self._send_json({"error": "turns must be a list of {role: user|ai, text}"}, HTTPStatus.BAD_REQUEST)
+            chat = self.app.create_chat(turns)
+            self._send_json({"id": chat["id"], "url": f"/chats/{chat['id']}"}, HTTPStatus.CREATED)
+        elif path == "/api/chat":
+            self._stream_chat(data)
+        else:
+            self._send(HTTPStatus.NOT_FOUND, b"Not found", "text/plain")
+
+    def do_DELETE(self):
+        path = self._path()
+        match = re.fullmatch(r"/api/(prompts|chats)/(\d+)", path)
+        if not self._is_authed():
+            self._send_json({"error": "unauthorized"}, HTTPStatus.UNAUTHORIZED)
+        elif match and match.group(1) == "prompts" and self.app.delete_prompt(int(match.group(2))):
+            self._send(HTTPStatus.NO_CONTENT)
+        elif match and match.group(1) == "chats" and self.app.delete_chat(int(match.group(2))):
+            self._send(HTTPStatus.NO_CONTENT)
+        else:
+            self._send_json({"error": "not found"}, HTTPStatus.NOT_FOUND)
+
+    def _complete_google_auth(self, data: dict):
+        """Проверка учетных данных "Google" и выдача сессионной cookie"""
+        email_ok = not self.app.email or data.get("email") == self.app.email
+        password_ok = bool(data.get("password")) and (not self.app.password or data.get("password") == self.app.password)
+        if not (email_ok and password_ok):
+            return self._send_json({"error": "wrong_password"}, HTTPStatus.UNAUTHORIZED)
+        cookie = f"{SESSION_COOKIE}={SESSION_PREFIX}{int(time.time())}; Path=/; HttpOnly; SameSite=Lax"
+        self._send_json({"redirect": "/chats/"}, headers={"Set-Cookie": cookie})
+
+    def _stream_chat(self, data: dict):
+        """Стриминг ответа чанками по токенам с настраиваемой задержкой и скоростью"""
+        text = self.app.compose_response(
+            data.get("message", ""),
+            complexity=data.get("complexity") or "Professional",
+            crazy_mode=bool(data.get("crazy_mode")),
+        )
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        if self.app.latency_ms:
+            time.sleep(self.app.latency_ms / 1000)
+        delay = 1 / self.app.token_rate if self.app.token_rate else 0
+        try:
+            for token in self.app.tokens(text):
+                chunk = token.encode("utf-8")
+                self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+                if delay:
+                    time.sleep(delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("Client closed chat stream")
+
+
+class StubServer:
+    """Локальная заглушка приложения AI Lawyer в фоновом потоке текущего процесса"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **app_options):
+        self.app = StubApp(**app_options)
+        self.httpd = ThreadingHTTPServer((host, port), StubRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self.app
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-app", daemon=True)
+        self._thread.start()
+        logger.info(f"Stub app is running at {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def start_stub(token_rate: Optional[float] = None, latency_ms: Optional[int] = None) -> Tuple[StubServer, Optional[str]]:
+    """Поднимает заглушку для тестов и утилит: тестовые учетные данные, все URL Config - на заглушку.
+
+    Возвращает сервер и путь к storage_state: None при APP_MODE=stub, иначе отдельный файл,
+    чтобы сессия заглушки не перезаписала сессию живого приложения.
+    """
+    os.environ.setdefault("GOOGLE_EMAIL", "stub.user@example.com")
+    os.environ.setdefault("GOOGLE_PASS", "stub-password")
+    server = StubServer(
+        Config.STUB_HOST,
+        Config.STUB_PORT,
+        email=os.getenv("GOOGLE_EMAIL"),
+        password=os.getenv("GOOGLE_PASS"),
+        token_rate=Config.STUB_TOKEN_RATE if token_rate is None else token_rate,
+        latency_ms=Config.STUB_LATENCY_MS if latency_ms is None else latency_ms,
+    ).start()
+    Config.use_base_url(server.url)
+    auth_state = None if Config.APP_MODE == "stub" else str(Path(Config.AUTH_STATE_PATH).with_name("storage_state.stub.json"))
+    return server, auth_state
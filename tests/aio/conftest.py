@@ -0,0 +1,105 @@
+import os
+import asyncio
+import logging
+import pytest_asyncio
+from playwright.async_api import async_playwright
+from pages.aio import AsyncChatPage, AsyncLoginPage
+from utils.artifacts import async_capture_screenshot
+from utils.browser_server import browser_server
+from utils.captcha import async_check_captcha, async_arm_interstitial_guard
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+async def _screenshot_on_failure(request, contexts):
+    """Скриншоты всех открытых страниц, если тест упал (корневой conftest снимает только sync-страницы)"""
+    if not (hasattr(request.node, "rep_call") and request.node.rep_call.failed):
+        return
+    test_name = request.node.name.replace("[", "_").replace("]", "_")
+    for context in contexts:
+        for page in context.pages:
+            try:
+                screenshot_path = await async_capture_screenshot(page, f"failure_{test_name}_")
+                if screenshot_path:
+                    logger.info(f"Screenshot saved to {screenshot_path}")
+            except Exception as e:
+                logger.error(f"Failed to take screenshot: {str(e)}")
+
+
+async def _async_login(page) -> bool:
+    """Полный логин через Google на переданной async-странице"""
+    login_page = AsyncLoginPage(page)
+    await async_check_captcha(page)
+    return bool(await login_page.login(
+        role="Test",
+        email=os.getenv("GOOGLE_EMAIL"),
+        password=os.getenv("GOOGLE_PASS")
+    ))
+
+
+@pytest_asyncio.fixture(scope="session")
+async def async_browser():
+    """Async-браузер: в одном event loop работает сколько угодно независимых страниц"""
+    async with async_playwright() as playwright:
+        if Config.BROWSER_SERVER:
+            browser = await browser_server.async_connect(playwright.chromium)
+        else:
+            browser = await playwright.chromium.launch(**Config.launch_options())
+        yield browser
+        await browser.close()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def async_auth_state(async_browser, session_cache):
+    """Путь к актуальному storage_state (тот же кэш сессии, что и у sync-тестов)"""
+    return await session_cache.async_get_state(async_browser, _async_login)
+
+
+@pytest_asyncio.fixture
+async def async_context(async_browser, request):
+    """Неавторизованный async-контекст"""
+    context = await async_browser.new_context(viewport={"width": 1280, "height": 720})
+    await async_arm_interstitial_guard(context)
+    yield context
+    await _screenshot_on_failure(request, [context])
+    await context.close()
+
+
+@pytest_asyncio.fixture
+async def async_page(async_context):
+    return await async_context.new_page()
+
+
+@pytest_asyncio.fixture
+async def async_login_page(async_page):
+    return AsyncLoginPage(async_page)
+
+
+@pytest_asyncio.fixture
+async def open_chat_pages(async_browser, async_auth_state, request):
+    """Фабрика: open_chat_pages(n) параллельно открывает n независимых авторизованных чатов"""
+    contexts = []
+
+    async def open_one() -> AsyncChatPage:
+        context = await async_browser.new_context(
+            viewport={"width": 1280, "height": 720},
+            storage_state=async_auth_state,
+        )
+        contexts.append(context)
+        await async_arm_interstitial_guard(context)
+        chat_page = AsyncChatPage(await context.new_page())
+        await chat_page.navigate_to(Config.CHATS_URL)
+        return chat_page
+
+    async def open_pages(count: int):
+        return list(await asyncio.gather(*(open_one() for _ in range(count))))
+
+    yield open_pages
+    await _screenshot_on_failure(request, contexts)
+    await asyncio.gather(*(context.close() for context in contexts))
+
+
+@pytest_asyncio.fixture
+async def async_chat_page(open_chat_pages):
+    return (await open_chat_pages(1))[0]
@@ -0,0 +1,31 @@
+import asyncio
+import pytest
+import allure
+from pages.aio import AsyncChatPage
+
+pytestmark = pytest.mark.asyncio
+
+
+@allure.feature("Чат")
+@pytest.mark.extended
+class TestConcurrentChat:
+    async def test_initial_ai_greeting(self, async_chat_page: AsyncChatPage):
+        """Async-версия проверки приветственного сообщения"""
+        greeting = await async_chat_page.get_greeting_text()
+
+        assert "Hello, Yury 👋" in greeting['header']
+        assert greeting['add_button_visible'] is True
+
+    @pytest.mark.parametrize("sessions", [5])
+    async def test_parallel_chat_sessions(self, open_chat_pages, sessions):
+        """Несколько независимых чатов ведут диалог одновременно в одном event loop"""
+        chat_pages = await open_chat_pages(sessions)
+
+        timings = await asyncio.gather(*(
+            chat_page.send_message_and_wait_for_response(f"Session {i}: what can you do?")
+            for i, chat_page in enumerate(chat_pages)
+        ))
+        responses = await asyncio.gather(*(chat_page.get_last_ai_message() for chat_page in chat_pages))
+
+        assert all(len(response) > 0 for response in responses), "Один из ответов AI пустой"
+        assert all(timing["first_token_ms"] is not None for timing in timings)
@@ -1,6 +1,7 @@
 import pytest
 import allure
 from pages.chat_page import ChatPage
+from utils.chat_seeder import build_turns, conversation
 import re
 
 
@@ -33,23 +34,25 @@ class TestChat:
         chat_page.take_screenshot("chat_flow_")
 
 
-    def test_message_sequence(self, chat_page: ChatPage):
-        """Тест последовательности сообщений"""
-        messages = ["Hi", "How are you?", "What's new?"]
-        responses = []
-        
-        for msg in messages:
-            chat_page.send_message_and_wait_for_response(msg)
-            responses.append(chat_page.get_last_ai_message())
-        
+    def test_message_sequence(self, seed_chat):
+        """Тест последовательности сообщений: первые два обмена засеяны, третье сообщение - через модель"""
+        chat_page = seed_chat(conversation(
+            ("Hi", "Hello! How can I help you with your legal question today?"),
+            ("How are you?", "I am ready to help. Please describe your situation."),
+        ))
+        chat_page.send_message_and_wait_for_response("What's new?")
+
+        blocks = chat_page.snapshot_transcript()["blocks"]
+        responses = [" ".join(block["paragraphs"]) for block in blocks if block["role"] == "ai"][-3:]
+        assert len(responses) == 3
         assert len(responses) == len(set(responses)), "Получили одинаковые ответы AI"
 
 
-    def test_message_history(self, chat_page: ChatPage):
-        """Тест истории сообщений"""
+    def test_message_history(self, seed_chat):
+        """Тест истории сообщений: новое сообщение в чате с засеянной историей"""
         messages = ["First message", "Second message"]
-        for msg in messages:
-            chat_page.send_message_and_wait_for_response(msg)
+        chat_page = seed_chat(conversation((messages[0], "This is the answer to the first message.")))
+        chat_page.send_message_and_wait_for_response(messages[-1])
         
         assert chat_page.get_last_user_message() == messages[-1]
         assert chat_page.get_last_ai_message() != ""
@@ -65,3 +68,23 @@ class TestChat:
         
         second_response = chat_page.get_last_ai_message()
         assert first_response != second_response
+
+
+@allure.feature("Чат")
+@pytest.mark.extended
+class TestLongChatHistory:
+    HISTORY_SIZE = 200
+
+    def test_long_history_regenerate(self, seed_chat):
+        """Тест длинной истории: чат из 200 обменов открывается, последний ответ регенерируется"""
+        chat_page = seed_chat(build_turns(self.HISTORY_SIZE), fallback=False)
+
+        assert chat_page.user_messages.count() == self.HISTORY_SIZE
+        seeded_answer = chat_page.get_last_ai_message()
+        assert seeded_answer.startswith(f"Answer #{self.HISTORY_SIZE}.")
+
+        chat_page.regenerate_response()
+        chat_page.wait_for_ai_response()
+        assert chat_page.get_last_ai_message() != seeded_answer
+        assert chat_page.get_last_user_message() == f"Question #{self.HISTORY_SIZE}"
+
@@ -74,7 +74,8 @@ class TestLogin:
             google_page.enter_email(os.getenv("GOOGLE_EMAIL"))
         
         with allure.step("3. Вводим неверный пароль"):
-            google_page.enter_password("incorrect_password")
+            result = google_page.enter_password("incorrect_password")
+            assert result == "wrong_password", f"Ожидалась ошибка пароля, получено: {result}"
             
             # Явное ожидание ошибки (важно!)
             error_locator = google_page.page.get_by_text(
@@ -83,8 +83,10 @@ class TestPromptsSelection:
         ("save", "Test prompt for save"),
         ("cancel", "Test prompt for cancel"),
     ])
-    def test_create_custom_prompt(self, chat_page: ChatPage, action, test_prompt):
+    def test_create_custom_prompt(self, chat_page: ChatPage, prompt_factory, action, test_prompt):
         """Тест создания нового промпта с параметризацией"""
+        # Уникальный текст с префиксом тестовых данных: промпт удаляется через API после теста
+        test_prompt = prompt_factory.unique_text(test_prompt)
         chat_page.open_prompts_popup()
         
         if action == "cancel":
@@ -94,7 +96,4 @@ class TestPromptsSelection:
         elif action == "save":
             chat_page.create_new_prompt(test_prompt, save=True)
             chat_page.expand_prompt_category("Custom prompts")
-            expect(chat_page.page.get_by_text(test_prompt).first).to_be_visible()
-            
-            # Очистка
-            chat_page.delete_prompt(test_prompt)
\ No newline at end of file
+            expect(chat_page.page.get_by_text(test_prompt).first).to_be_visible()
\ No newline at end of file
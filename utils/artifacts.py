@@ -0,0 +1,125 @@
+import os
+import json
+import uuid
+import queue
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from utils.session_cache import file_lock
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOTS_DIR = "screenshots"
+# Идентификатор прогона: под xdist общий для всех воркеров, без xdist - свой у процесса
+RUN_ID = (os.getenv("PYTEST_XDIST_TESTRUNUID") or uuid.uuid4().hex)[:8]
+
+
+def worker_id() -> str:
+    """Идентификатор воркера pytest-xdist ("gw0", "gw1", ...) или "main" без xdist"""
+    return os.getenv("PYTEST_XDIST_WORKER", "main")
+
+
+def artifact_path(prefix: str = "", ext: str = "png", directory: str = SCREENSHOTS_DIR) -> str:
+    """Уникальный путь артефакта в папке воркера: параллельные воркеры не перетирают файлы друг друга"""
+    worker_dir = os.path.join(directory, worker_id())
+    os.makedirs(worker_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return os.path.join(worker_dir, f"{prefix}{timestamp}_{uuid.uuid4().hex[:6]}.{ext}")
+
+
+class ArtifactWriter:
+    """Фоновая запись артефактов на диск.
+
+    Тест только получает байты от браузера и ставит их в очередь; запись идет в отдельном
+    потоке. Повторные снимки с одинаковым содержимым (тот же кадр одного падения) отбрасываются,
+    суммарный объем артефактов прогона ограничен max_bytes: счетчик общий для всех воркеров
+    прогона и хранится в usage_path под межпроцессной блокировкой.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, usage_path: Optional[str] = None):
+        self.max_bytes = Config.ARTIFACTS_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.usage_path = Path(usage_path or os.path.join(SCREENSHOTS_DIR, ".artifact_bytes.json"))
+        self.written_bytes = 0
+        self.dropped = 0
+        self._seen = set()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, path: str, data: bytes) -> Optional[str]:
+        """Ставит запись в очередь; возвращает путь или None, если артефакт отброшен"""
+        digest = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            if digest in self._seen:
+                logger.debug("Duplicate artifact dropped: %s", path)
+                return None
+            if self.max_bytes and not self._reserve(len(data)):
+                self.dropped += 1
+                logger.warning(f"Artifact size cap of the run reached ({self.max_bytes} bytes), {path} dropped")
+                return None
+            self._seen.add(digest)
+            self.written_bytes += len(data)
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((path, data))
+        return path
+
+    def _reserve(self, size: int) -> bool:
+        """Учитывает size байт в общем счетчике прогона; False - лимит прогона исчерпан"""
+        with file_lock(self.usage_path.with_suffix(".lock"), timeout=30):
+            try:
+                usage = json.loads(self.usage_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                usage = {}
+            # Счетчик прошлого прогона не учитывается
+            used = usage.get("bytes", 0) if usage.get("run") == RUN_ID else 0
+            if used + size > self.max_bytes:
+                return False
+            self.usage_path.write_text(json.dumps({"run": RUN_ID, "bytes": used + size}), encoding="utf-8")
+        return True
+
+    def _run(self):
+        while True:
+            path, data = self._queue.get()
+            try:
+                with open(path, "wb") as file:
+                    file.write(data)
+            except OSError as e:
+                logger.error(f"Failed to write artifact {path}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Дожидается записи всех артефактов из очереди"""
+        self._queue.join()
+
+
+artifact_writer = ArtifactWriter()
+
+
+def _screenshot_options(full_page: Optional[bool]) -> dict:
+    options = {"type": Config.ARTIFACTS_FORMAT, "full_page": Config.ARTIFACTS_FULL_PAGE if full_page is None else full_page}
+    if Config.ARTIFACTS_FORMAT == "jpeg":
+        options["quality"] = Config.ARTIFACTS_QUALITY
+    return options
+
+
+def _screenshot_ext() -> str:
+    return "jpg" if Config.ARTIFACTS_FORMAT == "jpeg" else "png"
+
+
+def capture_screenshot(page, prefix: str = "", full_page: Optional[bool] = None) -> Optional[str]:
+    """Скриншот страницы в формате Config.ARTIFACTS_*; запись на диск - в фоновом потоке"""
+    data = page.screenshot(**_screenshot_options(full_page))
+    return artifact_writer.submit(artifact_path(prefix, ext=_screenshot_ext()), data)
+
+
+async def async_capture_screenshot(page, prefix: str = "", full_page: Optional[bool] = None) -> Optional[str]:
+    """То же для страницы playwright.async_api"""
+    data = await page.screenshot(**_screenshot_options(full_page))
+    return artifact_writer.submit(artifact_path(prefix, ext=_screenshot_ext()), data)
@@ -0,0 +1,125 @@
+import json
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+from playwright.sync_api import Browser, BrowserContext
+
+logger = logging.getLogger(__name__)
+
+# Сброс хранилищ страницы к сохраненной сессии: localStorage из storage_state для ее origin, sessionStorage пуст
+RESET_STORAGE_JS = """
+(origins) => {
+    try {
+        localStorage.clear();
+        sessionStorage.clear();
+    } catch (e) {
+        return;
+    }
+    for (const {name, value} of origins[location.origin] || []) localStorage.setItem(name, value);
+}
+"""
+
+
+class BrowserPool:
+    """Пул контекстов одного браузера воркера.
+
+    Количество одновременно живых контекстов ограничено max_size. Контексты,
+    созданные из storage_state (авторизованные), после теста не закрываются,
+    а возвращаются в пул и переиспользуются следующим тестом с той же сессией: перед этим
+    cookie и localStorage открытых страниц возвращаются к storage_state, разрешения сбрасываются.
+    Анонимные контексты закрываются: в них остаются localStorage/IndexedDB теста.
+    """
+
+    def __init__(self, browser: Browser, max_size: int = 2, context_options: Optional[dict] = None,
+                 on_create: Optional[List[Callable[[BrowserContext], None]]] = None):
+        self.browser = browser
+        self.max_size = max_size
+        self.context_options = context_options or {}
+        # Хуки нового контекста (init-скрипты, маршруты) - выполняются один раз на контекст
+        self.on_create = list(on_create or [])
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle: Dict[str, List[BrowserContext]] = {}
+        self._keys: Dict[BrowserContext, Optional[str]] = {}
+        # Выданные контексты и потоки, которые их держат
+        self._leased: Dict[BrowserContext, int] = {}
+
+    def acquire(self, storage_state: Optional[str] = None, timeout: float = 60) -> BrowserContext:
+        """Выдает контекст (из пула или новый) для сессии storage_state"""
+        idle = self._idle.get(storage_state) if storage_state else None
+        if idle:
+            context = idle.pop()
+            self._leased[context] = threading.get_ident()
+            logger.debug(f"Reused pooled context for {storage_state}")
+            return context
+
+        if not self._slots.acquire(blocking=False):
+            # Пул заполнен простаивающими контекстами другой сессии - освобождаем место
+            self._evict_idle()
+            if not self._slots.acquire(blocking=False):
+                # Все контексты держит этот же поток - ждать их освобождения некому
+                if all(owner == threading.get_ident() for owner in self._leased.values()):
+                    raise RuntimeError(f"All {self.max_size} pooled browser contexts are leased by the current thread")
+                if not self._slots.acquire(timeout=timeout):
+                    raise TimeoutError(f"No free browser context in pool (max_size={self.max_size})")
+        try:
+            context = self.browser.new_context(storage_state=storage_state, **self.context_options)
+            for hook in self.on_create:
+                hook(context)
+        except Exception:
+            self._slots.release()
+            raise
+        self._keys[context] = storage_state
+        self._leased[context] = threading.get_ident()
+        return context
+
+    def release(self, context: BrowserContext, reusable: bool = True):
+        """Возвращает контекст в пул; страницы закрываются, анонимные контексты уничтожаются"""
+        self._leased.pop(context, None)
+        key = self._keys.get(context)
+        if key and reusable:
+            try:
+                self._reset(context, key)
+                self._idle.setdefault(key, []).append(context)
+                return
+            except Exception as e:
+                logger.warning(f"Pooled context is broken, closing it: {str(e)}")
+        self._discard(context)
+
+    def _reset(self, context: BrowserContext, storage_state: str):
+        """Возвращает контекст к сессии storage_state: состояние, записанное тестом, не достается следующему"""
+        with open(storage_state, encoding="utf-8") as f:
+            state = json.load(f)
+        origins = {origin["origin"]: origin.get("localStorage", []) for origin in state.get("origins", [])}
+        for page in context.pages:
+            page.evaluate(RESET_STORAGE_JS, origins)
+            page.close()
+        context.clear_cookies()
+        context.add_cookies(state.get("cookies", []))
+        context.clear_permissions()
+
+    def invalidate(self, storage_state: str):
+        """Закрывает простаивающие контексты протухшей сессии"""
+        for context in self._idle.pop(storage_state, []):
+            self._discard(context)
+
+    def _evict_idle(self):
+        for contexts in self._idle.values():
+            if contexts:
+                self._discard(contexts.pop(0))
+                return
+
+    def _discard(self, context: BrowserContext):
+        self._keys.pop(context, None)
+        self._leased.pop(context, None)
+        try:
+            context.close()
+        except Exception as e:
+            logger.warning(f"Failed to close context: {str(e)}")
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Закрывает все контексты пула, включая не возвращенные в него"""
+        for context in list(self._keys):
+            self._discard(context)
+        self._idle.clear()
@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import socket
+import logging
+import argparse
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+from playwright.sync_api import Error
+from utils.session_cache import file_lock
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+START_TIMEOUT = 30
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _port_open(port: int) -> bool:
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) на Windows завершает процесс - там живость проверяется только по порту
+        return True
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def _server_options(launch_options: dict) -> dict:
+    """Параметры сервера браузера: slow_mo задается клиентом при подключении"""
+    return {key: value for key, value in launch_options.items() if key != "slow_mo"}
+
+
+class BrowserServer:
+    """Долгоживущий Chromium (playwright launch-server) в отдельном процессе.
+
+    Состояние (pid, ws endpoint, параметры запуска) хранится в Config.BROWSER_SERVER_STATE_PATH.
+    Тестовые прогоны подключаются к нему за миллисекунды вместо запуска браузера; сервер с
+    другими параметрами запуска или не отвечающий на проверку перезапускается.
+    """
+
+    def __init__(self, state_path: Optional[str] = None):
+        self.state_path = Path(state_path or Config.BROWSER_SERVER_STATE_PATH)
+        self.lock_path = self.state_path.with_suffix(".lock")
+
+    def state(self) -> Optional[dict]:
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def is_healthy(self, state: Optional[dict] = None) -> bool:
+        """Процесс сервера жив и порт принимает подключения"""
+        state = state if state is not None else self.state()
+        return bool(state) and _pid_alive(state["pid"]) and _port_open(state["port"])
+
+    def ensure(self, launch_options: Optional[dict] = None) -> str:
+        """ws endpoint работающего сервера с нужными параметрами (при необходимости запускает его)"""
+        options = _server_options(launch_options or Config.launch_options())
+        with file_lock(self.lock_path, timeout=START_TIMEOUT * 2):
+            state = self.state()
+            if self.is_healthy(state) and state["options"] == options:
+                return state["ws_endpoint"]
+            if state:
+                logger.info("Browser server is down or was started with other options, restarting it")
+                self._stop(state)
+            return self._start(options)["ws_endpoint"]
+
+    def restart(self, failed_endpoint: Optional[str] = None, launch_options: Optional[dict] = None) -> str:
+        """Перезапускает сервер; если его уже перезапустил другой воркер - возвращает новый endpoint"""
+        options = _server_options(launch_options or Config.launch_options())
+        with file_lock(self.lock_path, timeout=START_TIMEOUT * 2):
+            state = self.state()
+            if state and failed_endpoint and state["ws_endpoint"] != failed_endpoint and self.is_healthy(state):
+                return state["ws_endpoint"]
+            if state:
+                self._stop(state)
+            return self._start(options)["ws_endpoint"]
+
+    def stop(self) -> bool:
+        with file_lock(self.lock_path, timeout=START_TIMEOUT * 2):
+            state = self.state()
+            if not state:
+                return False
+            self._stop(state)
+            return True
+
+    def connect(self, browser_type, launch_options: Optional[dict] = None):
+        """Подключает sync BrowserType к серверу; при сбое подключения сервер перезапускается"""
+        launch_options = launch_options or Config.launch_options()
+        endpoint = self.ensure(launch_options)
+        try:
+            return browser_type.connect(endpoint, slow_mo=launch_options.get("slow_mo", 0), timeout=START_TIMEOUT * 1000)
+        except Error as e:
+            logger.warning(f"Could not connect to browser server {endpoint}, restarting it: {str(e)}")
+            endpoint = self.restart(endpoint, launch_options)
+            return browser_type.connect(endpoint, slow_mo=launch_options.get("slow_mo", 0), timeout=START_TIMEOUT * 1000)
+
+    async def async_connect(self, browser_type, launch_options: Optional[dict] = None):
+        """То же для BrowserType из playwright.async_api"""
+        launch_options = launch_options or Config.launch_options()
+        endpoint = self.ensure(launch_options)
+        try:
+            return await browser_type.connect(endpoint, slow_mo=launch_options.get("slow_mo", 0), timeout=START_TIMEOUT * 1000)
+        except Error as e:
+            logger.warning(f"Could not connect to browser server {endpoint}, restarting it: {str(e)}")
+            endpoint = self.restart(endpoint, launch_options)
+            return await browser_type.connect(endpoint, slow_mo=launch_options.get("slow_mo", 0), timeout=START_TIMEOUT * 1000)
+
+    def _start(self, options: dict) -> dict:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        port = _free_port()
+        ws_path = f"/{uuid.uuid4().hex}"
+        config_path = self.state_path.with_suffix(".config.json")
+        config_path.write_text(json.dumps(dict(options, port=port, wsPath=ws_path)), encoding="utf-8")
+        log_path = self.state_path.with_suffix(".log")
+
+        detach = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == "nt" else {"start_new_session": True}
+        with open(log_path, "ab") as log:
+            process = subprocess.Popen(
+                [sys.executable, "-m", "playwright", "launch-server", "--browser", "chromium", "--config", str(config_path)],
+                stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **detach,
+            )
+        state = {
+            "pid": process.pid,
+            "port": port,
+            "ws_endpoint": f"ws://127.0.0.1:{port}{ws_path}",
+            "options": options,
+            "started_at": time.time(),
+        }
+        deadline = time.monotonic() + START_TIMEOUT
+        while not _port_open(port):
+            if process.poll() is not None or time.monotonic() > deadline:
+                self._kill(process.pid)
+                raise RuntimeError(f"Browser server did not start, see {log_path}")
+            time.sleep(0.1)
+
+        tmp_path = self.state_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+        logger.info(f"Browser server started: pid {process.pid}, {state['ws_endpoint']}")
+        return state
+
+    def _stop(self, state: dict):
+        self._kill(state["pid"])
+        try:
+            self.state_path.unlink()
+        except FileNotFoundError:
+            pass
+        logger.info(f"Browser server stopped: pid {state['pid']}")
+
+    @staticmethod
+    def _kill(pid: int):
+        """Завершает процесс сервера вместе с дочерним драйвером Playwright и браузером"""
+        try:
+            if os.name == "nt":
+                subprocess.run(["taskkill", "/PID", str(pid), "/T", "/F"], capture_output=True)
+            else:
+                os.killpg(pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+
+browser_server = BrowserServer()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.browser_server", description="Долгоживущий сервер браузера для тестов")
+    parser.add_argument("command", choices=["start", "stop", "restart", "status"])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "start":
+        print(browser_server.ensure())
+    elif args.command == "restart":
+        print(browser_server.restart())
+    elif args.command == "stop":
+        print("Browser server stopped" if browser_server.stop() else "Browser server is not running")
+    else:
+        state = browser_server.state()
+        if not state:
+            print("Browser server is not running")
+            return 1
+        healthy = browser_server.is_healthy(state)
+        print(json.dumps(dict(state, healthy=healthy), indent=2))
+        return 0 if healthy else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,167 @@
-import os
+import json
 import logging
-from playwright.sync_api import Page
-from datetime import datetime
+from typing import Optional
+from weakref import WeakKeyDictionary
+from playwright.sync_api import BrowserContext, Page
+from utils.artifacts import capture_screenshot, async_capture_screenshot
 
 logger = logging.getLogger(__name__)
 
+# Известные блокирующие страницы: (вид, тип проверки, значение).
+# text - видимый текст страницы без учета регистра (как text= в Playwright), css - видимый элемент
+INTERSTITIAL_PATTERNS = [
+    ("captcha", "text", "CAPTCHA"),
+    ("captcha", "text", "Verify you're not a robot"),
+    ("captcha", "css", "div.recaptcha"),
+    ("captcha", "css", "#captcha"),
+    ("captcha", "css", "iframe[src*='recaptcha']"),
+    ("verification", "text", "Verify it's you"),
+    ("insecure_browser", "text", "This browser or app may not be secure"),
+    ("insecure_browser", "text", "Try using a different browser"),
+]
+# Текстовые шаблоны проверяются только на страницах входа и проверок (регулярки по URL):
+# в переписке чата такие фразы встречаются в сообщениях пользователя и ответах AI
+TEXT_PATTERN_URLS = [r"accounts\.google\.", r"google\.[a-z.]+/sorry", r"/login", r"/google-auth", r"captcha|challenge"]
+DETECT_ARGS = {"patterns": INTERSTITIAL_PATTERNS, "textUrls": TEXT_PATTERN_URLS}
+
+# Проверка всех шаблонов за один вызов evaluate
+DETECT_INTERSTITIAL_JS = """
+({patterns, textUrls}) => {
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        const style = getComputedStyle(el);
+        return rect.width > 0 && rect.height > 0 && style.visibility !== "hidden" && style.display !== "none";
+    };
+    const checkText = textUrls.some((url) => new RegExp(url).test(location.href));
+    const text = checkText && document.body ? document.body.innerText.toLowerCase() : "";
+    for (const [kind, type, value] of patterns) {
+        const found = type === "text"
+            ? checkText && text.includes(value.toLowerCase())
+            : Array.from(document.querySelectorAll(value)).some(isVisible);
+        if (found) return {kind, type, value};
+    }
+    return null;
+}
+"""
+
+# Наблюдатель в каждом документе контекста: сообщает о блокирующей странице, как только она появилась
+GUARD_INIT_JS = """
+(args) => {
+    const detect = DETECT;
+    let scheduled = false;
+    let reported = false;
+    const check = () => {
+        scheduled = false;
+        if (reported) return;
+        const found = detect(args);
+        if (found) {
+            reported = true;
+            window.__reportInterstitial(found);
+        }
+    };
+    const schedule = () => {
+        if (!scheduled) {
+            scheduled = true;
+            setTimeout(check, 100);
+        }
+    };
+    const start = () => {
+        new MutationObserver(schedule).observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+        schedule();
+    };
+    // Навигация внутри документа (history API, hash) снимает флаг в Python (framenavigated),
+    // поэтому наблюдатель взводится заново и сообщает о блокировке, если она осталась
+    const rearm = () => {
+        reported = false;
+        schedule();
+    };
+    window.addEventListener("popstate", rearm);
+    window.addEventListener("hashchange", rearm);
+    for (const name of ["pushState", "replaceState"]) {
+        const original = history[name];
+        history[name] = function (...rest) {
+            const result = original.apply(this, rest);
+            rearm();
+            return result;
+        };
+    }
+    if (document.readyState === "loading") {
+        document.addEventListener("DOMContentLoaded", start);
+    } else {
+        start();
+    }
+}
+""".replace("DETECT", DETECT_INTERSTITIAL_JS.strip())
+
+# Страницы, на которых наблюдатель заметил блокирующую страницу
+_flagged_pages: "WeakKeyDictionary[Page, dict]" = WeakKeyDictionary()
+
+
+class InterstitialError(Exception):
+    """Страница перекрыта CAPTCHA, проверкой Google или предупреждением о небезопасном браузере"""
+
+
+def arm_interstitial_guard(context: BrowserContext):
+    """Подключает к контексту наблюдатель за блокирующими страницами (включая попапы)"""
+    context.expose_binding("__reportInterstitial", _on_interstitial)
+    context.add_init_script(script=f"({GUARD_INIT_JS})({json.dumps(DETECT_ARGS)})")
+
+
+def _on_interstitial(source, found: dict):
+    page = source["page"]
+    if page not in _flagged_pages:
+        # Флаг относится к текущему экрану: любая навигация его снимает (в том числе внутри документа -
+        # тогда наблюдатель в странице взводится заново и повторно сообщит о неснятой блокировке)
+        def clear(frame):
+            if frame == page.main_frame:
+                _flagged_pages.pop(page, None)
+                page.remove_listener("framenavigated", clear)
+        page.on("framenavigated", clear)
+    _flagged_pages[page] = found
+    logger.warning(f"Interstitial detected on {page.url}: {found}")
+
+
+def flagged_interstitial(page: Page) -> Optional[dict]:
+    """Блокирующая страница, замеченная наблюдателем (без обращения к браузеру)"""
+    return _flagged_pages.get(page)
+
+
+def raise_if_interstitial(page: Page):
+    """Мгновенно прерывает действие page object, если наблюдатель уже заметил блокировку"""
+    found = _flagged_pages.get(page)
+    if found:
+        raise InterstitialError(f"Page is blocked by an interstitial ({found['kind']}): {found['value']}")
+
+
+def detect_interstitial(page: Page) -> Optional[dict]:
+    """Проверяет все известные блокирующие шаблоны одним вызовом в странице"""
+    return page.evaluate(DETECT_INTERSTITIAL_JS, DETECT_ARGS)
+
 
 def check_captcha(page: Page):
     """Проверяет наличие CAPTCHA и делает скриншот если найдена"""
-    captcha_selectors = [
-        "text=CAPTCHA",
-        "text=Verify you're not a robot",
-        "div.recaptcha",
-        "#captcha",
-        "iframe[src*='recaptcha']",
-        "iframe[src*='recaptcha']",
-        "text=This browser or app may not be secure",
-        "text=Try using a different browser"
-    ]
-    
-    for selector in captcha_selectors:
-        if page.locator(selector).is_visible():
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            screenshot_path = f"screenshots/captcha_{timestamp}.png"
-            os.makedirs("screenshots", exist_ok=True)
-            page.screenshot(path=screenshot_path)
-            logger.error(f"CAPTCHA detected! Captcha: {selector}. Screenshot saved to {screenshot_path}")
-            raise Exception("CAPTCHA verification required")
\ No newline at end of file
+    found = flagged_interstitial(page) or detect_interstitial(page)
+    if found:
+        screenshot_path = capture_screenshot(page, f"{found['kind']}_")
+        logger.error(f"CAPTCHA detected! Captcha: {found['value']}. Screenshot saved to {screenshot_path}")
+        if found["kind"] == "captcha":
+            raise InterstitialError("CAPTCHA verification required")
+        raise InterstitialError(f"Interstitial page detected ({found['kind']}): {found['value']}")
+
+
+# Версии для playwright.async_api (pages/aio)
+async def async_arm_interstitial_guard(context):
+    """Подключает наблюдатель за блокирующими страницами к async-контексту"""
+    await context.expose_binding("__reportInterstitial", _on_interstitial)
+    await context.add_init_script(script=f"({GUARD_INIT_JS})({json.dumps(DETECT_ARGS)})")
+
+
+async def async_check_captcha(page):
+    """Проверяет наличие CAPTCHA на async-странице и делает скриншот если найдена"""
+    found = flagged_interstitial(page) or await page.evaluate(DETECT_INTERSTITIAL_JS, DETECT_ARGS)
+    if found:
+        screenshot_path = await async_capture_screenshot(page, f"{found['kind']}_")
+        logger.error(f"CAPTCHA detected! Captcha: {found['value']}. Screenshot saved to {screenshot_path}")
+        if found["kind"] == "captcha":
+            raise InterstitialError("CAPTCHA verification required")
+        raise InterstitialError(f"Interstitial page detected ({found['kind']}): {found['value']}")
@@ -0,0 +1,100 @@
+import logging
+from typing import Callable, List
+from playwright.sync_api import Page
+from pages.chat_page import ChatPage
+from utils.browser_pool import BrowserPool
+from utils.captcha import flagged_interstitial
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Настройки чата, к которым возвращается страница после теста
+DEFAULT_COMPLEXITY = "Professional"
+DEFAULT_CRAZY_MODE = False
+
+# Страница жива: открыт чат и есть поле ввода
+HEALTH_CHECK_JS = """
+(chatsUrl) => location.href.startsWith(chatsUrl)
+    && !!document.querySelector('[placeholder="Type your message here"]')
+"""
+
+
+class ChatPagePool:
+    """Пул прогретых авторизованных страниц чата.
+
+    Тест берет страницу (lease) и возвращает ее (give_back). Возвращенная страница
+    сбрасывается: новый чат, закрытые попапы, настройки по умолчанию. Перед выдачей
+    страница проверяется одним evaluate, сломанные страницы заменяются новыми.
+    Контексты берутся из BrowserPool, поэтому общий лимит контекстов воркера сохраняется.
+    """
+
+    def __init__(self, browser_pool: BrowserPool, storage_state: str, prepare: Callable[[Page], object],
+                 size: int = 1):
+        self.browser_pool = browser_pool
+        self.storage_state = storage_state
+        # Доводит новую страницу до открытого чата (проверка сессии, при необходимости перелогин)
+        self.prepare = prepare
+        self.size = size
+        self._idle: List[ChatPage] = []
+
+    def lease(self) -> ChatPage:
+        """Выдает здоровую прогретую страницу или открывает новую"""
+        while self._idle:
+            chat_page = self._idle.pop()
+            if self.is_healthy(chat_page):
+                logger.debug("Leased warm chat page")
+                return chat_page
+            logger.warning("Pooled chat page failed the health check, replacing it")
+            self._discard(chat_page)
+        return self._create()
+
+    def give_back(self, chat_page: ChatPage, reusable: bool = True):
+        """Возвращает страницу: сбрасывает и оставляет в пуле или закрывает"""
+        if reusable and len(self._idle) < self.size:
+            try:
+                self.reset(chat_page)
+                self._idle.append(chat_page)
+                return
+            except Exception as e:
+                logger.warning(f"Failed to reset chat page, discarding it: {str(e)}")
+                self._discard(chat_page, reusable=False)
+                return
+        self._discard(chat_page, reusable=reusable)
+
+    def is_healthy(self, chat_page: ChatPage) -> bool:
+        page = chat_page.page
+        if page.is_closed() or flagged_interstitial(page):
+            return False
+        try:
+            return bool(page.evaluate(HEALTH_CHECK_JS, Config.CHATS_URL))
+        except Exception:
+            return False
+
+    def reset(self, chat_page: ChatPage):
+        """Новый чат, закрытые попапы и настройки по умолчанию"""
+        page = chat_page.page
+        # Переход на страницу чатов открывает новый чат и закрывает все попапы
+        page.goto(Config.CHATS_URL)
+        chat_page.wait_for_visible(chat_page.message_input)
+        if chat_page.settings_changed:
+            chat_page.configure_chat_settings(complexity=DEFAULT_COMPLEXITY, crazy_mode=DEFAULT_CRAZY_MODE)
+        chat_page.reset_state()
+
+    def _create(self) -> ChatPage:
+        context = self.browser_pool.acquire(storage_state=self.storage_state)
+        try:
+            page = context.new_page()
+            self.prepare(page)
+            return ChatPage(page)
+        except Exception:
+            self.browser_pool.release(context, reusable=False)
+            raise
+
+    def _discard(self, chat_page: ChatPage, reusable: bool = False):
+        """Отдает контекст страницы обратно в BrowserPool (сломанный - закрывается)"""
+        self.browser_pool.release(chat_page.page.context, reusable=reusable)
+
+    def close(self):
+        for chat_page in self._idle:
+            self._discard(chat_page, reusable=True)
+        self._idle.clear()
@@ -0,0 +1,68 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin
+from playwright.sync_api import APIRequestContext
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AI_TEXT = (
+    "Under the general principles of contract law an agreement requires an offer, acceptance and consideration.\n\n"
+    "Please consult a licensed attorney in your jurisdiction before acting on this."
+)
+
+
+class SeedingUnsupported(Exception):
+    """Приложение не поддерживает создание чата с готовой историей"""
+
+
+def conversation(*pairs: Tuple[str, str]) -> List[Dict[str, str]]:
+    """Реплики чата из пар (сообщение пользователя, ответ AI)"""
+    turns = []
+    for user_text, ai_text in pairs:
+        turns.append({"role": "user", "text": user_text})
+        turns.append({"role": "ai", "text": ai_text})
+    return turns
+
+
+def build_turns(count: int, user_text: str = "Question #{n}", ai_text: str = "Answer #{n}. " + DEFAULT_AI_TEXT) -> List[Dict[str, str]]:
+    """Длинная переписка из count пар реплик (для тестов истории, прокрутки и производительности рендеринга)"""
+    return conversation(*((user_text.format(n=n), ai_text.format(n=n)) for n in range(1, count + 1)))
+
+
+class ChatSeeder:
+    """Чаты с заданной историей через HTTP API приложения (Config.CHATS_API_URL), без ответов модели"""
+
+    def __init__(self, request: APIRequestContext, api_url: Optional[str] = None):
+        self.request = request
+        self.api_url = (api_url or Config.CHATS_API_URL).rstrip("/")
+        self.created: List[int] = []
+
+    def seed(self, turns: Iterable[Dict[str, str]]) -> dict:
+        """Создает чат с репликами turns и возвращает {"id", "url"} (url - абсолютный)"""
+        response = self.request.post(self.api_url, data={"turns": list(turns)})
+        # Любой отказ (нет маршрута, нет доступа, страница логина) или чужой формат ответа - засев недоступен
+        if not response.ok:
+            raise SeedingUnsupported(f"POST {self.api_url} failed: {response.status}")
+        try:
+            chat = response.json()
+        except ValueError:
+            raise SeedingUnsupported(f"POST {self.api_url} did not return JSON")
+        if not isinstance(chat, dict) or "id" not in chat or not isinstance(chat.get("url"), str):
+            raise SeedingUnsupported(f"POST {self.api_url} returned an unexpected body")
+        self.created.append(chat["id"])
+        chat["url"] = urljoin(f"{Config.BASE_URL}/", chat["url"])
+        logger.debug("Seeded chat %s", chat["id"])
+        return chat
+
+    def cleanup(self) -> int:
+        """Удаляет все засеянные чаты; ошибки только логируются"""
+        deleted = 0
+        for chat_id in self.created:
+            try:
+                response = self.request.delete(f"{self.api_url}/{chat_id}")
+                deleted += response.ok
+            except Exception as e:
+                logger.warning(f"Failed to delete seeded chat {chat_id}: {str(e)}")
+        self.created.clear()
+        return deleted
@@ -0,0 +1,225 @@
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from playwright.sync_api import BrowserContext
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Поля тела запроса, из которых берется текст промпта и настройки чата для ключа записи
+PROMPT_FIELDS = ("message", "prompt", "content", "text", "query")
+SETTINGS_FIELDS = ("complexity", "crazy_mode", "crazymode", "crazy", "language_complexity")
+# Заголовки транспорта, которые нельзя переносить в синтетический Response
+SKIP_HEADERS = ("content-length", "content-encoding", "transfer-encoding", "set-cookie")
+
+# Обертка над window.fetch: в режиме record пишет чанки стримингового ответа с таймингами,
+# в режиме replay отдает записанный ответ как ReadableStream с исходными (или сжатыми) паузами.
+# window.__completionStreams считает стримы, чтобы ChatPage видел их окончание без сети.
+RECORDER_INIT_JS = """
+(config) => {
+    const pattern = new RegExp(config.pattern);
+    const originalFetch = window.fetch.bind(window);
+    const streams = window.__completionStreams = {started: 0, pending: 0};
+    const encoder = new TextEncoder();
+
+    const replayResponse = (entry) => {
+        let lastMs = 0;
+        const stream = new ReadableStream({
+            start(controller) {
+                for (const chunk of entry.chunks) {
+                    const delay = chunk.ms * entry.speed;
+                    lastMs = Math.max(lastMs, delay);
+                    setTimeout(() => controller.enqueue(encoder.encode(chunk.text)), delay);
+                }
+                setTimeout(() => { controller.close(); streams.pending--; }, lastMs + 1);
+            },
+        });
+        return new Response(stream, {status: entry.status, headers: entry.headers});
+    };
+
+    const recordResponse = (response, request, started) => {
+        const [forPage, forRecord] = response.body.tee();
+        const chunks = [];
+        (async () => {
+            const reader = forRecord.getReader();
+            const decoder = new TextDecoder();
+            try {
+                while (true) {
+                    const {done, value} = await reader.read();
+                    if (done) break;
+                    chunks.push({ms: performance.now() - started, text: decoder.decode(value, {stream: true})});
+                }
+                const headers = {};
+                response.headers.forEach((value, name) => { headers[name] = value; });
+                await window.__completionRecord({...request, status: response.status, headers, chunks});
+            } finally {
+                streams.pending--;
+            }
+        })();
+        return new Response(forPage, {status: response.status, statusText: response.statusText, headers: response.headers});
+    };
+
+    window.fetch = async (input, init) => {
+        const url = typeof input === "string" ? input : input.url;
+        const method = ((init && init.method) || (input && input.method) || "GET").toUpperCase();
+        const body = init && typeof init.body === "string" ? init.body : "";
+        if (method !== "POST" || !pattern.test(url)) return originalFetch(input, init);
+
+        const request = {url, body};
+        if (config.mode === "replay") {
+            const entry = await window.__completionReplay(request);
+            if (entry) {
+                streams.started++;
+                streams.pending++;
+                return replayResponse(entry);
+            }
+            return originalFetch(input, init);
+        }
+        const started = performance.now();
+        const response = await originalFetch(input, init);
+        if (!response.body) return response;
+        streams.started++;
+        streams.pending++;
+        return recordResponse(response, request, started);
+    };
+}
+"""
+
+
+def completion_material(body: str) -> str:
+    """Нормализованный текст для ключа: промпт + настройки чата (complexity, Crazy Mode)"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(data, dict):
+        return body
+
+    prompt = next((data[field] for field in PROMPT_FIELDS if isinstance(data.get(field), str)), None)
+    if prompt is None and isinstance(data.get("messages"), list) and data["messages"]:
+        last = data["messages"][-1]
+        prompt = last.get("content") if isinstance(last, dict) else last
+    settings = {name: value for name, value in data.items() if name.lower() in SETTINGS_FIELDS}
+    if prompt is None:
+        return json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return json.dumps({"prompt": prompt, "settings": settings}, sort_keys=True, ensure_ascii=False)
+
+
+class CompletionStore:
+    """Записи обменов с моделью: один JSON-файл на ключ, устаревшие записи удаляются"""
+
+    def __init__(self, directory: Optional[str] = None, ttl_days: Optional[float] = None):
+        self.directory = Path(directory or Config.COMPLETIONS_DIR)
+        self.ttl = (Config.COMPLETIONS_TTL_DAYS if ttl_days is None else ttl_days) * 24 * 60 * 60
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _is_expired(self, entry: dict) -> bool:
+        return bool(self.ttl) and time.time() - entry.get("recorded_at", 0) > self.ttl
+
+    def load(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if self._is_expired(entry):
+            logger.info(f"Completion recording {key} expired, evicting it")
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def save(self, key: str, entry: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = dict(entry, key=key, recorded_at=time.time())
+        tmp_path = self._path(key).with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(entry, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp_path.replace(self._path(key))
+
+    def prune(self) -> int:
+        """Удаляет все устаревшие записи, возвращает их количество"""
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                entry = {}
+            if self._is_expired(entry):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+class CompletionRecorder:
+    """Запись и воспроизведение ответов модели на уровне контекста браузера.
+
+    Ключ записи - промпт, настройки чата и порядковый номер одинакового запроса
+    в рамках теста (регенерация того же сообщения получает следующий номер).
+    """
+
+    def __init__(self, mode: Optional[str] = None, store: Optional[CompletionStore] = None,
+                 speed: Optional[float] = None, pattern: Optional[str] = None):
+        self.mode = mode or Config.COMPLETIONS_MODE
+        self.store = store or CompletionStore()
+        self.speed = Config.COMPLETIONS_REPLAY_SPEED if speed is None else speed
+        self.pattern = pattern or Config.CHAT_STREAM_PATTERN
+        self._sequences: Dict[Tuple[int, str], int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("record", "replay")
+
+    def attach(self, context: BrowserContext):
+        """Подключает запись/воспроизведение к новому контексту"""
+        if not self.enabled:
+            return
+        context.expose_binding("__completionRecord", self._on_record)
+        context.expose_binding("__completionReplay", self._on_replay)
+        context.add_init_script(script=f"({RECORDER_INIT_JS})({json.dumps({'mode': self.mode, 'pattern': self.pattern})})")
+
+    def reset(self, context: BrowserContext):
+        """Сбрасывает порядковые номера запросов контекста (вызывается перед каждым тестом)"""
+        for key in [key for key in self._sequences if key[0] == id(context)]:
+            del self._sequences[key]
+
+    def _next_key(self, context: BrowserContext, body: str) -> str:
+        material = completion_material(body)
+        sequence_key = (id(context), material)
+        position = self._sequences.get(sequence_key, 0)
+        self._sequences[sequence_key] = position + 1
+        return hashlib.sha256(f"{material}#{position}".encode("utf-8")).hexdigest()[:20]
+
+    def _on_record(self, source, request: dict):
+        key = self._next_key(source["context"], request.get("body", ""))
+        if request.get("status") != 200:
+            logger.warning(f"Completion {key} answered with {request.get('status')}, not recorded")
+            return
+        self.store.save(key, {
+            "material": completion_material(request.get("body", "")),
+            "status": request["status"],
+            "headers": {name: value for name, value in request.get("headers", {}).items()
+                        if name.lower() not in SKIP_HEADERS},
+            "chunks": request.get("chunks", []),
+        })
+        logger.info(f"Recorded completion {key} ({len(request.get('chunks', []))} chunks)")
+
+    def _on_replay(self, source, request: dict) -> Optional[dict]:
+        key = self._next_key(source["context"], request.get("body", ""))
+        entry = self.store.load(key)
+        if entry is None:
+            self.misses += 1
+            logger.warning(f"No recording for completion {key}, passing request to the network")
+            return None
+        self.hits += 1
+        return {
+            "status": entry["status"],
+            "headers": entry["headers"],
+            "chunks": entry["chunks"],
+            "speed": self.speed,
+        }
@@ -0,0 +1,313 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import pytest
+from playwright.sync_api import Page, sync_playwright
+from pages.chat_page import ChatPage
+from pages.google_auth_page import GoogleAuthPage
+from pages.login_page import LoginPage, login_with_env_credentials
+from utils.selector_profiler import iter_locators, selector_of
+from utils.session_cache import SessionCache
+from stub_app import start_stub
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+PAGE_CLASSES = {cls.__name__: cls for cls in (LoginPage, GoogleAuthPage, ChatPage)}
+# Локаторы-коллекции: несколько совпадений - норма (используются через .last/.count())
+COLLECTIONS = {"ChatPage.ai_message_blocks", "ChatPage.user_messages", "ChatPage.greeting_paragraphs"}
+# Локаторы состояний, которые не снимаются (проверка личности Google): их отсутствие в снимках - норма
+CONDITIONAL = {"GoogleAuthPage.verification_prompt"}
+NTH_RE = re.compile(r"^(.*) >> nth=-?\d+$")
+SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script>", re.S | re.I)
+STYLESHEET_LINK_RE = re.compile(r"<link\b[^>]*rel=[\"']?stylesheet[^>]*>", re.I)
+
+# Внешние стили страницы: в снимок они встраиваются, чтобы скрытые элементы остались скрытыми
+EXTERNAL_CSS_JS = """
+() => Array.from(document.styleSheets).map((sheet) => {
+    if (sheet.ownerNode && sheet.ownerNode.tagName === "STYLE") return "";
+    try {
+        return Array.from(sheet.cssRules).map((rule) => rule.cssText).join("\\n");
+    } catch (e) {
+        return "";
+    }
+}).join("\\n")
+"""
+
+
+class SnapshotCapture:
+    """Снимки DOM ключевых состояний приложения для офлайн-проверки локаторов"""
+
+    def __init__(self, output_dir: Optional[str] = None):
+        self.output_dir = Path(output_dir or Config.DOM_SNAPSHOTS_DIR)
+        self.manifest: Dict[str, dict] = {}
+
+    def snapshot(self, page: Page, state: str, page_class: str):
+        html = page.content()
+        css = page.evaluate(EXTERNAL_CSS_JS)
+        if css:
+            html = html.replace("</head>", f"<style data-preflight>{css}</style></head>", 1)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        (self.output_dir / f"{state}.html").write_text(html, encoding="utf-8")
+        self.manifest[state] = {"page": page_class, "url": page.url, "captured_at": time.time()}
+        logger.info(f"Captured {state} ({page_class})")
+
+    def step(self, state: str, action: Callable[[], None]):
+        """Шаг захвата; сбой одного состояния не прерывает остальные"""
+        try:
+            action()
+        except Exception as e:
+            logger.warning(f"Could not capture {state}: {str(e)}")
+
+    def capture(self, browser, storage_state: str, with_response: bool = True):
+        context = browser.new_context(viewport={"width": 1280, "height": 720})
+        try:
+            self._capture_login(context.new_page())
+        finally:
+            context.close()
+
+        context = browser.new_context(viewport={"width": 1280, "height": 720}, storage_state=storage_state)
+        try:
+            self._capture_chat(ChatPage(context.new_page()), with_response)
+        finally:
+            context.close()
+        (self.output_dir / "manifest.json").write_text(json.dumps(self.manifest, indent=2), encoding="utf-8")
+
+    def _capture_login(self, page: Page):
+        login_page = LoginPage(page)
+
+        def login():
+            login_page.navigate()
+            login_page.wait_for_visible(login_page.other_radio)
+            self.snapshot(page, "login", "LoginPage")
+
+        def signup():
+            login_page.navigate()
+            login_page.click(login_page.other_radio)
+            login_page.fill(login_page.role_field, "Test")
+            login_page.click(login_page.continue_button)
+            login_page.wait_for_visible(login_page.sign_up_title)
+            self.snapshot(page, "signup", "LoginPage")
+
+        def google():
+            login_page.navigate()
+            login_page.click(login_page.other_radio)
+            login_page.fill(login_page.role_field, "Test")
+            login_page.click(login_page.login_button)
+            login_page.wait_for_visible(login_page.google_button)
+            self.snapshot(page, "login_google", "LoginPage")
+
+            with page.expect_popup() as popup_info:
+                login_page.click(login_page.google_button)
+            google_page = GoogleAuthPage(popup_info.value)
+            google_page.wait_for_visible(google_page.email_field)
+            self.snapshot(google_page.page, "google_email", "GoogleAuthPage")
+            # Пароль не вводится: нужен только снимок шага ввода пароля
+            google_page.fill(google_page.email_field, os.getenv("GOOGLE_EMAIL") or "")
+            google_page.click(google_page.next_button)
+            google_page.wait_for_visible(google_page.password_field)
+            self.snapshot(google_page.page, "google_password", "GoogleAuthPage")
+            google_page.page.close()
+
+        self.step("login", login)
+        self.step("signup", signup)
+        self.step("login_google", google)
+
+    def _capture_chat(self, chat_page: ChatPage, with_response: bool):
+        page = chat_page.page
+
+        def open_chat():
+            chat_page.navigate_to(Config.CHATS_URL)
+            chat_page.wait_for_visible(chat_page.message_input)
+
+        def chats():
+            open_chat()
+            self.snapshot(page, "chats", "ChatPage")
+
+        def prompts():
+            open_chat()
+            chat_page.open_prompts_popup()
+            chat_page.expand_prompt_category("Custom prompts")
+            self.snapshot(page, "prompts_popup", "ChatPage")
+
+            chat_page.custom_prompts_container.locator("div.flex").first.hover()
+            chat_page.click(chat_page.prompt_menu_button)
+            chat_page.wait_for_visible(chat_page.add_to_input_button)
+            self.snapshot(page, "prompt_menu", "ChatPage")
+            # Диалог удаления только открывается: подтверждения нет, уход со страницы его закрывает
+            chat_page.click(chat_page.delete_prompt_button)
+            chat_page.wait_for_visible(page.get_by_text("Delete prompt?"))
+            self.snapshot(page, "prompt_delete", "ChatPage")
+
+        def prompt_form():
+            open_chat()
+            chat_page.open_prompts_popup()
+            chat_page.click(chat_page.create_new_prompt_button)
+            chat_page.wait_for_visible(chat_page.create_prompt_form_title)
+            self.snapshot(page, "prompt_form", "ChatPage")
+
+        def settings():
+            open_chat()
+            chat_page.open_chat_settings()
+            self.snapshot(page, "settings_popup", "ChatPage")
+
+        def response():
+            open_chat()
+            chat_page.send_message_and_wait_for_response("Hello AI")
+            self.snapshot(page, "chat_response", "ChatPage")
+
+        self.step("chats", chats)
+        self.step("prompts_popup", prompts)
+        self.step("prompt_form", prompt_form)
+        self.step("settings_popup", settings)
+        if with_response:
+            self.step("chat_response", response)
+
+
+def load_snapshot(page: Page, path: Path):
+    """Загружает снимок без скриптов и внешних ресурсов: DOM остается ровно таким, каким был снят"""
+    html = STYLESHEET_LINK_RE.sub("", SCRIPT_RE.sub("", path.read_text(encoding="utf-8")))
+    page.set_content(html, wait_until="domcontentloaded")
+
+
+def check(snapshot_dir: Optional[str] = None, strict: bool = False) -> List[dict]:
+    """Разрешает все локаторы page object'ов на снимках их страниц.
+
+    Статусы: ok; conditional - нет в снимках, но элемент появляется только в неснимаемом состоянии (CONDITIONAL);
+    missing - нет ни в одном снимке; ambiguous - несколько совпадений без .first/.nth
+    (действие упадет на strict mode); relies_on_nth - совпадений несколько, выбор держится на .first/.nth
+    (ошибка только при strict).
+    """
+    snapshot_dir = Path(snapshot_dir or Config.DOM_SNAPSHOTS_DIR)
+    manifest = json.loads((snapshot_dir / "manifest.json").read_text(encoding="utf-8"))
+    states: Dict[str, List[str]] = {}
+    for state, meta in manifest.items():
+        states.setdefault(meta["page"], []).append(state)
+
+    results = []
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(**dict(Config.launch_options(), headless=True, slow_mo=0))
+        try:
+            page = browser.new_page()
+            page.route("**/*", lambda route: route.abort())
+            for class_name, class_states in states.items():
+                page_object = PAGE_CLASSES[class_name](page)
+                named = list(iter_locators(page_object))
+                counts = {name: {} for name, _ in named}
+                base_counts = {name: {} for name, _ in named}
+                for state in class_states:
+                    load_snapshot(page, snapshot_dir / f"{state}.html")
+                    for name, locator in named:
+                        counts[name][state] = locator.count()
+                        match = NTH_RE.match(selector_of(locator))
+                        if match:
+                            base_counts[name][state] = page.locator(match.group(1)).count()
+                for name, locator in named:
+                    found = {state: count for state, count in counts[name].items() if count}
+                    base = max(base_counts[name].values(), default=0)
+                    if not found:
+                        status = "conditional" if name in CONDITIONAL else "missing"
+                    elif name in COLLECTIONS:
+                        status = "ok"
+                    elif base > 1:
+                        status = "relies_on_nth"
+                    elif max(found.values()) > 1:
+                        status = "ambiguous"
+                    else:
+                        status = "ok"
+                    results.append({
+                        "locator": name,
+                        "selector": selector_of(locator),
+                        "status": status,
+                        "error": status in ("missing", "ambiguous") or (strict and status == "relies_on_nth"),
+                        "counts": counts[name],
+                    })
+        finally:
+            browser.close()
+    return results
+
+
+def format_report(results: List[dict]) -> List[str]:
+    lines = []
+    for result in results:
+        if result["status"] == "ok":
+            continue
+        counts = ", ".join(f"{state}={count}" for state, count in result["counts"].items())
+        lines.append(f"{result['status']:>13}  {result['locator']}  {result['selector']}  ({counts})")
+    problems = sum(result["error"] for result in results)
+    lines.append(f"{len(results)} locators checked, {problems} problems")
+    return lines
+
+
+def pytest_addoption(parser):
+    parser.getgroup("preflight", "офлайн-проверка локаторов").addoption(
+        "--preflight", action="store_true", default=False,
+        help="до запуска тестов проверить все локаторы на снимках DOM (python -m utils.dom_preflight capture)",
+    )
+
+
+def pytest_sessionstart(session):
+    config = session.config
+    if not config.getoption("preflight") or hasattr(config, "workerinput"):
+        return
+    if not (Path(Config.DOM_SNAPSHOTS_DIR) / "manifest.json").exists():
+        logger.warning(f"No DOM snapshots in {Config.DOM_SNAPSHOTS_DIR}, preflight skipped")
+        return
+    results = check()
+    reporter = config.pluginmanager.get_plugin("terminalreporter")
+    reporter.write_sep("-", "locator preflight")
+    for line in format_report(results):
+        reporter.write_line(line)
+    if any(result["error"] for result in results):
+        pytest.exit("Locator preflight failed", returncode=pytest.ExitCode.USAGE_ERROR)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.dom_preflight", description="Снимки DOM и офлайн-проверка локаторов")
+    parser.add_argument("command", choices=["capture", "check"])
+    parser.add_argument("--dir", default=None, help="папка снимков (по умолчанию Config.DOM_SNAPSHOTS_DIR)")
+    parser.add_argument("--app-mode", choices=["live", "stub"], default=Config.APP_MODE,
+                        help="capture: stub - снять локальную заглушку, live - Config.BASE_URL")
+    parser.add_argument("--no-response", dest="with_response", action="store_false",
+                        help="capture: не отправлять сообщение ради снимка ответа AI")
+    parser.add_argument("--strict", action="store_true", help="check: выбор по .first/.nth при нескольких совпадениях - ошибка")
+    parser.add_argument("--output", default=None, help="check: JSON с результатами по каждому локатору")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "check":
+        started = time.monotonic()
+        results = check(args.dir, strict=args.strict)
+        for line in format_report(results):
+            print(line)
+        print(f"Checked in {time.monotonic() - started:.2f}s")
+        if args.output:
+            Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        return 1 if any(result["error"] for result in results) else 0
+
+    server = None
+    auth_state = None
+    if args.app_mode == "stub":
+        server, auth_state = start_stub(token_rate=0, latency_ms=0)
+    try:
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.launch(**Config.launch_options())
+            try:
+                storage_state = SessionCache(auth_state).get_state(browser, login_with_env_credentials)
+                SnapshotCapture(args.dir).capture(browser, storage_state, with_response=args.with_response)
+            finally:
+                browser.close()
+    finally:
+        if server:
+            server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
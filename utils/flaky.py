@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import pytest
+from utils.captcha import InterstitialError
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Исходы прогона теста в истории: pass - с первой попытки, flaky - после повтора, fail - все попытки упали
+PASS, FLAKY, FAIL = "pass", "flaky", "fail"
+# Ошибки, которые повтор не исправит
+NO_RETRY = (InterstitialError,)
+# Общие сбросы состояния перед повтором: callable(item), регистрируются в conftest
+reset_hooks: List[Callable] = []
+
+
+def add_reset_hook(hook: Callable):
+    reset_hooks.append(hook)
+
+
+class FlakeStore:
+    """История исходов тестов и карантин по node id (.perf/flakes.json)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or Config.FLAKES_PATH)
+        self.tests: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def is_quarantined(self, nodeid: str) -> bool:
+        return self.tests.get(nodeid, {}).get("quarantined", False)
+
+    def flake_rate(self, nodeid: str) -> float:
+        history = self.tests.get(nodeid, {}).get("history", [])
+        return history.count(FLAKY) / len(history) if history else 0.0
+
+    def update(self, nodeid: str, outcome: str):
+        entry = self.tests.setdefault(nodeid, {"history": [], "quarantined": False})
+        entry["history"] = (entry["history"] + [outcome])[-Config.FLAKY_HISTORY:]
+        history = entry["history"]
+        if entry["quarantined"]:
+            # В карантине тест идет одной попыткой; выходит из него после серии успешных прогонов
+            recent = history[-Config.FLAKY_QUARANTINE_MIN_RUNS:]
+            if len(recent) == Config.FLAKY_QUARANTINE_MIN_RUNS and all(result == PASS for result in recent):
+                entry["quarantined"] = False
+                entry["history"] = []
+                logger.info(f"{nodeid} left quarantine")
+        elif len(history) >= Config.FLAKY_QUARANTINE_MIN_RUNS and self.flake_rate(nodeid) >= Config.FLAKY_QUARANTINE_RATE:
+            entry["quarantined"] = True
+            logger.warning(f"{nodeid} quarantined: flake rate {self.flake_rate(nodeid):.0%}")
+        entry["rate"] = round(self.flake_rate(nodeid), 3)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.tests, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(RetryEngine(config), "flaky_retries")
+
+
+class RetryEngine:
+    """Повтор тела теста с маркером flaky на тех же фикстурах (авторизованная страница не пересоздается).
+
+    @pytest.mark.flaky(retries=2, reset=callable) - число повторов и дополнительный сброс состояния
+    перед повтором (callable получает item). Общие сбросы регистрируются через add_reset_hook.
+    Бюджет повторов (Config.FLAKY_RETRY_BUDGET) - на процесс, т.е. на воркер xdist.
+    Тесты в карантине идут одной попыткой как non-strict xfail и не валят прогон.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.store = FlakeStore()
+        self.budget = Config.FLAKY_RETRY_BUDGET
+        self.outcomes: Dict[str, str] = {}
+
+    def pytest_collection_modifyitems(self, items):
+        for item in items:
+            if self.store.is_quarantined(item.nodeid):
+                reason = f"quarantined as flaky (flake rate {self.store.flake_rate(item.nodeid):.0%})"
+                item.add_marker(pytest.mark.xfail(reason=reason, strict=False))
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_pyfunc_call(self, pyfuncitem):
+        marker = pyfuncitem.get_closest_marker("flaky")
+        if not marker or self.store.is_quarantined(pyfuncitem.nodeid):
+            return None
+        retries = marker.kwargs.get("retries", Config.FLAKY_RETRIES)
+        funcargs = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    pyfuncitem.obj(**funcargs)
+                    return True
+                except NO_RETRY:
+                    raise
+                except Exception as e:
+                    if attempt > retries or self.budget <= 0:
+                        if self.budget <= 0:
+                            logger.warning(f"Retry budget is exhausted, {pyfuncitem.nodeid} is not retried")
+                        raise
+                    self.budget -= 1
+                    delay = Config.FLAKY_BACKOFF_MS * 2 ** (attempt - 1) / 1000
+                    logger.warning(f"{pyfuncitem.nodeid} failed on attempt {attempt}, retrying in {delay:.1f}s: {str(e)}")
+                    time.sleep(delay)
+                    self._reset(pyfuncitem, marker.kwargs.get("reset"))
+        finally:
+            pyfuncitem.user_properties.append(("flaky_attempts", attempt))
+
+    def _reset(self, item, reset: Optional[Callable]):
+        for hook in reset_hooks + ([reset] if reset else []):
+            hook(item)
+
+    def pytest_runtest_logreport(self, report):
+        # Под xdist отчеты воркеров с user_properties приходят и в главный процесс
+        if report.when != "call":
+            return
+        properties = dict(report.user_properties)
+        quarantined = self.store.is_quarantined(report.nodeid)
+        if "flaky_attempts" not in properties and not quarantined:
+            return
+        if report.failed or (report.skipped and hasattr(report, "wasxfail")):
+            outcome = FAIL
+        else:
+            outcome = FLAKY if properties.get("flaky_attempts", 1) > 1 else PASS
+        self.outcomes[report.nodeid] = outcome
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(self.config, "workerinput") or not self.outcomes:
+            return
+        for nodeid, outcome in self.outcomes.items():
+            self.store.update(nodeid, outcome)
+        self.store.save()
+
+    def pytest_terminal_summary(self, terminalreporter):
+        retried = {nodeid: outcome for nodeid, outcome in self.outcomes.items() if outcome != PASS}
+        quarantined = [nodeid for nodeid, entry in self.store.tests.items() if entry.get("quarantined")]
+        if not (retried or quarantined):
+            return
+        terminalreporter.write_sep("-", "flaky tests")
+        for nodeid, outcome in sorted(retried.items()):
+            terminalreporter.write_line(f"{outcome:>5}  {nodeid}")
+        for nodeid in sorted(quarantined):
+            terminalreporter.write_line(f"quarantined  {nodeid} (flake rate {self.store.flake_rate(nodeid):.0%})")
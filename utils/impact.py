@@ -0,0 +1,321 @@
+import os
+import re
+import ast
+import sys
+import json
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import pytest
+from config import Config
+
+ROOT = Path(__file__).resolve().parent.parent
+# Код, вызовы которого записываются в карту: page object'ы, утилиты, тесты и conftest
+TRACKED_DIRS = ("pages/", "utils/", "tests/")
+# Изменения документации и микробенчмарков не влияют на тесты
+IGNORED_SUFFIXES = (".md", ".MD")
+IGNORED_PREFIXES = (".github/", ".gitignore", "benchmarks/")
+# Атрибуты записываются только у page object'ов и их миксинов локаторов (CallRecorder.patch_pages)
+ATTR_DIRS = ("pages/",)
+# Единица "изменено все" для изменений вне отслеживаемого кода и данных
+# (config.py, requirements.txt, pytest.ini, заглушка, JSON-файлы, записи ответов)
+EVERYTHING = "*"
+
+HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def relative_path(filename: str) -> Optional[str]:
+    """Путь файла относительно корня репозитория или None для файлов вне его"""
+    try:
+        return Path(filename).resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        return None
+
+
+def is_tracked(path: str) -> bool:
+    return path.endswith(".py") and (path.startswith(TRACKED_DIRS) or Path(path).name == "conftest.py")
+
+
+def _is_fixture(node) -> bool:
+    return any("fixture" in ast.unparse(decorator) for decorator in node.decorator_list)
+
+
+def code_units(path: str, source: str) -> List[Tuple[int, int, str]]:
+    """Единицы кода файла с диапазонами строк: функции, фикстуры и присваивания атрибутов self в методах page object'ов"""
+    units = []
+
+    def visit(node, qualname: str, class_name: Optional[str], in_function: bool):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                name = f"{qualname}.<locals>.{child.name}" if in_function else f"{qualname}{child.name}"
+                visit(child, f"{name}.", child.name, False)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                name = f"{qualname}.<locals>.{child.name}" if in_function else f"{qualname}{child.name}"
+                start = min([child.lineno] + [decorator.lineno for decorator in child.decorator_list])
+                units.append((start, child.end_lineno, f"func:{path}:{name}"))
+                if _is_fixture(child):
+                    units.append((start, child.end_lineno, f"fixture:{child.name}"))
+                visit(child, name, class_name, True)
+            else:
+                if in_function and class_name and path.startswith(ATTR_DIRS) and isinstance(child, (ast.Assign, ast.AnnAssign)):
+                    targets = child.targets if isinstance(child, ast.Assign) else [child.target]
+                    for target in targets:
+                        if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == "self":
+                            units.append((child.lineno, child.end_lineno, f"attr:{class_name}.{target.attr}"))
+                visit(child, qualname, class_name, in_function)
+
+    visit(ast.parse(source), "", None, False)
+    return units
+
+
+def units_for_lines(path: str, source: Optional[str], lines: Iterable[int]) -> Set[str]:
+    """Единицы, затронутые изменением строк lines файла path"""
+    lines = list(lines)
+    if not lines:
+        return set()
+    if not is_tracked(path):
+        return set() if path.endswith(IGNORED_SUFFIXES) or path.startswith(IGNORED_PREFIXES) else {EVERYTHING}
+    if source is None:
+        return {f"module:{path}"}
+    try:
+        units = code_units(path, source)
+    except SyntaxError:
+        return {f"module:{path}"}
+
+    changed = set()
+    for line in lines:
+        spans = [(start, end, unit) for start, end, unit in units if start <= line <= end]
+        attrs = {unit for _, _, unit in spans if unit.startswith("attr:")}
+        if attrs:
+            # Правка локатора в _init_* затрагивает только тесты, которые обращались к этому атрибуту
+            changed |= attrs
+            continue
+        functions = [(start, end, unit) for start, end, unit in spans if unit.startswith("func:")]
+        if not functions:
+            changed.add(f"module:{path}")
+            continue
+        innermost = max(functions, key=lambda span: span[0])
+        changed.add(innermost[2])
+        changed |= {unit for start, end, unit in spans if unit.startswith("fixture:") and (start, end) == innermost[:2]}
+    return changed
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+
+def parse_diff(diff: str) -> Dict[Tuple[str, str], Tuple[List[int], List[int]]]:
+    """{(старый путь, новый путь): (удаленные строки старой версии, добавленные строки новой)} из git diff -U0"""
+    files = {}
+    old_path = new_path = None
+    for line in diff.splitlines():
+        if line.startswith("--- "):
+            old_path = None if line[4:] == "/dev/null" else line[6:]
+        elif line.startswith("+++ "):
+            new_path = None if line[4:] == "/dev/null" else line[6:]
+            files[(old_path, new_path)] = ([], [])
+        elif line.startswith("@@"):
+            match = HUNK_RE.match(line)
+            old_start, old_count, new_start, new_count = (
+                int(match.group(1)), int(match.group(2) or 1), int(match.group(3)), int(match.group(4) or 1)
+            )
+            old_lines, new_lines = files[(old_path, new_path)]
+            old_lines.extend(range(old_start, old_start + old_count))
+            new_lines.extend(range(new_start, new_start + new_count))
+    return files
+
+
+def changed_units(base: str) -> Set[str]:
+    """Единицы кода, измененные в рабочем дереве относительно ревизии base"""
+    changed = set()
+    for (old_path, new_path), (old_lines, new_lines) in parse_diff(_git("diff", "-U0", "--no-color", base)).items():
+        if old_path and old_lines:
+            try:
+                old_source = _git("show", f"{base}:{old_path}")
+            except subprocess.CalledProcessError:
+                old_source = None
+            changed |= units_for_lines(old_path, old_source, old_lines)
+        if new_path and new_lines:
+            new_file = ROOT / new_path
+            changed |= units_for_lines(new_path, new_file.read_text(encoding="utf-8") if new_file.exists() else None, new_lines)
+    return changed
+
+
+def is_affected(units: Iterable[str], changed: Set[str]) -> bool:
+    units = set(units)
+    if units & changed:
+        return True
+    modules = {unit[len("module:"):] for unit in changed if unit.startswith("module:")}
+    return any(unit.startswith("func:") and unit.split(":")[1] in modules for unit in units)
+
+
+class ImpactMap:
+    """Карта node id теста -> единицы кода, которые он затронул (.perf/impact.json)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or Config.IMPACT_MAP_PATH)
+        self.tests: Dict[str, List[str]] = self._load()
+
+    def _load(self) -> Dict[str, List[str]]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.tests, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class CallRecorder:
+    """Запись функций отслеживаемого кода (sys.setprofile) и атрибутов page object'ов, затронутых тестом"""
+
+    def __init__(self):
+        self.units: Set[str] = set()
+        self._code_keys: Dict[object, Optional[str]] = {}
+        self._attr_keys: Dict[Tuple[type, str], Tuple[str, ...]] = {}
+        self._patched: List[type] = []
+
+    def start(self):
+        self.units = set()
+        sys.setprofile(self._profile)
+
+    def stop(self) -> Set[str]:
+        sys.setprofile(None)
+        return self.units
+
+    def _profile(self, frame, event, arg):
+        if event != "call":
+            return
+        code = frame.f_code
+        key = self._code_keys.get(code, False)
+        if key is False:
+            path = relative_path(code.co_filename)
+            key = self._code_keys[code] = f"func:{path}:{code.co_qualname}" if path and is_tracked(path) else None
+        if key:
+            self.units.add(key)
+
+    def patch_pages(self):
+        """Запись обращений к атрибутам экземпляров page object'ов (локаторам и состоянию)"""
+        from pages.base_page import BasePage
+        from pages.aio.base_page import AsyncBasePage
+        recorder = self
+
+        def __getattribute__(page, name):
+            value = object.__getattribute__(page, name)
+            if name in object.__getattribute__(page, "__dict__"):
+                keys = recorder._attr_keys.get((type(page), name))
+                if keys is None:
+                    keys = recorder._attr_keys[(type(page), name)] = tuple(
+                        f"attr:{cls.__name__}.{name}" for cls in type(page).__mro__ if cls is not object
+                    )
+                recorder.units.update(keys)
+            return value
+
+        for cls in (BasePage, AsyncBasePage):
+            cls.__getattribute__ = __getattribute__
+            self._patched.append(cls)
+
+    def unpatch_pages(self):
+        for cls in self._patched:
+            del cls.__getattribute__
+        self._patched = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("impact", "выбор тестов по изменениям кода")
+    group.addoption("--impact-record", action="store_true", default=False,
+                    help="записать карту: какие функции и локаторы затронул каждый тест")
+    group.addoption("--impact-diff", default=None, metavar="BASE",
+                    help="запустить только тесты, затронутые изменениями относительно git-ревизии BASE")
+
+
+def pytest_configure(config):
+    if config.getoption("impact_record") or config.getoption("impact_diff"):
+        config.pluginmanager.register(ImpactSelector(config), "impact_selector")
+
+
+class ImpactSelector:
+    """Запись карты влияния (--impact-record) и отбор затронутых тестов (--impact-diff)"""
+
+    def __init__(self, config):
+        self.config = config
+        self.map = ImpactMap()
+        self.recorded: Dict[str, List[str]] = {}
+        # Единицы, затронутые setup каждой фикстуры за все ее вызовы: session-фикстуры и прогрев пула
+        # выполняются в первом использовавшем их тесте, а зависят от них все тесты с этой фикстурой
+        self.fixture_units: Dict[str, Set[str]] = {}
+        self.recorder = CallRecorder() if config.getoption("impact_record") else None
+        if self.recorder:
+            self.recorder.patch_pages()
+
+    def pytest_unconfigure(self):
+        if self.recorder:
+            self.recorder.unpatch_pages()
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        base = config.getoption("impact_diff")
+        if not base:
+            return
+        changed = changed_units(base)
+        if EVERYTHING in changed:
+            return
+        selected, deselected = [], []
+        for item in items:
+            units = self.map.tests.get(item.nodeid)
+            # Тест без записи в карте (новый или не записанный) запускается всегда
+            if units is None or is_affected(units, changed):
+                selected.append(item)
+            else:
+                deselected.append(item)
+        items[:] = selected
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        if not self.recorder:
+            return (yield)
+        self.recorder.start()
+        try:
+            return (yield)
+        finally:
+            self.recorder.stop()
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        if not self.recorder:
+            return (yield)
+        outer, self.recorder.units = self.recorder.units, set()
+        try:
+            return (yield)
+        finally:
+            units = self.recorder.units
+            self.recorder.units = outer | units
+            self.fixture_units.setdefault(fixturedef.argname, set()).update(units)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        report = yield
+        if self.recorder and call.when == "teardown":
+            # Под xdist карта собирается в главном процессе из отчетов воркеров
+            units = self.recorder.units | {f"fixture:{name}" for name in item.fixturenames}
+            for name in item.fixturenames:
+                units |= self.fixture_units.get(name, set())
+            report.user_properties.append(("impact_units", sorted(units)))
+        return report
+
+    def pytest_runtest_logreport(self, report):
+        if report.when == "teardown":
+            units = dict(report.user_properties).get("impact_units")
+            if units is not None:
+                self.recorded[report.nodeid] = units
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(self.config, "workerinput") or not self.recorded:
+            return
+        self.map.tests.update(self.recorded)
+        self.map.save()
@@ -0,0 +1,191 @@
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+from typing import List, Optional
+from playwright.async_api import Browser, async_playwright
+from pages.aio import AsyncChatPage, async_login_with_env_credentials
+from utils.artifacts import artifact_writer
+from utils.captcha import async_arm_interstitial_guard
+from utils.session_cache import SessionCache, state_path_for
+from utils.step_profiler import percentile
+from stub_app import start_stub
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Сообщения, из которых виртуальный пользователь выбирает очередной вопрос
+PROMPTS = [
+    "Hello AI",
+    "What can you do?",
+    "Explain like I'm five what a contract is",
+    "How do I register a trademark?",
+    "What are my rights as a tenant?",
+    "Summarize the GDPR in three sentences",
+]
+# Веса действий виртуального пользователя
+ACTIONS = {"send": 0.7, "regenerate": 0.2, "settings": 0.1}
+COMPLEXITIES = ["Professional", "Regular", "Simple"]
+
+
+class LoadResult:
+    """Замеры нагрузочного прогона: операции с таймингами и ошибки"""
+
+    def __init__(self):
+        self.operations: List[dict] = []
+        self.errors: List[dict] = []
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    def summary(self) -> dict:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        responses = [op for op in self.operations if op["action"] in ("send", "regenerate")]
+        total = len(self.operations) + len(self.errors)
+
+        def stats(values: List[float]) -> dict:
+            values = [value for value in values if value is not None]
+            if not values:
+                return {}
+            return {f"p{q}": round(percentile(values, q), 1) for q in (50, 95, 99)}
+
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "operations": len(self.operations),
+            "errors": len(self.errors),
+            "error_rate": round(len(self.errors) / total, 4) if total else 0.0,
+            "throughput_rps": round(len(responses) / elapsed, 3) if elapsed else 0.0,
+            "ttft_ms": stats([op["first_token_ms"] for op in responses]),
+            "completion_ms": stats([op["last_token_ms"] for op in responses]),
+            "by_action": {
+                action: sum(1 for op in self.operations if op["action"] == action) for action in ACTIONS
+            },
+        }
+
+
+async def run_user(browser: Browser, storage_state: str, user: int, args, result: LoadResult):
+    """Один виртуальный пользователь: свой контекст и своя последовательность действий (по seed)"""
+    rng = random.Random(args.seed * 1000 + user)
+    context = await browser.new_context(viewport={"width": 1280, "height": 720}, storage_state=storage_state)
+    await async_arm_interstitial_guard(context)
+    try:
+        chat_page = AsyncChatPage(await context.new_page())
+        await chat_page.navigate_to(Config.CHATS_URL)
+        has_answer = False
+        for iteration in range(args.iterations):
+            action = rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+            if action == "regenerate" and not has_answer:
+                action = "send"
+            started = time.monotonic()
+            try:
+                if action == "send":
+                    timing = await chat_page.send_message_and_wait_for_response(rng.choice(PROMPTS))
+                    has_answer = True
+                elif action == "regenerate":
+                    await chat_page.regenerate_response()
+                    timing = await chat_page.wait_for_ai_response()
+                else:
+                    await chat_page.configure_chat_settings(complexity=rng.choice(COMPLEXITIES))
+                    timing = {}
+            except Exception as e:
+                result.errors.append({"user": user, "iteration": iteration, "action": action, "error": str(e)})
+                logger.warning(f"User {user} {action} failed: {str(e)}")
+                continue
+            result.operations.append({
+                "user": user,
+                "iteration": iteration,
+                "action": action,
+                "duration_ms": round((time.monotonic() - started) * 1000, 1),
+                "first_token_ms": timing.get("first_token_ms"),
+                "last_token_ms": timing.get("last_token_ms"),
+            })
+            if args.think_ms:
+                await asyncio.sleep(rng.uniform(0, args.think_ms) / 1000)
+    except Exception as e:
+        result.errors.append({"user": user, "iteration": None, "action": "open", "error": str(e)})
+        logger.warning(f"User {user} could not open the chat: {str(e)}")
+    finally:
+        await context.close()
+
+
+async def run_load(args) -> dict:
+    """Запускает args.users пользователей с темпом args.ramp пользователей в секунду"""
+    async with async_playwright() as playwright:
+        launch_options = Config.launch_options()
+        if args.headless is not None:
+            launch_options["headless"] = args.headless
+        browser = await playwright.chromium.launch(**launch_options)
+        try:
+            storage_state = await SessionCache(args.auth_state).async_get_state(browser, async_login_with_env_credentials)
+            result = LoadResult()
+            tasks = []
+            for user in range(args.users):
+                tasks.append(asyncio.create_task(run_user(browser, storage_state, user, args, result)))
+                if args.ramp and user < args.users - 1:
+                    await asyncio.sleep(1 / args.ramp)
+            await asyncio.gather(*tasks)
+            result.finished_at = time.monotonic()
+        finally:
+            await browser.close()
+
+    summary = result.summary()
+    summary["config"] = {
+        "base_url": Config.BASE_URL,
+        "users": args.users,
+        "ramp_per_s": args.ramp,
+        "iterations": args.iterations,
+        "think_ms": args.think_ms,
+        "seed": args.seed,
+    }
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(
+            {"summary": summary, "operations": result.operations, "errors": result.errors}, indent=2
+        ), encoding="utf-8")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.load_harness", description="Нагрузка на чат через AsyncChatPage")
+    parser.add_argument("--users", type=int, default=10, help="число виртуальных пользователей")
+    parser.add_argument("--ramp", type=float, default=2.0, help="пользователей в секунду при разгоне, 0 - все сразу")
+    parser.add_argument("--iterations", type=int, default=5, help="действий на пользователя")
+    parser.add_argument("--think-ms", type=int, default=0, help="максимальная пауза между действиями")
+    parser.add_argument("--seed", type=int, default=1, help="seed выбора действий и сообщений")
+    parser.add_argument("--app-mode", choices=["live", "stub"], default=Config.APP_MODE,
+                        help="stub - поднять локальную заглушку, live - Config.BASE_URL")
+    parser.add_argument("--base-url", default=None, help="адрес приложения (например, staging)")
+    parser.add_argument("--auth-state", default=None, help="путь к storage_state (по умолчанию Config.AUTH_STATE_PATH, для --base-url - свой файл стенда)")
+    parser.add_argument("--headed", dest="headless", action="store_false", default=None,
+                        help="показывать окна браузера (по умолчанию - как в BROWSER_PROFILE)")
+    parser.add_argument("--output", default=None, help="JSON с итогами и всеми операциями")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = None
+    if args.app_mode == "stub":
+        server, auth_state = start_stub()
+        if args.auth_state is None:
+            args.auth_state = auth_state
+    elif args.base_url:
+        Config.use_base_url(args.base_url)
+        # Сессия другого стенда хранится отдельно от сессии Config.BASE_URL
+        if args.auth_state is None:
+            args.auth_state = state_path_for(args.base_url)
+
+    try:
+        summary = asyncio.run(run_load(args))
+    finally:
+        artifact_writer.flush()
+        if server:
+            server.stop()
+
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
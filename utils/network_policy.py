@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from playwright.sync_api import BrowserContext, Route
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Аналитика и трекеры: не нужны тестам и не дают наступить networkidle
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"facebook\.(net|com)/tr",
+    r"connect\.facebook\.net",
+    r"mc\.yandex\.ru",
+    r"hotjar\.(com|io)",
+    r"clarity\.ms",
+    r"segment\.(io|com)",
+    r"mixpanel\.com",
+    r"amplitude\.com",
+    r"intercom\.io",
+    r"tiktok\.com/i18n/pixel",
+]
+
+# Статика, которую имеет смысл кэшировать между контекстами
+STATIC_RESOURCE_TYPES = ("script", "stylesheet", "font", "image")
+STATIC_EXTENSIONS = r"\.(js|mjs|css|woff2?|ttf|otf|eot|png|jpe?g|gif|svg|webp|avif|ico|mp4|webm|mp3|ogg)(\?|$)"
+# Хэш содержимого в имени файла означает неизменяемый бандл (каталог /static/ или /assets/ сам по себе - нет)
+HASHED_URL_RE = re.compile(r"[.-][0-9a-f]{8,}\.[a-z0-9]+(\?|$)")
+# Заголовки, которые не переносятся в ответ из кэша (тело хранится уже распакованным)
+SKIP_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "set-cookie")
+
+
+class StaticCache:
+    """Общий дисковый кэш статики для всех контекстов и воркеров прогона.
+
+    Неизменяемые ответы (хэш в имени файла, Cache-Control: immutable) отдаются с диска всегда,
+    остальные - до истечения max-age, после чего ревалидируются по ETag/Last-Modified.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or Config.STATIC_CACHE_DIR)
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def get(self, url: str) -> Optional[dict]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            meta["body"] = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes, expires_at: Optional[float]):
+        """Сохраняет ответ; expires_at - до какого времени он свежий (None - неизменяемый)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path, body_path = self._paths(url)
+        suffix = f".{os.getpid()}.tmp"
+        # Тело пишется раньше метаданных: читатель без метаданных считает запись отсутствующей
+        tmp_body = body_path.with_suffix(suffix)
+        tmp_body.write_bytes(body)
+        os.replace(tmp_body, body_path)
+        headers = {name.lower(): value for name, value in headers.items() if name.lower() not in SKIP_HEADERS}
+        tmp_meta = meta_path.with_suffix(suffix)
+        tmp_meta.write_text(
+            json.dumps({"url": url, "status": status, "headers": headers, "expires_at": expires_at}), encoding="utf-8"
+        )
+        os.replace(tmp_meta, meta_path)
+
+    @staticmethod
+    def is_fresh(entry: dict) -> bool:
+        # Записи без срока (из старых версий кэша) считаются устаревшими
+        expires_at = entry.get("expires_at", 0)
+        return expires_at is None or expires_at > time.time()
+
+    @staticmethod
+    def validators(headers: Dict[str, str]) -> Dict[str, str]:
+        """Заголовки условного запроса для ревалидации записи"""
+        result = {}
+        if headers.get("etag"):
+            result["if-none-match"] = headers["etag"]
+        if headers.get("last-modified"):
+            result["if-modified-since"] = headers["last-modified"]
+        return result
+
+    @classmethod
+    def expires_at(cls, url: str, headers: Dict[str, str]) -> Union[float, None, bool]:
+        """Срок свежести ответа: None - неизменяемый, время - до истечения max-age, False - не кэшировать"""
+        cache_control = headers.get("cache-control", "").lower()
+        if "no-store" in cache_control or "private" in cache_control:
+            return False
+        if "immutable" in cache_control or HASHED_URL_RE.search(url):
+            return None
+        max_age = re.search(r"max-age=(\d+)", cache_control)
+        if "no-cache" in cache_control or not max_age:
+            # Без срока свежести хранить имеет смысл только то, что можно ревалидировать
+            return time.time() if cls.validators(headers) else False
+        return time.time() + int(max_age.group(1))
+
+
+class NetworkPolicy:
+    """Политика ресурсов контекста: блокировка по типу и URL и ответы статики из общего кэша.
+
+    Без блокировки по типу маршрут регистрируется регуляркой, которая фильтруется на стороне драйвера,
+    и в Python попадают только кандидаты на блокировку или кэш. Тип ресурса по URL не определить
+    (медиа без расширения, xhr, eventsource), поэтому при непустом blocked_types перехватываются все запросы.
+    """
+
+    def __init__(self, blocked_types: Optional[List[str]] = None, blocked_urls: Optional[List[str]] = None,
+                 allowed_urls: Optional[List[str]] = None, allowed_types: Optional[List[str]] = None,
+                 cache: Optional[StaticCache] = None):
+        self.blocked_types = set(Config.BLOCKED_RESOURCE_TYPES if blocked_types is None else blocked_types)
+        self.allowed_types = set(Config.ALLOWED_RESOURCE_TYPES if allowed_types is None else allowed_types)
+        blocked_urls = DEFAULT_BLOCKED_URL_PATTERNS + Config.BLOCKED_URL_PATTERNS if blocked_urls is None else blocked_urls
+        allowed_urls = Config.ALLOWED_URL_PATTERNS if allowed_urls is None else allowed_urls
+        self.blocked_re = re.compile("|".join(blocked_urls)) if blocked_urls else None
+        self.allowed_re = re.compile("|".join(allowed_urls)) if allowed_urls else None
+        if cache is None and Config.STATIC_CACHE:
+            cache = StaticCache()
+        self.cache = cache
+        if self.blocked_types - self.allowed_types:
+            self.route_pattern = "**/*"
+        else:
+            self.route_pattern = re.compile("|".join(filter(None, [STATIC_EXTENSIONS, "|".join(blocked_urls)])))
+        self._stats: Dict[int, Dict[str, int]] = {}
+
+    # Статистика
+    def reset(self, context: BrowserContext):
+        """Обнуляет счетчики контекста (перед каждым тестом)"""
+        self._stats[id(context)] = {
+            "blocked_requests": 0,
+            "cache_hits": 0,
+            "cache_bytes_saved": 0,
+            "cache_revalidated": 0,
+            "cache_misses": 0,
+        }
+
+    def stats(self, context: BrowserContext) -> Dict[str, int]:
+        return dict(self._stats.get(id(context), {}))
+
+    def _count(self, context: BrowserContext, name: str, value: int = 1):
+        stats = self._stats.setdefault(id(context), {})
+        stats[name] = stats.get(name, 0) + value
+
+    # Маршрутизация
+    def attach(self, context: BrowserContext):
+        """Подключает политику к новому контексту"""
+        self.reset(context)
+        context.route(self.route_pattern, lambda route: self._handle(context, route))
+
+    def _handle(self, context: BrowserContext, route: Route):
+        request = route.request
+        url = request.url
+        if request.resource_type in self.allowed_types or (self.allowed_re and self.allowed_re.search(url)):
+            return route.fallback()
+
+        if request.resource_type in self.blocked_types or (self.blocked_re and self.blocked_re.search(url)):
+            self._count(context, "blocked_requests")
+            logger.debug("Blocked %s: %s", request.resource_type, url)
+            return route.abort("blockedbyclient")
+
+        if request.method != "GET" or request.resource_type not in STATIC_RESOURCE_TYPES or not self.cache:
+            return route.fallback()
+
+        cached = self.cache.get(url)
+        if cached and self.cache.is_fresh(cached):
+            self._count(context, "cache_hits")
+            self._count(context, "cache_bytes_saved", len(cached["body"]))
+            return route.fulfill(status=cached["status"], headers=cached["headers"], body=cached["body"])
+
+        # Устаревшая запись ревалидируется условным запросом: 304 - тело берется из кэша
+        validators = self.cache.validators(cached["headers"]) if cached else {}
+        try:
+            response = route.fetch(headers=dict(request.headers, **validators) if validators else None)
+        except Exception as e:
+            logger.debug(f"Static fetch failed, continuing request: {str(e)}")
+            return route.fallback()
+        if cached and response.status == 304:
+            headers = dict(cached["headers"], **{name.lower(): value for name, value in response.headers.items()
+                                                 if name.lower() not in SKIP_HEADERS})
+            expires_at = self.cache.expires_at(url, headers)
+            if expires_at is not False:
+                self.cache.put(url, cached["status"], headers, cached["body"], expires_at)
+            self._count(context, "cache_revalidated")
+            self._count(context, "cache_bytes_saved", len(cached["body"]))
+            return route.fulfill(status=cached["status"], headers=cached["headers"], body=cached["body"])
+
+        self._count(context, "cache_misses")
+        body = response.body()
+        if response.status == 200:
+            expires_at = self.cache.expires_at(url, response.headers)
+            if expires_at is not False:
+                self.cache.put(url, response.status, response.headers, body, expires_at)
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in SKIP_HEADERS}
+        route.fulfill(status=response.status, headers=headers, body=body)
@@ -0,0 +1,156 @@
+import re
+import sys
+import time
+import uuid
+import logging
+import argparse
+from typing import Callable, Dict, List, Optional
+from playwright.sync_api import APIRequestContext, sync_playwright
+from utils.artifacts import RUN_ID
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PromptApiUnavailable(Exception):
+    """Приложение не отдает список промптов через HTTP API (нет маршрута, нет доступа или другой формат)"""
+
+
+class PromptFactory:
+    """Тестовые custom prompts через HTTP API приложения.
+
+    Запросы идут через APIRequestContext авторизованного контекста браузера, поэтому
+    используют его cookie. Имена промптов начинаются с Config.TEST_DATA_PREFIX и содержат
+    прогон и время создания: cleanup удаляет промпты теста, sweep - остатки прошлых прогонов.
+    Без API промпты, созданные через UI, удаляются через ui_delete(text) -> bool (был ли промпт).
+    """
+
+    def __init__(self, request: APIRequestContext, api_url: Optional[str] = None, prefix: Optional[str] = None,
+                 ui_delete: Optional[Callable[[str], bool]] = None):
+        self.request = request
+        self.ui_delete = ui_delete
+        self.api_url = (api_url or Config.PROMPTS_API_URL).rstrip("/")
+        self.prefix = prefix or Config.TEST_DATA_PREFIX
+        self.created: Dict[int, dict] = {}
+        # Тексты, выданные тесту для создания промпта через UI (id известен только приложению)
+        self.issued: List[str] = []
+
+    def unique_text(self, text: str = "prompt") -> str:
+        """Уникальный текст промпта с префиксом тестовых данных; такой промпт удаляется в cleanup"""
+        unique = f"{self.prefix}{RUN_ID}-{int(time.time())}-{uuid.uuid4().hex[:6]} {text}"
+        self.issued.append(unique)
+        return unique
+
+    def list(self) -> List[dict]:
+        response = self.request.get(self.api_url)
+        if not response.ok:
+            raise PromptApiUnavailable(f"GET {self.api_url} failed: {response.status}")
+        try:
+            prompts = response.json()
+        except ValueError:
+            raise PromptApiUnavailable(f"GET {self.api_url} did not return JSON")
+        if not isinstance(prompts, list) or not all(isinstance(p, dict) and {"id", "text"} <= p.keys() for p in prompts):
+            raise PromptApiUnavailable(f"GET {self.api_url} returned an unexpected body")
+        return prompts
+
+    def create(self, text: str = "prompt") -> dict:
+        """Создает промпт через API и возвращает его ({"id", "text"})"""
+        response = self.request.post(self.api_url, data={"text": self.unique_text(text)})
+        if not response.ok:
+            raise RuntimeError(f"POST {self.api_url} failed: {response.status} {response.text()}")
+        prompt = response.json()
+        self.created[prompt["id"]] = prompt
+        logger.debug("Created prompt %s via API", prompt["id"])
+        return prompt
+
+    def delete(self, prompt_id: int) -> bool:
+        """Удаляет промпт; уже удаленный (404) не считается ошибкой"""
+        response = self.request.delete(f"{self.api_url}/{prompt_id}")
+        self.created.pop(prompt_id, None)
+        if response.ok or response.status == 404:
+            return response.ok
+        raise RuntimeError(f"DELETE {self.api_url}/{prompt_id} failed: {response.status} {response.text()}")
+
+    def cleanup(self) -> int:
+        """Удаляет все промпты теста: созданные через API и созданные через UI по выданным текстам.
+
+        Без API промпты из UI удаляются через ui_delete; если удалить не удалось, поднимается RuntimeError.
+        """
+        if not (self.created or self.issued):
+            return 0
+        issued, created = list(self.issued), set(self.created)
+        self.created.clear()
+        self.issued.clear()
+        try:
+            ids = {prompt["id"] for prompt in self.list() if prompt["id"] in created or prompt["text"] in issued}
+        except PromptApiUnavailable as e:
+            if not self.ui_delete:
+                raise RuntimeError(f"Test prompts were not deleted, no UI fallback: {str(e)}") from e
+            logger.info(f"Prompts API unavailable ({str(e)}), deleting test prompts through the UI")
+            return self._delete_all(created) + self._ui_delete_all(issued)
+        return self._delete_all(ids)
+
+    def sweep(self, min_age: Optional[int] = None) -> int:
+        """Удаляет тестовые промпты прошлых прогонов старше min_age секунд"""
+        min_age = Config.TEST_DATA_SWEEP_AGE if min_age is None else min_age
+        pattern = re.compile(rf"{re.escape(self.prefix)}(\w+)-(\d+)-")
+        now = time.time()
+        stale = set()
+        for prompt in self.list():
+            if not prompt["text"].startswith(self.prefix):
+                continue
+            match = pattern.match(prompt["text"])
+            # Промпты текущего прогона и свежие промпты параллельных прогонов не трогаем
+            if match and (match.group(1) == RUN_ID or now - int(match.group(2)) < min_age):
+                continue
+            stale.add(prompt["id"])
+        deleted = self._delete_all(stale)
+        if deleted:
+            logger.info(f"Swept {deleted} leftover test prompts")
+        return deleted
+
+    def _delete_all(self, ids) -> int:
+        deleted, failed = 0, []
+        for prompt_id in ids:
+            try:
+                deleted += self.delete(prompt_id)
+            except Exception as e:
+                logger.warning(f"Failed to delete prompt {prompt_id}: {str(e)}")
+                failed.append(prompt_id)
+        if failed:
+            raise RuntimeError(f"Test prompts were not deleted: {failed}")
+        return deleted
+
+    def _ui_delete_all(self, texts: List[str]) -> int:
+        deleted, failed = 0, []
+        for text in texts:
+            try:
+                deleted += self.ui_delete(text)
+            except Exception as e:
+                logger.warning(f"Failed to delete prompt {text!r} through the UI: {str(e)}")
+                failed.append(text)
+        if failed:
+            raise RuntimeError(f"Test prompts were not deleted through the UI: {failed}")
+        return deleted
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.prompt_factory", description="Очистка тестовых промптов")
+    parser.add_argument("command", choices=["sweep"])
+    parser.add_argument("--min-age", type=int, default=0, help="удалять промпты старше N секунд")
+    parser.add_argument("--auth-state", default=Config.AUTH_STATE_PATH, help="storage_state авторизованной сессии")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with sync_playwright() as playwright:
+        request = playwright.request.new_context(storage_state=args.auth_state)
+        try:
+            deleted = PromptFactory(request).sweep(min_age=args.min_age)
+        finally:
+            request.dispose()
+    print(f"Deleted {deleted} test prompts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from utils.artifacts import worker_id
+from config import Config
+
+
+def build_response_metrics(kind: str, prompt: Optional[str], sent_at: float, timing: dict) -> dict:
+    """Метрики одного ответа AI по таймингам wait_for_ai_response"""
+    total_ms = timing.get("last_token_ms")
+    chars = timing.get("chars", 0)
+    return {
+        "kind": kind,
+        "prompt": prompt,
+        "sent_at": round(sent_at, 3),
+        "ttft_ms": None if timing.get("first_token_ms") is None else round(timing["first_token_ms"], 1),
+        "total_ms": None if total_ms is None else round(total_ms, 1),
+        "chars": chars,
+        "chars_per_s": round(chars / (total_ms / 1000), 1) if total_ms else None,
+    }
+
+
+class ResponseMetrics:
+    """Метрики ответов AI по тестам: вложение Allure, JSON прогона и проверка бюджетов по маркерам"""
+
+    def __init__(self, budgets: Optional[Dict[str, Dict[str, float]]] = None):
+        self.budgets = Config.LATENCY_BUDGETS if budgets is None else budgets
+        self.by_test: Dict[str, List[dict]] = {}
+        self._current: Optional[str] = None
+        self._responses: List[dict] = []
+
+    def record(self, metrics: dict):
+        if self._current:
+            self._responses.append(metrics)
+
+    def start_test(self, nodeid: str):
+        self._current = nodeid
+        self._responses = []
+
+    def finish_test(self) -> List[dict]:
+        responses = self._responses
+        if self._current and responses:
+            self.by_test[self._current] = responses
+        self._current = None
+        self._responses = []
+        return responses
+
+    def budget_violations(self, markers: Iterable[str]) -> List[str]:
+        """Нарушения бюджетов задержки текущего теста для его маркеров"""
+        violations = []
+        for marker in markers:
+            for metric, limit in self.budgets.get(marker, {}).items():
+                for index, response in enumerate(self._responses):
+                    value = response.get(metric)
+                    if value is not None and value > limit:
+                        violations.append(f"{marker}: response #{index + 1} ({response['kind']}) {metric}={value} > {limit}")
+        return violations
+
+    def save(self, path: Optional[str] = None) -> Optional[Path]:
+        """Сохраняет метрики прогона в JSON (отдельный файл на воркер)"""
+        if not self.by_test:
+            return None
+        base = Path(path or Config.RESPONSE_METRICS_PATH)
+        path = base.with_name(f"{base.stem}.{worker_id()}{base.suffix}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.by_test, indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+
+response_metrics = ResponseMetrics()
@@ -0,0 +1,112 @@
+import re
+import time
+from typing import Optional
+from config import Config
+
+
+# Ставит в странице MutationObserver на последний блок ответа AI.
+# Фиксирует момент первого и последнего изменения текста относительно момента "взвода".
+ARM_RESPONSE_WATCH_JS = """
+(selector) => {
+    const previous = window.__aiResponseWatch;
+    if (previous && previous.observer) previous.observer.disconnect();
+
+    const lastBlock = () => {
+        const blocks = document.querySelectorAll(selector);
+        return blocks.length ? blocks[blocks.length - 1] : null;
+    };
+    const textOf = (block) => (block ? block.innerText.trim() : "");
+
+    const state = {
+        startedAt: performance.now(),
+        baselineCount: document.querySelectorAll(selector).length,
+        baselineText: textOf(lastBlock()),
+        lastText: null,
+        firstTokenAt: null,
+        lastTokenAt: null,
+        // Стримы, которые отдает сама страница (запись/воспроизведение ответов, см. completion_recorder)
+        baselineStreams: window.__completionStreams ? window.__completionStreams.started : 0,
+    };
+    state.check = () => {
+        const block = lastBlock();
+        if (!block) return;
+        const count = document.querySelectorAll(selector).length;
+        const text = textOf(block);
+        // Пока не появился новый блок и текст последнего не изменился - ответа ещё нет
+        if (count === state.baselineCount && text === state.baselineText) return;
+        if (!text || text === state.lastText) return;
+        const now = performance.now();
+        if (state.firstTokenAt === null) state.firstTokenAt = now;
+        state.lastTokenAt = now;
+        state.lastText = text;
+    };
+    state.observer = new MutationObserver(state.check);
+    state.observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    window.__aiResponseWatch = state;
+}
+"""
+
+# Ждёт, пока после первого токена DOM не будет меняться quietMs миллисекунд
+# и не закончатся стримы, отдаваемые самой страницей.
+# Возвращает тайминги относительно момента "взвода" или timedOut при превышении таймаута.
+WAIT_RESPONSE_QUIET_JS = """
+({quietMs, timeoutMs}) => new Promise((resolve) => {
+    const state = window.__aiResponseWatch;
+    const streams = window.__completionStreams;
+    const deadline = performance.now() + timeoutMs;
+    const result = (timedOut) => ({
+        timedOut,
+        firstTokenMs: state.firstTokenAt === null ? null : state.firstTokenAt - state.startedAt,
+        lastTokenMs: state.lastTokenAt === null ? null : state.lastTokenAt - state.startedAt,
+        chars: state.lastText ? state.lastText.length : 0,
+        pageStreams: streams ? streams.started - state.baselineStreams : 0,
+    });
+    const tick = () => {
+        state.check();
+        const now = performance.now();
+        const streaming = streams && streams.pending > 0;
+        if (state.lastTokenAt !== null && now - state.lastTokenAt >= quietMs && !streaming) {
+            resolve(result(false));
+        } else if (now >= deadline) {
+            resolve(result(true));
+        } else {
+            setTimeout(tick, Math.min(50, quietMs));
+        }
+    };
+    tick();
+})
+"""
+
+
+class StreamTracker:
+    """Отслеживает стриминговые запросы чата (по Config.CHAT_STREAM_PATTERN) через события страницы"""
+
+    def __init__(self, page, pattern: Optional[str] = None):
+        self.pattern = re.compile(pattern or Config.CHAT_STREAM_PATTERN)
+        self.in_flight = set()
+        self.seen = 0
+        self.finished_at = None
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    def _matches(self, request) -> bool:
+        return request.resource_type in ("fetch", "xhr", "eventsource") and bool(self.pattern.search(request.url))
+
+    def _on_request(self, request):
+        if self._matches(request):
+            self.in_flight.add(request)
+            self.seen += 1
+
+    def _on_done(self, request):
+        if request in self.in_flight:
+            self.in_flight.discard(request)
+            self.finished_at = time.time()
+
+    def reset(self):
+        """Сбрасывает счётчики перед новым ответом"""
+        self.seen = 0
+        self.finished_at = None
+
+    def is_streaming(self) -> bool:
+        return bool(self.in_flight)
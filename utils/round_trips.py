@@ -0,0 +1,85 @@
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+from playwright._impl._connection import Channel
+
+
+class RoundTripCounter:
+    """Учет обращений к драйверу Playwright: количество round trip'ов и время ожидания ответа.
+
+    Перехватывает Channel._inner_send - через него проходит каждый запрос клиента к драйверу,
+    будь то клик, ожидание селектора или evaluate. Сравнение с длительностью теста
+    показывает, сколько стоит сам слой page object'ов.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.total_seconds = 0.0
+        self.by_test: Dict[str, dict] = {}
+        self._current: Optional[str] = None
+        self._calls: Dict[str, int] = defaultdict(int)
+        self._seconds: Dict[str, float] = defaultdict(float)
+        self._original = None
+
+    # Установка перехватчика
+    def install(self):
+        if self._original:
+            return
+        counter = self
+        original = self._original = Channel._inner_send
+
+        async def inner_send(channel, method, params, return_as_dict):
+            started = time.perf_counter()
+            try:
+                return await original(channel, method, params, return_as_dict)
+            finally:
+                counter._record(f"{channel._object._type}.{method}", time.perf_counter() - started)
+
+        Channel._inner_send = inner_send
+
+    def uninstall(self):
+        if not self._original:
+            return
+        Channel._inner_send = self._original
+        self._original = None
+
+    # Учет
+    def _record(self, method: str, seconds: float):
+        self.total += 1
+        self.total_seconds += seconds
+        if self._current:
+            self._calls[method] += 1
+            self._seconds[method] += seconds
+
+    def start_test(self, nodeid: str):
+        self._current = nodeid
+        self._calls = defaultdict(int)
+        self._seconds = defaultdict(float)
+
+    def finish_test(self) -> dict:
+        """Завершает учет теста и возвращает число round trip'ов и время в них по методам протокола"""
+        report = {
+            "round_trips": sum(self._calls.values()),
+            "seconds": round(sum(self._seconds.values()), 3),
+            "methods": {
+                method: {"calls": calls, "seconds": round(self._seconds[method], 3)}
+                for method, calls in sorted(self._calls.items(), key=lambda item: -item[1])
+            },
+        }
+        if self._current:
+            self.by_test[self._current] = report
+        self._current = None
+        return report
+
+    def summary(self, top: int = 10) -> List[str]:
+        """Строки отчета: всего round trip'ов и тесты с наибольшим их числом"""
+        if not self.total:
+            return []
+        lines = [f"Total driver round trips: {self.total} ({self.total_seconds:.1f} s)"]
+        lines.append("Top tests:")
+        for nodeid, report in sorted(self.by_test.items(), key=lambda item: -item[1]["round_trips"])[:top]:
+            lines.append(f"  {report['round_trips']:6d} calls  {report['seconds']:8.1f} s  {nodeid}")
+        return lines
+
+
+round_trips = RoundTripCounter()
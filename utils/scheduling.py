@@ -0,0 +1,129 @@
+import os
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import pytest
+from config import Config
+
+# Длительность теста без истории (секунды) и вес нового замера в скользящем среднем
+DEFAULT_DURATION = 5.0
+EWMA_ALPHA = 0.3
+
+
+class DurationStore:
+    """История длительностей и падений тестов по node id (.perf/durations.json)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or Config.DURATIONS_PATH)
+        self.tests: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def duration(self, nodeid: str) -> float:
+        entry = self.tests.get(nodeid)
+        if entry:
+            return entry["duration"]
+        known = sorted(entry["duration"] for entry in self.tests.values())
+        return known[len(known) // 2] if known else DEFAULT_DURATION
+
+    def last_failed(self, nodeid: str) -> float:
+        return self.tests.get(nodeid, {}).get("last_failed") or 0
+
+    def update(self, nodeid: str, duration: float, failed: bool):
+        entry = self.tests.get(nodeid)
+        if entry:
+            entry["duration"] = round(EWMA_ALPHA * duration + (1 - EWMA_ALPHA) * entry["duration"], 3)
+            entry["runs"] += 1
+        else:
+            entry = self.tests[nodeid] = {"duration": round(duration, 3), "runs": 1, "last_failed": None}
+        entry["last"] = round(duration, 3)
+        if failed:
+            entry["last_failed"] = time.time()
+        elif entry.get("last_failed"):
+            # Тест снова зеленый - больше не считается недавно упавшим
+            entry["last_failed"] = None
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.tests, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """'2/4' -> (2, 4): номер шарда с единицы и число шардов"""
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise pytest.UsageError(f"--shard expects i/n, got {value!r}")
+    if not 1 <= index <= total:
+        raise pytest.UsageError(f"--shard index must be between 1 and {total}, got {index}")
+    return index, total
+
+
+def balance_shards(items: list, total: int, store: DurationStore) -> List[list]:
+    """Жадное распределение по шардам: самый долгий тест - в наименее загруженный шард"""
+    shards = [[] for _ in range(total)]
+    loads = [0.0] * total
+    for item in sorted(items, key=lambda item: (-store.duration(item.nodeid), item.nodeid)):
+        target = loads.index(min(loads))
+        shards[target].append(item)
+        loads[target] += store.duration(item.nodeid)
+    return shards
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("scheduling", "порядок и шардирование тестов по истории длительностей")
+    group.addoption("--schedule", choices=["file", "longest-first", "failed-first"], default="file",
+                    help="file - порядок файлов, longest-first - сначала долгие, "
+                         "failed-first - сначала недавно упавшие, затем долгие")
+    group.addoption("--shard", default=None, metavar="i/n",
+                    help="запустить только i-й из n шардов, сбалансированных по длительности")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(DurationScheduler(config), "duration_scheduler")
+
+
+class DurationScheduler:
+    """Упорядочивает и шардирует тесты по истории, после прогона обновляет историю"""
+
+    def __init__(self, config):
+        self.config = config
+        self.store = DurationStore()
+        self.durations: Dict[str, dict] = {}
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        shard = config.getoption("shard")
+        if shard:
+            index, total = parse_shard(shard)
+            selected = set(balance_shards(items, total, self.store)[index - 1])
+            deselected = [item for item in items if item not in selected]
+            items[:] = [item for item in items if item in selected]
+            if deselected:
+                config.hook.pytest_deselected(items=deselected)
+
+        schedule = config.getoption("schedule")
+        if schedule == "longest-first":
+            items.sort(key=lambda item: -self.store.duration(item.nodeid))
+        elif schedule == "failed-first":
+            items.sort(key=lambda item: (-self.store.last_failed(item.nodeid), -self.store.duration(item.nodeid)))
+
+    def pytest_runtest_logreport(self, report):
+        # Под xdist отчеты воркеров приходят и в главный процесс - история копится там
+        entry = self.durations.setdefault(report.nodeid, {"duration": 0.0, "failed": False})
+        entry["duration"] += report.duration
+        entry["failed"] = entry["failed"] or report.failed
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(self.config, "workerinput") or not self.durations:
+            return
+        for nodeid, entry in self.durations.items():
+            self.store.update(nodeid, entry["duration"], entry["failed"])
+        self.store.save()
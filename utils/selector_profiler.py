@@ -0,0 +1,164 @@
+import json
+import time
+import logging
+import functools
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from playwright.sync_api import Locator, Page
+from utils.artifacts import worker_id
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DOM_SIZE_JS = "() => document.getElementsByTagName('*').length"
+
+
+def iter_locators(page_object) -> Iterator[Tuple[str, Locator]]:
+    """Именованные локаторы page object'а: атрибуты-Locator и словари локаторов"""
+    owner = type(page_object).__name__
+    for attr, value in vars(page_object).items():
+        if isinstance(value, Locator):
+            yield f"{owner}.{attr}", value
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(item, Locator):
+                    yield f"{owner}.{attr}[{key}]", item
+
+
+def selector_of(locator: Locator) -> str:
+    return getattr(locator._impl_obj, "_selector", str(locator))
+
+
+def _slope(points: List[Tuple[int, float]]) -> Optional[float]:
+    """Наклон МНК: рост стоимости в мс на 1000 узлов DOM (None, если размер DOM не менялся)"""
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return None
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return covariance / variance * 1000
+
+
+class SelectorProfiler:
+    """Стоимость разрешения локаторов на живом DOM.
+
+    Замер - locator.count() по каждому именованному локатору page object'а за вычетом
+    пустого round trip'а к странице. Замеры снимаются после каждого ответа AI
+    и в конце теста, вместе с размером DOM, чтобы видеть рост стоимости по мере
+    удлинения чата.
+    """
+
+    def __init__(self):
+        self.samples: Dict[str, List[dict]] = {}
+        self.selectors: Dict[str, str] = {}
+        self._test_samples: List[dict] = []
+        self._original = None
+
+    # Точки замера
+    def install(self):
+        """Добавляет замер после каждого ответа AI в ChatPage"""
+        if self._original:
+            return
+        from pages.chat_page import ChatPage
+        profiler = self
+        original = self._original = ChatPage.wait_for_ai_response
+
+        @functools.wraps(original)
+        def wait_for_ai_response(chat_page, *args, **kwargs):
+            result = original(chat_page, *args, **kwargs)
+            profiler.sample(chat_page.page, [chat_page])
+            return result
+
+        ChatPage.wait_for_ai_response = wait_for_ai_response
+
+    def uninstall(self):
+        if not self._original:
+            return
+        from pages.chat_page import ChatPage
+        ChatPage.wait_for_ai_response = self._original
+        self._original = None
+
+    # Замеры
+    @staticmethod
+    def _round_trip_ms(page: Page) -> float:
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            page.evaluate("0")
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)[1]
+
+    def sample(self, page: Page, page_objects: list):
+        """Замеряет все именованные локаторы переданных page object'ов"""
+        if page.is_closed():
+            return
+        try:
+            dom_nodes = page.evaluate(DOM_SIZE_JS)
+            overhead = self._round_trip_ms(page)
+            for page_object in page_objects:
+                for name, locator in iter_locators(page_object):
+                    started = time.perf_counter()
+                    matches = locator.count()
+                    elapsed = (time.perf_counter() - started) * 1000
+                    sample = {
+                        "locator": name,
+                        "dom_nodes": dom_nodes,
+                        "ms": round(max(elapsed - overhead, 0.0), 3),
+                        "matches": matches,
+                    }
+                    self.selectors[name] = selector_of(locator)
+                    self.samples.setdefault(name, []).append(sample)
+                    self._test_samples.append(sample)
+        except Exception as e:
+            logger.debug("Selector sampling skipped: %s", e)
+
+    def start_test(self):
+        self._test_samples = []
+
+    def finish_test(self) -> List[dict]:
+        samples, self._test_samples = self._test_samples, []
+        return samples
+
+    # Отчет
+    def ranking(self) -> List[dict]:
+        """Локаторы от самых дорогих: средняя стоимость, стоимость на самом большом DOM и рост на 1000 узлов"""
+        rows = []
+        for name, samples in self.samples.items():
+            costs = [sample["ms"] for sample in samples]
+            largest = max(samples, key=lambda sample: sample["dom_nodes"])
+            slope = _slope([(sample["dom_nodes"], sample["ms"]) for sample in samples])
+            rows.append({
+                "locator": name,
+                "selector": self.selectors.get(name, ""),
+                "samples": len(samples),
+                "mean_ms": round(sum(costs) / len(costs), 3),
+                "max_ms": max(costs),
+                "largest_dom_nodes": largest["dom_nodes"],
+                "ms_at_largest_dom": largest["ms"],
+                "ms_per_1000_nodes": None if slope is None else round(slope, 3),
+            })
+        return sorted(rows, key=lambda row: -row["mean_ms"])
+
+    def save(self, directory: Optional[str] = None) -> Optional[Path]:
+        """Сохраняет рейтинг в .perf/selectors.<воркер>.json"""
+        if not self.samples:
+            return None
+        path = Path(directory or Path(Config.PERF_DB_PATH).parent) / f"selectors.{worker_id()}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.ranking(), indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def summary(self, top: int = 15) -> List[str]:
+        rows = self.ranking()
+        if not rows:
+            return []
+        lines = [f"{'mean ms':>8} {'max ms':>8} {'ms/1k nodes':>11}  locator (selector)"]
+        for row in rows[:top]:
+            slope = "-" if row["ms_per_1000_nodes"] is None else f"{row['ms_per_1000_nodes']:.3f}"
+            lines.append(f"{row['mean_ms']:8.2f} {row['max_ms']:8.2f} {slope:>11}  {row['locator']} ({row['selector']})")
+        return lines
+
+
+selector_profiler = SelectorProfiler()
@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import time
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlparse
+from playwright.sync_api import Browser, Page
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def file_lock(lock_path: Path, timeout: int = 180):
+    """Межпроцессная блокировка на файле-маркере; брошенная упавшим процессом снимается через timeout"""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            break
+        except FileExistsError:
+            # Блокировка, оставшаяся от упавшего процесса, считается брошенной
+            try:
+                if time.time() - lock_path.stat().st_mtime > timeout:
+                    lock_path.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"Could not acquire lock: {lock_path}")
+            time.sleep(0.5)
+    try:
+        yield
+    finally:
+        try:
+            lock_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def state_path_for(base_url: str) -> str:
+    """Путь к storage_state другого адреса приложения: сессии разных стендов не перезаписывают друг друга"""
+    host = re.sub(r"[^A-Za-z0-9.-]+", "_", urlparse(base_url).netloc or base_url)
+    return str(Path(Config.AUTH_STATE_PATH).with_name(f"storage_state.{host}.json"))
+
+
+class SessionCache:
+    """Кэш авторизованной сессии: storage_state на диске со сроком жизни.
+
+    Файл общий для всех воркеров, поэтому перелогин выполняется под файловой
+    блокировкой: первый воркер логинится, остальные ждут и читают готовый state.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[int] = None):
+        self.path = Path(path or Config.AUTH_STATE_PATH)
+        self.meta_path = self.path.with_suffix(".meta.json")
+        self.lock_path = self.path.with_suffix(".lock")
+        self.ttl = Config.AUTH_STATE_TTL if ttl is None else ttl
+
+    # Метаданные
+    def _read_meta(self) -> dict:
+        try:
+            return json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def is_fresh(self) -> bool:
+        """Проверка, что state существует и ещё не истёк"""
+        meta = self._read_meta()
+        return self.path.exists() and meta.get("expires_at", 0) > time.time()
+
+    def saved_at(self) -> float:
+        """Время сохранения текущего state (0, если его нет)"""
+        return self._read_meta().get("saved_at", 0)
+
+    def invalidate(self):
+        """Помечает state как протухший"""
+        for path in (self.path, self.meta_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        logger.info(f"Session state invalidated: {self.path}")
+
+    # Межпроцессная блокировка
+    def lock(self, timeout: int = 180):
+        """Файловая блокировка на время логина (работает и на Windows)"""
+        return file_lock(self.lock_path, timeout)
+
+    # Работа со state
+    def save(self, page: Page):
+        """Сохраняет storage_state контекста страницы атомарно"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        page.context.storage_state(path=tmp_path, indexed_db=True)
+        os.replace(tmp_path, self.path)
+        self._write_meta()
+
+    def _write_meta(self):
+        now = time.time()
+        meta = {"saved_at": now, "expires_at": now + self.ttl}
+        self.meta_path.write_text(json.dumps(meta), encoding="utf-8")
+        logger.info(f"Session state saved to {self.path}")
+
+    def is_valid_page(self, page: Page) -> bool:
+        """Дешёвая проверка сессии: один переход на страницу чатов без редиректа на логин"""
+        page.goto(Config.CHATS_URL)
+        try:
+            # SPA редиректит на логин уже после load, поэтому ждём либо поле ввода чата, либо смену URL
+            page.wait_for_function(
+                """(chatsUrl) => !location.href.startsWith(chatsUrl)
+                    || document.querySelector('[placeholder="Type your message here"]')""",
+                arg=Config.CHATS_URL,
+                timeout=15000,
+            )
+        except Exception:
+            return False
+        return page.url.startswith(Config.CHATS_URL)
+
+    def _adopt(self, page: Page) -> bool:
+        """Подкладывает в контекст cookies из сохранённого state и перепроверяет сессию"""
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        page.context.add_cookies(state.get("cookies", []))
+        return self.is_valid_page(page)
+
+    def refresh(self, browser: Browser, login: Callable[[Page], bool]) -> str:
+        """Логин в отдельном контексте и сохранение state под блокировкой"""
+        with self.lock():
+            # Пока ждали блокировку, state мог обновить другой воркер
+            if self.is_fresh():
+                return str(self.path)
+
+            context = browser.new_context(viewport={"width": 1280, "height": 720})
+            try:
+                page = context.new_page()
+                if not login(page):
+                    raise RuntimeError("Login failed, session state was not saved")
+                self.save(page)
+            finally:
+                context.close()
+        return str(self.path)
+
+    def get_state(self, browser: Browser, login: Callable[[Page], bool]) -> str:
+        """Возвращает путь к актуальному storage_state, при необходимости логинится"""
+        if self.is_fresh():
+            return str(self.path)
+        return self.refresh(browser, login)
+
+    def ensure_page(self, page: Page, login: Callable[[Page], bool]) -> Page:
+        """Проверяет сессию страницы и перелогинивается, если она протухла"""
+        stale_since = self.saved_at()
+        if self.is_valid_page(page):
+            return page
+
+        logger.warning("Cached session is stale, re-authenticating")
+        with self.lock():
+            # Другой воркер мог уже обновить state - пробуем его подхватить
+            if self.saved_at() > stale_since and self._adopt(page):
+                return page
+            if not login(page):
+                raise RuntimeError("Re-authentication failed")
+            self.save(page)
+        return page
+
+    # Версии для playwright.async_api (pages/aio)
+    async def async_save(self, page):
+        """Сохраняет storage_state async-контекста атомарно"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        await page.context.storage_state(path=tmp_path, indexed_db=True)
+        os.replace(tmp_path, self.path)
+        self._write_meta()
+
+    async def async_get_state(self, browser, login: Callable[[object], Awaitable[bool]]) -> str:
+        """Путь к актуальному storage_state для async-браузера, при необходимости логинится"""
+        if self.is_fresh():
+            return str(self.path)
+        # Блокировка синхронная: логин выполняется один раз до запуска параллельных сессий
+        with self.lock():
+            if self.is_fresh():
+                return str(self.path)
+            context = await browser.new_context(viewport={"width": 1280, "height": 720})
+            try:
+                page = await context.new_page()
+                if not await login(page):
+                    raise RuntimeError("Login failed, session state was not saved")
+                await self.async_save(page)
+            finally:
+                await context.close()
+        return str(self.path)
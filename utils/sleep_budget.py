@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import threading
+import playwright
+from collections import defaultdict
+from typing import Dict, List, Optional
+from playwright.sync_api import Frame, Page
+
+# Кадры из этих мест пропускаются при определении места вызова
+_SKIP_PATHS = (os.path.abspath(__file__), os.path.dirname(os.path.abspath(playwright.__file__)))
+
+
+class SleepBudget:
+    """Учет "мертвого" времени: перехватывает time.sleep и wait_for_timeout.
+
+    Копит простой по текущему тесту и по месту вызова (файл:строка) за весь прогон.
+    Учитываются только вызовы из главного потока: фоновые потоки (заглушка
+    приложения, запись артефактов) на время теста не влияют.
+    """
+
+    def __init__(self):
+        self.by_site: Dict[str, float] = defaultdict(float)
+        self.calls_by_site: Dict[str, int] = defaultdict(int)
+        self.by_test: Dict[str, float] = {}
+        self._current: Optional[str] = None
+        self._current_sites: Dict[str, float] = defaultdict(float)
+        self._originals = {}
+
+    # Установка перехватчиков
+    def install(self):
+        if self._originals:
+            return
+        budget = self
+        self._originals = {
+            "sleep": time.sleep,
+            "page": Page.wait_for_timeout,
+            "frame": Frame.wait_for_timeout,
+        }
+        original_sleep = self._originals["sleep"]
+
+        def sleep(seconds):
+            budget._record(seconds)
+            return original_sleep(seconds)
+
+        def page_wait(page, timeout):
+            budget._record(timeout / 1000)
+            return budget._originals["page"](page, timeout)
+
+        def frame_wait(frame, timeout):
+            budget._record(timeout / 1000)
+            return budget._originals["frame"](frame, timeout)
+
+        time.sleep = sleep
+        Page.wait_for_timeout = page_wait
+        Frame.wait_for_timeout = frame_wait
+
+    def uninstall(self):
+        if not self._originals:
+            return
+        time.sleep = self._originals["sleep"]
+        Page.wait_for_timeout = self._originals["page"]
+        Frame.wait_for_timeout = self._originals["frame"]
+        self._originals = {}
+
+    # Учет
+    @staticmethod
+    def _call_site() -> str:
+        frame = sys._getframe(2)
+        while frame:
+            filename = os.path.abspath(frame.f_code.co_filename)
+            if not filename.startswith(_SKIP_PATHS):
+                return f"{os.path.relpath(filename)}:{frame.f_lineno} ({frame.f_code.co_name})"
+            frame = frame.f_back
+        return "<unknown>"
+
+    def _record(self, seconds: float):
+        if threading.current_thread() is not threading.main_thread() or seconds <= 0:
+            return
+        site = self._call_site()
+        self.by_site[site] += seconds
+        self.calls_by_site[site] += 1
+        if self._current:
+            self._current_sites[site] += seconds
+
+    def start_test(self, nodeid: str):
+        self._current = nodeid
+        self._current_sites = defaultdict(float)
+
+    def finish_test(self) -> Dict[str, float]:
+        """Завершает учет теста и возвращает простой по местам вызова"""
+        sites = dict(self._current_sites)
+        if self._current:
+            self.by_test[self._current] = sum(sites.values())
+        self._current = None
+        return sites
+
+    def summary(self, top: int = 10) -> List[str]:
+        """Строки отчета: общий простой и самые "дорогие" места вызова и тесты"""
+        if not self.by_site:
+            return []
+        lines = [f"Total idle time: {sum(self.by_site.values()):.1f} s"]
+        lines.append("Top call sites:")
+        for site, seconds in sorted(self.by_site.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"  {seconds:8.1f} s  {self.calls_by_site[site]:5d} calls  {site}")
+        lines.append("Top tests:")
+        for nodeid, seconds in sorted(self.by_test.items(), key=lambda item: -item[1])[:top]:
+            if seconds:
+                lines.append(f"  {seconds:8.1f} s  {nodeid}")
+        return lines
+
+
+sleep_budget = SleepBudget()
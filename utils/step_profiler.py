@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import uuid
+import sqlite3
+import inspect
+import argparse
+import functools
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from config import Config
+
+# Схема хранилища: один прогон - много вызовов шагов
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS step_calls (
+    run_id TEXT NOT NULL,
+    test TEXT NOT NULL,
+    step TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    duration_ms REAL NOT NULL,
+    ok INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS step_calls_step ON step_calls (step, run_id);
+"""
+
+
+def _all_subclasses(cls) -> List[type]:
+    result = []
+    for subclass in cls.__subclasses__():
+        result.append(subclass)
+        result.extend(_all_subclasses(subclass))
+    return result
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль с линейной интерполяцией (q от 0 до 100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class StepStore:
+    """Локальный временной ряд таймингов шагов в SQLite (общий для всех воркеров)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or Config.PERF_DB_PATH)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def append(self, run_id: str, test: str, calls: List[dict]):
+        with self._connect() as connection:
+            connection.execute("INSERT OR IGNORE INTO runs VALUES (?, ?)", (run_id, time.time()))
+            connection.executemany(
+                "INSERT INTO step_calls VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, test, call["step"], call["depth"], call["ms"], int(call["ok"])) for call in calls],
+            )
+        connection.close()
+
+    def runs(self) -> List[str]:
+        """Идентификаторы прогонов от старых к новым"""
+        with self._connect() as connection:
+            rows = connection.execute("SELECT run_id FROM runs ORDER BY started_at").fetchall()
+        connection.close()
+        return [row[0] for row in rows]
+
+    def durations(self, run_ids: List[str]) -> Dict[str, List[float]]:
+        """Длительности успешных вызовов по шагам для указанных прогонов"""
+        if not run_ids:
+            return {}
+        placeholders = ",".join("?" * len(run_ids))
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT step, duration_ms FROM step_calls WHERE ok = 1 AND run_id IN ({placeholders})", run_ids
+            ).fetchall()
+        connection.close()
+        result: Dict[str, List[float]] = {}
+        for step, duration in rows:
+            result.setdefault(step, []).append(duration)
+        return result
+
+
+class StepProfiler:
+    """Профилировщик шагов: оборачивает публичные методы BasePage и всех его наследников.
+
+    Для каждого теста собирает дерево вложенных вызовов (например, ChatPage.send_message
+    внутри содержит BasePage.fill и BasePage.click) с длительностью и статусом.
+    """
+
+    def __init__(self, store: Optional[StepStore] = None):
+        self.store = store or StepStore()
+        self.run_id = os.getenv("PYTEST_XDIST_TESTRUNUID") or uuid.uuid4().hex
+        self._originals: Dict[type, Dict[str, object]] = {}
+        self._stack: List[dict] = []
+        self._roots: List[dict] = []
+        self._calls: List[dict] = []
+        self._current: Optional[str] = None
+
+    # Установка обёрток
+    def install(self):
+        from pages.base_page import BasePage
+        for cls in [BasePage] + _all_subclasses(BasePage):
+            if cls in self._originals:
+                continue
+            originals = self._originals[cls] = {}
+            for name, member in list(vars(cls).items()):
+                if name.startswith("_") or not inspect.isfunction(member) or inspect.iscoroutinefunction(member):
+                    continue
+                originals[name] = member
+                setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", member))
+
+    def uninstall(self):
+        for cls, originals in self._originals.items():
+            for name, member in originals.items():
+                setattr(cls, name, member)
+        self._originals = {}
+
+    def _wrap(self, step: str, method):
+        profiler = self
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if profiler._current is None or threading.current_thread() is not threading.main_thread():
+                return method(*args, **kwargs)
+            node = {"step": step, "depth": len(profiler._stack), "ms": 0.0, "ok": True, "children": []}
+            (profiler._stack[-1]["children"] if profiler._stack else profiler._roots).append(node)
+            profiler._stack.append(node)
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            except BaseException:
+                node["ok"] = False
+                raise
+            finally:
+                node["ms"] = round((time.perf_counter() - started) * 1000, 2)
+                profiler._stack.pop()
+                profiler._calls.append(node)
+
+        return wrapper
+
+    # Учет по тестам
+    def start_test(self, nodeid: str):
+        self._current = nodeid
+        self._stack = []
+        self._roots = []
+        self._calls = []
+
+    def finish_test(self) -> dict:
+        """Завершает учет теста, пишет вызовы в хранилище и возвращает разбивку по шагам"""
+        steps: Dict[str, dict] = {}
+        for call in self._calls:
+            stats = steps.setdefault(call["step"], {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["calls"] += 1
+            stats["total_ms"] = round(stats["total_ms"] + call["ms"], 2)
+            stats["max_ms"] = max(stats["max_ms"], call["ms"])
+        report = {
+            "steps": dict(sorted(steps.items(), key=lambda item: -item[1]["total_ms"])),
+            "tree": self._roots,
+        }
+        if self._current and self._calls:
+            self.store.append(self.run_id, self._current, self._calls)
+        self._current = None
+        return report
+
+
+def regressions(store: StepStore, baseline_runs: int = 10, threshold: float = 1.2, min_ms: float = 20) -> List[dict]:
+    """Шаги, у которых p50 или p95 последнего прогона выросли относительно предыдущих прогонов"""
+    runs = store.runs()
+    if len(runs) < 2:
+        return []
+    current = store.durations(runs[-1:])
+    baseline = store.durations(runs[-1 - baseline_runs:-1])
+    result = []
+    for step, durations in current.items():
+        if step not in baseline:
+            continue
+        row = {"step": step, "calls": len(durations)}
+        flagged = False
+        for q in (50, 95):
+            now, before = percentile(durations, q), percentile(baseline[step], q)
+            row[f"p{q}_ms"], row[f"baseline_p{q}_ms"] = round(now, 1), round(before, 1)
+            if now - before >= min_ms and now >= before * threshold:
+                flagged = True
+        if flagged:
+            result.append(row)
+    return sorted(result, key=lambda row: -(row["p95_ms"] - row["baseline_p95_ms"]))
+
+
+step_profiler = StepProfiler()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.step_profiler", description="Отчет по таймингам шагов page object'ов")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report = subparsers.add_parser("report", help="сравнить последний прогон с базовой линией")
+    report.add_argument("--db", default=None, help="путь к SQLite (по умолчанию Config.PERF_DB_PATH)")
+    report.add_argument("--baseline-runs", type=int, default=10, help="сколько предыдущих прогонов брать за базу")
+    report.add_argument("--threshold", type=float, default=1.2, help="допустимый рост p50/p95 (1.2 = +20%%)")
+    report.add_argument("--min-ms", type=float, default=20, help="минимальный абсолютный рост в мс")
+    args = parser.parse_args(argv)
+
+    store = StepStore(args.db)
+    if not store.path.exists():
+        print(f"No step timings at {store.path}, run the suite with STEP_PROFILER=on first")
+        return 0
+    flagged = regressions(store, args.baseline_runs, args.threshold, args.min_ms)
+    if not flagged:
+        print("No step regressions")
+        return 0
+    print(f"{'step':50} {'calls':>6} {'p50':>9} {'base p50':>9} {'p95':>9} {'base p95':>9}")
+    for row in flagged:
+        print(f"{row['step']:50} {row['calls']:6d} {row['p50_ms']:9.1f} {row['baseline_p50_ms']:9.1f} "
+              f"{row['p95_ms']:9.1f} {row['baseline_p95_ms']:9.1f}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
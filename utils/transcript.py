@@ -0,0 +1,39 @@
+# Снимок переписки за один вызов evaluate: сообщения пользователя и блоки AI в порядке документа
+# с заголовками, параграфами и состоянием кнопок. since - курсор предыдущего снимка:
+# возвращаются только блоки с индексом >= since (если блоков стало меньше - снимок полный, reset=true).
+TRANSCRIPT_JS = """
+({aiSelector, userSelector, since}) => {
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        const style = getComputedStyle(el);
+        return rect.width > 0 && rect.height > 0 && style.visibility !== "hidden" && style.display !== "none";
+    };
+    const buttonState = (button) => ({
+        text: button.innerText.trim(),
+        visible: isVisible(button),
+        disabled: button.disabled,
+    });
+    const all = Array.from(document.querySelectorAll(`${aiSelector}, ${userSelector}`));
+    const reset = since > all.length;
+    const start = reset ? 0 : since;
+    const blocks = all.slice(start).map((el, offset) => {
+        const header = el.querySelector("h1, h2, h3");
+        return {
+            index: start + offset,
+            role: el.matches(aiSelector) ? "ai" : "user",
+            header: header ? header.innerText.trim() : null,
+            paragraphs: Array.from(el.querySelectorAll("p")).map((p) => p.textContent.trim()).filter(Boolean),
+            text: el.innerText.trim(),
+            buttons: Array.from(el.querySelectorAll("button")).map(buttonState),
+        };
+    });
+    const regenerate = Array.from(document.querySelectorAll("button"))
+        .find((button) => button.innerText.includes("Regenerate Response"));
+    return {
+        cursor: all.length,
+        reset,
+        blocks,
+        controls: {regenerate: regenerate ? buttonState(regenerate) : null},
+    };
+}
+"""